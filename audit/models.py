@@ -108,6 +108,37 @@ class AuditLog(models.Model):
             method=method or ''
         )
     
+    @classmethod
+    def log_bulk_actions(cls, user, entries, ip_address=None, user_agent=None, url=None, method=None, batch_size=500):
+        """
+        Registra várias ações da mesma requisição em um único bulk_create
+
+        Args:
+            user: Usuário que executou as ações
+            entries: Iterável de tuplas (ação, objeto, payload)
+            ip_address, user_agent, url, method: Dados da requisição
+        """
+        logs = []
+        for action, obj, payload in entries:
+            if obj is None:
+                continue
+            content_type = ContentType.objects.get_for_model(obj)
+            logs.append(cls(
+                user=user,
+                action=action,
+                entity=content_type.model,
+                entity_id=obj.pk,
+                content_type=content_type,
+                object_id=obj.pk,
+                payload_json=payload,
+                ip_address=ip_address,
+                user_agent=user_agent or '',
+                url=url or '',
+                method=method or ''
+            ))
+
+        return cls.objects.bulk_create(logs, batch_size=batch_size)
+
     @classmethod
     def log_user_action(cls, user, action, entity, entity_id, payload=None, ip_address=None, user_agent=None, url=None, method=None):
         """
@@ -4,9 +4,9 @@ URLs da API do CiviTec
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from users.views import UserViewSet, InviteViewSet, PublicInviteViewSet
-from rh.views import EmployeeViewSet, VacationRequestViewSet, PayslipViewSet
+from rh.views import EmployeeViewSet, VacationRequestViewSet, PayslipViewSet, IncomeStatementViewSet, PayslipAnomalyViewSet
 from tributos.views import TaxpayerViewSet, InvoiceViewSet, AssessmentViewSet, BillingViewSet
-from licitacao.views import ProcurementViewSet, ProcPhaseViewSet, ProposalViewSet, AwardViewSet, ContractViewSet, ContractMilestoneViewSet
+from licitacao.views import SupplierViewSet, ProcurementViewSet, ProcPhaseViewSet, ProposalViewSet, AwardViewSet, ContractViewSet, ContractMilestoneViewSet
 from obras.views import WorkProjectViewSet, WorkProgressViewSet, WorkPhotoViewSet
 from reporting.views import DashboardViewSet
 from audit.views import AuditLogViewSet
@@ -22,6 +22,8 @@ router.register(r'invites', InviteViewSet, basename='invites')
 router.register(r'rh/employees', EmployeeViewSet)
 router.register(r'rh/vacations', VacationRequestViewSet)
 router.register(r'rh/payslips', PayslipViewSet)
+router.register(r'rh/income-statements', IncomeStatementViewSet)
+router.register(r'rh/payslip-anomalies', PayslipAnomalyViewSet)
 
 # Tributos
 router.register(r'tributos/taxpayers', TaxpayerViewSet)
@@ -30,6 +32,7 @@ router.register(r'tributos/assessments', AssessmentViewSet)
 router.register(r'tributos/billings', BillingViewSet)
 
 # Licitação
+router.register(r'licitacao/suppliers', SupplierViewSet)
 router.register(r'licitacao/procurements', ProcurementViewSet)
 router.register(r'licitacao/phases', ProcPhaseViewSet)
 router.register(r'licitacao/proposals', ProposalViewSet)
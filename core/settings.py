@@ -105,6 +105,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Compartilhado entre os processos/servidores: as versões de cache (mapa,
+# dashboards, licitações) precisam ser vistas por todos os workers. Padrão em
+# tabela do banco, criada com python manage.py createcachetable. Para Redis,
+# instale o pacote redis e use
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache e CACHE_LOCATION.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'civitec_cache'),
+    }
+}
+
+if 'redis' not in CACHES['default']['BACKEND']:
+    # Os clusters do mapa gravam até 64 tiles por requisição; com o limite
+    # padrão (300) a limpeza (_cull) descartaria também as chaves de versão
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 50000)),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,5 +1,15 @@
 from django.contrib import admin
-from .models import Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone
+from .models import Supplier, Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone, PriceIndexEntry
+
+
+@admin.register(Supplier)
+class SupplierAdmin(admin.ModelAdmin):
+    """Admin para fornecedores"""
+    list_display = ('name', 'doc', 'proposals_count', 'wins_count', 'contracted_value', 'active_contracts_count')
+    search_fields = ('name', 'doc')
+    ordering = ('name',)
+    
+    readonly_fields = ('proposals_count', 'wins_count', 'contracted_value', 'active_contracts_count', 'created_at', 'updated_at')
 
 
 @admin.register(Procurement)
@@ -65,8 +75,8 @@ class AwardAdmin(admin.ModelAdmin):
 @admin.register(Contract)
 class ContractAdmin(admin.ModelAdmin):
     """Admin para contratos"""
-    list_display = ('number', 'supplier_name', 'status', 'valor_total', 'start_dt', 'end_dt', 'created_at')
-    list_filter = ('status', 'start_dt', 'end_dt', 'created_at')
+    list_display = ('number', 'supplier_name', 'status', 'valor_total', 'start_dt', 'end_dt', 'overdue_milestones', 'created_at')
+    list_filter = ('status', 'setor_responsavel', 'is_late', 'start_dt', 'end_dt', 'created_at')
     search_fields = ('number', 'supplier_name', 'supplier_doc')
     ordering = ('-created_at',)
     
@@ -74,8 +84,11 @@ class ContractAdmin(admin.ModelAdmin):
         ('Identificação', {'fields': ('number', 'procurement')}),
         ('Fornecedor', {'fields': ('supplier_name', 'supplier_doc')}),
         ('Período e Valores', {'fields': ('start_dt', 'end_dt', 'valor_total')}),
-        ('Status', {'fields': ('status', 'objeto')}),
+        ('Status', {'fields': ('status', 'setor_responsavel', 'objeto')}),
+        ('Marcos Atrasados', {'fields': ('is_late', 'overdue_milestones', 'overdue_value')}),
     )
+    
+    readonly_fields = ('is_late', 'overdue_milestones', 'overdue_value')
 
 
 @admin.register(ContractMilestone)
@@ -91,3 +104,17 @@ class ContractMilestoneAdmin(admin.ModelAdmin):
         ('Marco', {'fields': ('due_dt', 'valor', 'status')}),
         ('Observações', {'fields': ('observacoes',)}),
     )
+
+
+@admin.register(PriceIndexEntry)
+class PriceIndexEntryAdmin(admin.ModelAdmin):
+    """Admin para o índice de preços de referência (somente leitura)"""
+    list_display = ('token', 'modalidade', 'fonte', 'valor', 'procurement')
+    list_filter = ('modalidade', 'fonte')
+    search_fields = ('token', 'procurement__numero_processo')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,6 @@ class LicitacaoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'licitacao'
     verbose_name = 'Licitação'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,27 @@
+"""
+Comando para reconstruir o índice de preços de referência
+"""
+from django.core.management.base import BaseCommand
+
+from licitacao.pricing import rebuild_price_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice invertido de preços (propostas e adjudicações por token do objeto e modalidade)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Quantidade de processos por lote (padrão: 500)'
+        )
+
+    def handle(self, *args, **options):
+        procurements, entries = rebuild_price_index(chunk_size=options['chunk_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Índice de preços reconstruído: {procurements} processos, {entries} entradas.'
+            )
+        )
@@ -0,0 +1,19 @@
+"""
+Comando para marcar marcos de contrato vencidos como atrasados
+"""
+from django.core.management.base import BaseCommand
+
+from licitacao.services import mark_overdue_milestones
+
+
+class Command(BaseCommand):
+    help = 'Marca como ATRASADO os marcos vencidos e não concluídos e atualiza o resumo dos contratos (executar diariamente)'
+
+    def handle(self, *args, **options):
+        marked, contracts = mark_overdue_milestones()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{marked} marcos marcados como atrasados; {contracts} contratos atualizados.'
+            )
+        )
@@ -0,0 +1,27 @@
+"""
+Comando para enviar o resumo de contratos a vencer por setor responsável
+"""
+from django.core.management.base import BaseCommand
+
+from licitacao.services import send_expiring_contracts_digest, EXPIRING_HORIZONS
+
+
+class Command(BaseCommand):
+    help = 'Envia um e-mail por setor com os contratos ativos que cruzaram um horizonte de vencimento (90/60/30 dias) (executar diariamente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=max(EXPIRING_HORIZONS),
+            help='Horizonte em dias (padrão: 90)'
+        )
+
+    def handle(self, *args, **options):
+        sent, contracts = send_expiring_contracts_digest(days=options['days'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{sent} resumos enviados; {contracts} contratos notificados.'
+            )
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='is_late',
+            field=models.BooleanField(default=False, verbose_name='Possui Marcos Atrasados'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='overdue_milestones',
+            field=models.PositiveIntegerField(default=0, verbose_name='Marcos Atrasados'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='overdue_value',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Valor dos Marcos Atrasados'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['is_late', '-created_at'], name='licitacao_c_is_late_08263f_idx'),
+        ),
+    ]
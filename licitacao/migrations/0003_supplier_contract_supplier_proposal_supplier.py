@@ -0,0 +1,97 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_SUPPLIERS_SQL = [
+    # Um fornecedor por documento normalizado, com o nome mais recente
+    """
+    INSERT INTO licitacao_supplier (
+        doc, name, proposals_count, wins_count, contracted_value,
+        active_contracts_count, created_at, updated_at
+    )
+    SELECT DISTINCT ON (doc) doc, name, 0, 0, 0, 0, NOW(), NOW()
+    FROM (
+        SELECT regexp_replace(supplier_doc, '\\D', '', 'g') AS doc, supplier_name AS name, updated_at
+        FROM licitacao_proposal
+        UNION ALL
+        SELECT regexp_replace(supplier_doc, '\\D', '', 'g') AS doc, supplier_name AS name, updated_at
+        FROM licitacao_contract
+    ) AS docs
+    WHERE doc <> ''
+    ORDER BY doc, updated_at DESC
+    """,
+    """
+    UPDATE licitacao_proposal AS p
+    SET supplier_id = s.id
+    FROM licitacao_supplier AS s
+    WHERE s.doc = regexp_replace(p.supplier_doc, '\\D', '', 'g')
+    """,
+    """
+    UPDATE licitacao_contract AS c
+    SET supplier_id = s.id
+    FROM licitacao_supplier AS s
+    WHERE s.doc = regexp_replace(c.supplier_doc, '\\D', '', 'g')
+    """,
+    """
+    UPDATE licitacao_supplier AS s
+    SET
+        proposals_count = (
+            SELECT COUNT(*) FROM licitacao_proposal p WHERE p.supplier_id = s.id
+        ),
+        wins_count = (
+            SELECT COUNT(*) FROM licitacao_award a
+            JOIN licitacao_proposal p ON p.id = a.supplier_id
+            WHERE p.supplier_id = s.id
+        ),
+        contracted_value = (
+            SELECT COALESCE(SUM(c.valor_total), 0) FROM licitacao_contract c
+            WHERE c.supplier_id = s.id AND c.status <> 'RASCUNHO'
+        ),
+        active_contracts_count = (
+            SELECT COUNT(*) FROM licitacao_contract c
+            WHERE c.supplier_id = s.id AND c.status = 'ATIVO'
+        )
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0002_contract_is_late_contract_overdue_milestones_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Supplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc', models.CharField(max_length=18, unique=True, verbose_name='CPF/CNPJ (somente dígitos)')),
+                ('name', models.CharField(max_length=200, verbose_name='Nome/Razão Social')),
+                ('proposals_count', models.PositiveIntegerField(default=0, verbose_name='Propostas Enviadas')),
+                ('wins_count', models.PositiveIntegerField(default=0, verbose_name='Processos Vencidos')),
+                ('contracted_value', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Valor Contratado')),
+                ('active_contracts_count', models.PositiveIntegerField(default=0, verbose_name='Contratos Ativos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Fornecedor',
+                'verbose_name_plural': 'Fornecedores',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contracts', to='licitacao.supplier', verbose_name='Fornecedor'),
+        ),
+        migrations.AddField(
+            model_name='proposal',
+            name='supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='proposals', to='licitacao.supplier', verbose_name='Fornecedor'),
+        ),
+        migrations.RunSQL(BACKFILL_SUPPLIERS_SQL, migrations.RunSQL.noop),
+    ]
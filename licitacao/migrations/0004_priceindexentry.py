@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0003_supplier_contract_supplier_proposal_supplier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=60, verbose_name='Token')),
+                ('modalidade', models.CharField(choices=[('CONCORRENCIA', 'Concorrência'), ('PREGAO', 'Pregão'), ('CONCURSO', 'Concurso'), ('LEILAO', 'Leilão'), ('TOMADA_PRECOS', 'Tomada de Preços'), ('CONVITE', 'Convite'), ('OUTROS', 'Outros')], max_length=20, verbose_name='Modalidade')),
+                ('fonte', models.CharField(choices=[('PROPOSTA', 'Proposta'), ('ADJUDICACAO', 'Adjudicação')], max_length=20, verbose_name='Fonte')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Valor')),
+                ('procurement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_entries', to='licitacao.procurement', verbose_name='Processo')),
+                ('proposal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_entries', to='licitacao.proposal', verbose_name='Proposta')),
+            ],
+            options={
+                'verbose_name': 'Entrada do Índice de Preços',
+                'verbose_name_plural': 'Índice de Preços',
+                'indexes': [models.Index(fields=['token', 'modalidade'], name='licitacao_p_token_8fd1fa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0004_priceindexentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['-created_at'], name='contract_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', '-created_at'], name='contract_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['procurement', '-created_at'], name='contract_proc_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['supplier', '-created_at'], name='contract_supplier_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['end_dt'], name='contract_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contractmilestone',
+            index=models.Index(fields=['contract', 'due_dt'], name='milestone_contract_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contractmilestone',
+            index=models.Index(fields=['status', 'due_dt'], name='milestone_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['-created_at'], name='proc_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['status', '-created_at'], name='proc_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['modalidade', '-created_at'], name='proc_modal_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['data_abertura'], name='proc_abertura_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['procurement', 'classificacao', 'valor'], name='proposal_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['status', 'procurement', 'classificacao', 'valor'], name='proposal_status_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0005_licitacao_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='setor_responsavel',
+            field=models.CharField(choices=[('RH', 'Recursos Humanos'), ('TRIBUTOS', 'Tributos'), ('LICITACAO', 'Licitação'), ('OBRAS', 'Obras')], default='LICITACAO', max_length=20, verbose_name='Setor Responsável'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status', 'ATIVO')), fields=['end_dt'], name='contract_active_end_idx'),
+        ),
+    ]
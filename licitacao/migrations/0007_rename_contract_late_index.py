@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0006_contract_setor_responsavel_expiring'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='contract',
+            new_name='contract_late_created_idx',
+            old_name='licitacao_c_is_late_08263f_idx',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0007_rename_contract_late_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['start_dt'], name='contract_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contractmilestone',
+            index=models.Index(fields=['due_dt'], name='milestone_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['supplier', 'procurement', 'classificacao', 'valor'], name='proposal_supplier_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0008_supplier_and_date_range_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contract',
+            name='contract_active_end_idx',
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='last_expiry_notice',
+            field=models.DateField(blank=True, null=True, verbose_name='Último Aviso de Vencimento'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0009_contract_last_expiry_notice'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status', 'ATIVO')), fields=['end_dt'], name='contract_active_end_idx'),
+        ),
+    ]
@@ -1,7 +1,59 @@
+import re
+
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from users.models import User
+
+
+class Supplier(models.Model):
+    """Modelo para fornecedores (cadastro normalizado por CPF/CNPJ)"""
+    
+    doc = models.CharField(
+        max_length=18, 
+        unique=True, 
+        verbose_name='CPF/CNPJ (somente dígitos)'
+    )
+    name = models.CharField(max_length=200, verbose_name='Nome/Razão Social')
+    
+    # Agregados de participação (mantidos por licitacao.signals)
+    proposals_count = models.PositiveIntegerField(default=0, verbose_name='Propostas Enviadas')
+    wins_count = models.PositiveIntegerField(default=0, verbose_name='Processos Vencidos')
+    contracted_value = models.DecimalField(
+        max_digits=17, 
+        decimal_places=2, 
+        default=0,
+        verbose_name='Valor Contratado'
+    )
+    active_contracts_count = models.PositiveIntegerField(default=0, verbose_name='Contratos Ativos')
+    
+    # Campos de auditoria
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    
+    class Meta:
+        verbose_name = 'Fornecedor'
+        verbose_name_plural = 'Fornecedores'
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} ({self.doc})"
+    
+    @staticmethod
+    def normalize_doc(value):
+        """Remove pontuação do CPF/CNPJ"""
+        return re.sub(r'\D', '', value or '')
+    
+    @classmethod
+    def for_document(cls, doc, name):
+        """Retorna (criando se necessário) o fornecedor do documento informado"""
+        normalized = cls.normalize_doc(doc)
+        if not normalized:
+            return None
+        supplier, _ = cls.objects.get_or_create(doc=normalized, defaults={'name': name})
+        return supplier
+
 
 class Procurement(models.Model):
     """Modelo para processos de licitação"""
@@ -59,6 +111,12 @@ class Procurement(models.Model):
         verbose_name = 'Processo de Licitação'
         verbose_name_plural = 'Processos de Licitação'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='proc_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='proc_status_created_idx'),
+            models.Index(fields=['modalidade', '-created_at'], name='proc_modal_created_idx'),
+            models.Index(fields=['data_abertura'], name='proc_abertura_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_modalidade_display()} - {self.numero_processo}"
@@ -134,6 +192,14 @@ class Proposal(models.Model):
         related_name='proposals',
         verbose_name='Processo'
     )
+    supplier = models.ForeignKey(
+        Supplier,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='proposals',
+        verbose_name='Fornecedor'
+    )
     supplier_name = models.CharField(max_length=200, verbose_name='Nome do Fornecedor')
     supplier_doc = models.CharField(max_length=18, verbose_name='CPF/CNPJ do Fornecedor')
     valor = models.DecimalField(
@@ -164,6 +230,11 @@ class Proposal(models.Model):
         verbose_name_plural = 'Propostas'
         ordering = ['procurement', 'classificacao', 'valor']
         unique_together = ['procurement', 'supplier_doc']
+        indexes = [
+            models.Index(fields=['procurement', 'classificacao', 'valor'], name='proposal_ranking_idx'),
+            models.Index(fields=['status', 'procurement', 'classificacao', 'valor'], name='proposal_status_rank_idx'),
+            models.Index(fields=['supplier', 'procurement', 'classificacao', 'valor'], name='proposal_supplier_idx'),
+        ]
     
     def __str__(self):
         return f"Proposta de {self.supplier_name} - {self.procurement.numero_processo}"
@@ -224,6 +295,14 @@ class Contract(models.Model):
         verbose_name='Processo de Licitação'
     )
     number = models.CharField(max_length=50, unique=True, verbose_name='Número do Contrato')
+    supplier = models.ForeignKey(
+        Supplier,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='contracts',
+        verbose_name='Fornecedor'
+    )
     supplier_name = models.CharField(max_length=200, verbose_name='Nome do Fornecedor')
     supplier_doc = models.CharField(max_length=18, verbose_name='CPF/CNPJ do Fornecedor')
     start_dt = models.DateField(verbose_name='Data de Início')
@@ -241,6 +320,25 @@ class Contract(models.Model):
         verbose_name='Status'
     )
     objeto = models.TextField(verbose_name='Objeto do Contrato')
+    setor_responsavel = models.CharField(
+        max_length=20,
+        choices=User.SectorChoices.choices,
+        default=User.SectorChoices.LICITACAO,
+        verbose_name='Setor Responsável'
+    )
+    
+    # Resumo dos marcos atrasados (mantido pelo comando mark_overdue_milestones)
+    is_late = models.BooleanField(default=False, verbose_name='Possui Marcos Atrasados')
+    overdue_milestones = models.PositiveIntegerField(default=0, verbose_name='Marcos Atrasados')
+    overdue_value = models.DecimalField(
+        max_digits=15, 
+        decimal_places=2, 
+        default=0,
+        verbose_name='Valor dos Marcos Atrasados'
+    )
+    
+    # Data do último aviso de vencimento (comando notify_expiring_contracts)
+    last_expiry_notice = models.DateField(null=True, blank=True, verbose_name='Último Aviso de Vencimento')
     
     # Campos de auditoria
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
@@ -250,6 +348,22 @@ class Contract(models.Model):
         verbose_name = 'Contrato'
         verbose_name_plural = 'Contratos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_late', '-created_at'], name='contract_late_created_idx'),
+            models.Index(fields=['-created_at'], name='contract_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='contract_status_created_idx'),
+            models.Index(fields=['procurement', '-created_at'], name='contract_proc_created_idx'),
+            models.Index(fields=['supplier', '-created_at'], name='contract_supplier_created_idx'),
+            models.Index(fields=['start_dt'], name='contract_start_idx'),
+            # Filtro de término (end_from/end_to, qualquer status)
+            models.Index(fields=['end_dt'], name='contract_end_idx'),
+            # Vencimentos próximos: apenas contratos ativos
+            models.Index(
+                fields=['end_dt'],
+                condition=models.Q(status='ATIVO'),
+                name='contract_active_end_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Contrato {self.number} - {self.supplier_name}"
@@ -293,6 +407,63 @@ class ContractMilestone(models.Model):
         verbose_name = 'Marco do Contrato'
         verbose_name_plural = 'Marcos do Contrato'
         ordering = ['contract', 'due_dt']
+        indexes = [
+            models.Index(fields=['contract', 'due_dt'], name='milestone_contract_due_idx'),
+            models.Index(fields=['status', 'due_dt'], name='milestone_status_due_idx'),
+            models.Index(fields=['due_dt'], name='milestone_due_idx'),
+        ]
     
     def __str__(self):
         return f"Marco: {self.desc} - {self.contract.number}"
+
+
+class PriceIndexEntry(models.Model):
+    """
+    Índice invertido de preços históricos (token do objeto x modalidade)
+    
+    Cada proposta/adjudicação gera uma entrada por token normalizado do
+    objeto do processo. Mantido por licitacao.pricing.
+    """
+    
+    class SourceChoices(models.TextChoices):
+        PROPOSTA = 'PROPOSTA', 'Proposta'
+        ADJUDICACAO = 'ADJUDICACAO', 'Adjudicação'
+    
+    token = models.CharField(max_length=60, verbose_name='Token')
+    modalidade = models.CharField(
+        max_length=20,
+        choices=Procurement.ModalidadeChoices.choices,
+        verbose_name='Modalidade'
+    )
+    fonte = models.CharField(
+        max_length=20,
+        choices=SourceChoices.choices,
+        verbose_name='Fonte'
+    )
+    procurement = models.ForeignKey(
+        Procurement,
+        on_delete=models.CASCADE,
+        related_name='price_entries',
+        verbose_name='Processo'
+    )
+    proposal = models.ForeignKey(
+        Proposal,
+        on_delete=models.CASCADE,
+        related_name='price_entries',
+        verbose_name='Proposta'
+    )
+    valor = models.DecimalField(
+        max_digits=15, 
+        decimal_places=2, 
+        verbose_name='Valor'
+    )
+    
+    class Meta:
+        verbose_name = 'Entrada do Índice de Preços'
+        verbose_name_plural = 'Índice de Preços'
+        indexes = [
+            models.Index(fields=['token', 'modalidade']),
+        ]
+    
+    def __str__(self):
+        return f"{self.token} ({self.get_modalidade_display()}) - {self.valor}"
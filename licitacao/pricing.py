@@ -0,0 +1,244 @@
+"""
+Preços de referência a partir do histórico de propostas e adjudicações
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Procurement, Proposal, Award, PriceIndexEntry
+
+# Import condicional do NumPy para não quebrar o sistema
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+STOPWORDS = {
+    'aos', 'com', 'como', 'das', 'dos', 'ela', 'ele', 'entre', 'essa', 'esse', 'esta', 'este',
+    'nas', 'nos', 'para', 'pela', 'pelas', 'pelo', 'pelos', 'por', 'que', 'sem', 'sob', 'sobre',
+    'uma', 'umas', 'uns', 'conforme', 'demais', 'destinado', 'destinados', 'destinada', 'destinadas',
+    'aquisicao', 'contratacao', 'empresa', 'especializada', 'prestacao', 'servico', 'servicos',
+    'fornecimento', 'objeto', 'municipio', 'municipal', 'prefeitura', 'secretaria', 'atender',
+}
+MIN_TOKEN_LENGTH = 3
+MAX_TOKEN_LENGTH = 60
+
+# Propostas/processos que não servem de referência de preço
+EXCLUDED_PROPOSAL_STATUSES = [
+    Proposal.StatusChoices.DESABILITADA,
+    Proposal.StatusChoices.DESCLASSIFICADA,
+]
+EXCLUDED_PROCUREMENT_STATUSES = [
+    Procurement.StatusChoices.RASCUNHO,
+    Procurement.StatusChoices.ANULADA,
+]
+
+PERCENTILES = [10, 50, 90]
+
+
+def tokenize(text):
+    """
+    Normaliza a descrição do objeto em tokens (sem acentos, minúsculos, sem stopwords).
+
+    Returns:
+        Lista de tokens únicos, na ordem em que aparecem
+    """
+    normalized = unicodedata.normalize('NFKD', text or '')
+    normalized = ''.join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+    tokens = []
+    for token in re.findall(r'[a-z0-9]+', normalized):
+        if len(token) < MIN_TOKEN_LENGTH or token in STOPWORDS or token.isdigit():
+            continue
+        token = token[:MAX_TOKEN_LENGTH]
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def _build_entries(procurement_ids, fonte=None, proposal_ids=None):
+    """
+    Monta as entradas do índice para os processos informados (até três consultas).
+
+    `fonte` limita a uma origem (propostas ou adjudicação) e `proposal_ids`
+    às propostas informadas.
+    """
+    procurements = {
+        row['id']: (tokenize(row['objeto']), row['modalidade'])
+        for row in Procurement.objects.filter(pk__in=procurement_ids).exclude(
+            status__in=EXCLUDED_PROCUREMENT_STATUSES
+        ).values('id', 'objeto', 'modalidade')
+    }
+
+    prices = []
+    if fonte in (None, PriceIndexEntry.SourceChoices.PROPOSTA):
+        proposals = Proposal.objects.filter(procurement_id__in=procurements.keys())
+        if proposal_ids is not None:
+            proposals = proposals.filter(pk__in=proposal_ids)
+        prices += [
+            (PriceIndexEntry.SourceChoices.PROPOSTA, procurement_id, proposal_id, valor)
+            for procurement_id, proposal_id, valor in proposals.exclude(
+                status__in=EXCLUDED_PROPOSAL_STATUSES
+            ).values_list('procurement_id', 'id', 'valor')
+        ]
+    if fonte in (None, PriceIndexEntry.SourceChoices.ADJUDICACAO):
+        prices += [
+            (PriceIndexEntry.SourceChoices.ADJUDICACAO, procurement_id, proposal_id, valor)
+            for procurement_id, proposal_id, valor in Award.objects.filter(
+                procurement_id__in=procurements.keys()
+            ).values_list('procurement_id', 'supplier_id', 'valor_adjudicado')
+        ]
+
+    entries = []
+    for fonte, procurement_id, proposal_id, valor in prices:
+        tokens, modalidade = procurements[procurement_id]
+        entries.extend(
+            PriceIndexEntry(
+                token=token,
+                modalidade=modalidade,
+                fonte=fonte,
+                procurement_id=procurement_id,
+                proposal_id=proposal_id,
+                valor=valor,
+            )
+            for token in tokens
+        )
+    return entries
+
+
+def reindex_procurements(procurement_ids, batch_size=1000):
+    """
+    Reconstrói as entradas do índice de preços dos processos informados.
+
+    Usado pelo comando build_price_index (em lotes) e pelos sinais quando
+    objeto, modalidade ou status do processo mudam.
+
+    Returns:
+        Quantidade de entradas gravadas
+    """
+    procurement_ids = list(procurement_ids)
+    entries = _build_entries(procurement_ids)
+
+    with transaction.atomic():
+        PriceIndexEntry.objects.filter(procurement_id__in=procurement_ids).delete()
+        PriceIndexEntry.objects.bulk_create(entries, batch_size=batch_size)
+
+    return len(entries)
+
+
+def reindex_proposal(proposal):
+    """Reconstrói apenas as entradas da proposta (inclusive se mudou de processo)"""
+    entries = _build_entries(
+        [proposal.procurement_id],
+        fonte=PriceIndexEntry.SourceChoices.PROPOSTA,
+        proposal_ids=[proposal.pk]
+    )
+
+    with transaction.atomic():
+        PriceIndexEntry.objects.filter(
+            proposal_id=proposal.pk,
+            fonte=PriceIndexEntry.SourceChoices.PROPOSTA
+        ).delete()
+        PriceIndexEntry.objects.bulk_create(entries)
+
+    return len(entries)
+
+
+def reindex_award(procurement_id):
+    """Reconstrói apenas as entradas de adjudicação do processo"""
+    entries = _build_entries([procurement_id], fonte=PriceIndexEntry.SourceChoices.ADJUDICACAO)
+
+    with transaction.atomic():
+        PriceIndexEntry.objects.filter(
+            procurement_id=procurement_id,
+            fonte=PriceIndexEntry.SourceChoices.ADJUDICACAO
+        ).delete()
+        PriceIndexEntry.objects.bulk_create(entries)
+
+    return len(entries)
+
+
+def rebuild_price_index(chunk_size=500):
+    """
+    Reconstrói todo o índice de preços, em lotes de processos.
+
+    Returns:
+        Tupla (processos processados, entradas gravadas)
+    """
+    procurement_ids = list(Procurement.objects.order_by('pk').values_list('pk', flat=True))
+
+    PriceIndexEntry.objects.exclude(procurement_id__in=procurement_ids).delete()
+
+    total = 0
+    for start in range(0, len(procurement_ids), chunk_size):
+        total += reindex_procurements(procurement_ids[start:start + chunk_size])
+
+    return len(procurement_ids), total
+
+
+def _bands(values):
+    """Percentis p10/p50/p90 (vetorizados) de um conjunto de valores"""
+    if values.size == 0:
+        return None
+    p10, p50, p90 = np.percentile(values, PERCENTILES)
+    return {
+        'amostras': int(values.size),
+        'p10': round(float(p10), 2),
+        'p50': round(float(p50), 2),
+        'p90': round(float(p90), 2),
+        'min': round(float(values.min()), 2),
+        'max': round(float(values.max()), 2),
+    }
+
+
+def reference_price(objeto, modalidade=None, min_match=0.5, exclude_procurement=None):
+    """
+    Faixas de preço de referência (p10/p50/p90) para a descrição de objeto informada.
+
+    Os candidatos vêm do índice invertido: uma única consulta agrupada conta
+    quantos tokens de cada proposta/adjudicação coincidem com os do objeto e
+    mantém apenas as que cobrem ao menos `min_match` dos tokens.
+
+    Returns:
+        Dicionário com os tokens usados e as faixas por fonte e no total
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy não está disponível. Instale com: pip install numpy")
+
+    tokens = tokenize(objeto)
+    result = {
+        'tokens': tokens,
+        'modalidade': modalidade,
+        'propostas': None,
+        'adjudicacoes': None,
+        'geral': None,
+    }
+    if not tokens:
+        return result
+
+    required = max(1, int(np.ceil(len(tokens) * min_match)))
+
+    entries = PriceIndexEntry.objects.filter(token__in=tokens)
+    if modalidade:
+        entries = entries.filter(modalidade=modalidade)
+    if exclude_procurement:
+        entries = entries.exclude(procurement_id=exclude_procurement)
+
+    rows = list(
+        entries.values('fonte', 'proposal_id', 'valor').annotate(
+            hits=Count('token')
+        ).filter(hits__gte=required).values_list('fonte', 'valor').order_by()
+    )
+    if not rows:
+        return result
+
+    sources = np.array([row[0] for row in rows])
+    values = np.array([row[1] for row in rows], dtype=np.float64)
+
+    result['propostas'] = _bands(values[sources == PriceIndexEntry.SourceChoices.PROPOSTA])
+    result['adjudicacoes'] = _bands(values[sources == PriceIndexEntry.SourceChoices.ADJUDICACAO])
+    result['geral'] = _bands(values)
+    return result
@@ -1,5 +1,17 @@
 from rest_framework import serializers
-from .models import Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone
+from .models import Supplier, Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone
+
+
+class SupplierSerializer(serializers.ModelSerializer):
+    """Serializer para fornecedores"""
+    
+    class Meta:
+        model = Supplier
+        fields = '__all__'
+        read_only_fields = [
+            'doc', 'proposals_count', 'wins_count', 'contracted_value',
+            'active_contracts_count', 'created_at', 'updated_at'
+        ]
 
 
 class ProcurementSerializer(serializers.ModelSerializer):
@@ -24,6 +36,7 @@ class ProposalSerializer(serializers.ModelSerializer):
     class Meta:
         model = Proposal
         fields = '__all__'
+        read_only_fields = ['supplier']
 
 
 class AwardSerializer(serializers.ModelSerializer):
@@ -40,6 +53,7 @@ class ContractSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contract
         fields = '__all__'
+        read_only_fields = ['supplier', 'is_late', 'overdue_milestones', 'overdue_value', 'last_expiry_notice']
 
 
 class ContractMilestoneSerializer(serializers.ModelSerializer):
@@ -48,3 +62,23 @@ class ContractMilestoneSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContractMilestone
         fields = '__all__'
+
+
+class ContractFullSerializer(serializers.ModelSerializer):
+    """Serializer para contratos com seus marcos"""
+    milestones = ContractMilestoneSerializer(many=True, read_only=True)
+    
+    class Meta(ContractSerializer.Meta):
+        pass
+
+
+class ProcurementFullSerializer(serializers.ModelSerializer):
+    """Serializer para o processo de licitação completo (fases, propostas, adjudicação e contratos)"""
+    phases = ProcPhaseSerializer(many=True, read_only=True)
+    proposals = ProposalSerializer(many=True, read_only=True)
+    award = AwardSerializer(read_only=True, allow_null=True)
+    contracts = ContractFullSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Procurement
+        fields = '__all__'
@@ -0,0 +1,444 @@
+"""
+Serviços para o módulo de licitação
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from users.models import User
+from .models import Supplier, Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone
+
+# Critério de julgamento por modalidade (ORDER BY do ROW_NUMBER). Empates são
+# resolvidos pela ordem de registro da proposta.
+LOWEST_PRICE_ORDER = 'valor ASC, created_at ASC, id ASC'
+HIGHEST_BID_ORDER = 'valor DESC, created_at ASC, id ASC'
+
+# Menor preço: concorrência, pregão, tomada de preços, convite e outros (a
+# proposta registra apenas o valor, então critérios de técnica e preço também
+# são classificados pelo preço). Leilão: maior lance. Concurso é julgado por
+# comissão (critério técnico/artístico) e não tem classificação automática.
+RANKING_ORDER = {
+    Procurement.ModalidadeChoices.CONCORRENCIA: LOWEST_PRICE_ORDER,
+    Procurement.ModalidadeChoices.PREGAO: LOWEST_PRICE_ORDER,
+    Procurement.ModalidadeChoices.TOMADA_PRECOS: LOWEST_PRICE_ORDER,
+    Procurement.ModalidadeChoices.CONVITE: LOWEST_PRICE_ORDER,
+    Procurement.ModalidadeChoices.OUTROS: LOWEST_PRICE_ORDER,
+    Procurement.ModalidadeChoices.LEILAO: HIGHEST_BID_ORDER,
+}
+
+# Propostas que participam da classificação
+RANKABLE_STATUSES = [
+    Proposal.StatusChoices.RECEBIDA,
+    Proposal.StatusChoices.HABILITADA,
+    Proposal.StatusChoices.CLASSIFICADA,
+]
+
+RANK_PROPOSALS_SQL = """
+    UPDATE licitacao_proposal AS p
+    SET
+        classificacao = r.rank,
+        status = CASE WHEN r.rank IS NULL THEN p.status ELSE %(classified)s END,
+        updated_at = %(now)s
+    FROM (
+        SELECT
+            id,
+            CASE WHEN eligible THEN
+                ROW_NUMBER() OVER (PARTITION BY eligible ORDER BY {order})
+            END AS rank
+        FROM (
+            SELECT id, valor, created_at, status = ANY(%(rankable)s) AS eligible
+            FROM licitacao_proposal
+            WHERE procurement_id = %(procurement_id)s
+        ) AS candidates
+    ) AS r
+    WHERE p.id = r.id
+"""
+
+
+def rank_proposals(procurement: Procurement, create_award=False):
+    """
+    Classifica todas as propostas do processo em um único UPDATE ... FROM (ROW_NUMBER() OVER ...).
+
+    Propostas desabilitadas/desclassificadas ficam sem classificação. Se
+    `create_award` for verdadeiro, a adjudicação do primeiro colocado é
+    criada (ou atualizada) na mesma transação; a data de homologação só é
+    definida quando a adjudicação é criada ou o vencedor muda.
+
+    Raises:
+        ValueError: modalidade sem critério de classificação automática (concurso)
+
+    Returns:
+        Tupla (quantidade de propostas classificadas, Award ou None)
+    """
+    order = RANKING_ORDER.get(procurement.modalidade)
+    if order is None:
+        raise ValueError(
+            f'{procurement.get_modalidade_display()} não possui classificação automática; '
+            'classifique as propostas manualmente.'
+        )
+
+    with transaction.atomic():
+        # Serializa classificações concorrentes do mesmo processo
+        Procurement.objects.select_for_update().filter(pk=procurement.pk).first()
+
+        with connection.cursor() as cursor:
+            cursor.execute(RANK_PROPOSALS_SQL.format(order=order), {
+                'classified': Proposal.StatusChoices.CLASSIFICADA,
+                'now': timezone.now(),
+                'rankable': [str(value) for value in RANKABLE_STATUSES],
+                'procurement_id': procurement.pk,
+            })
+
+        ranked = procurement.proposals.filter(classificacao__isnull=False).count()
+
+        award = None
+        if create_award and ranked:
+            winner = procurement.proposals.get(classificacao=1)
+            award = Award.objects.select_for_update().filter(procurement=procurement).first()
+            if award is None:
+                award = Award(procurement=procurement)
+            if award.pk is None or award.supplier_id != winner.pk:
+                award.supplier = winner
+                award.homolog_dt = timezone.now()
+            award.valor_adjudicado = winner.valor
+            award.save()
+
+    return ranked, award
+
+
+def _related_stats(queryset):
+    """Subconsultas (última atualização, quantidade) de uma relação do processo"""
+    grouped = queryset.filter(procurement_ref=OuterRef('pk')).order_by().values('procurement_ref')
+    return (
+        Subquery(grouped.annotate(value=Max('updated_at')).values('value')[:1]),
+        Subquery(grouped.annotate(value=Count('pk')).values('value')[:1]),
+    )
+
+
+def procurement_graph_version(procurement_id):
+    """
+    Versão do grafo completo do processo (fases, propostas, adjudicação, contratos e marcos).
+
+    Calculada em uma única consulta a partir do maior updated_at e da
+    quantidade de registros de cada relação, para que inclusões, alterações
+    e exclusões invalidem o cache. Retorna None se o processo não existir.
+    """
+    relations = {
+        'phases': ProcPhase.objects.annotate(procurement_ref=F('procurement_id')),
+        'proposals': Proposal.objects.annotate(procurement_ref=F('procurement_id')),
+        'award': Award.objects.annotate(procurement_ref=F('procurement_id')),
+        'contracts': Contract.objects.annotate(procurement_ref=F('procurement_id')),
+        'milestones': ContractMilestone.objects.annotate(procurement_ref=F('contract__procurement_id')),
+    }
+    annotations = {}
+    for name, queryset in relations.items():
+        annotations[f'{name}_ts'], annotations[f'{name}_count'] = _related_stats(queryset)
+
+    row = Procurement.objects.filter(pk=procurement_id).annotate(**annotations).values(
+        'updated_at', *annotations.keys()
+    ).first()
+    if row is None:
+        return None
+
+    timestamps = [value for key, value in row.items() if key.endswith('_at') or key.endswith('_ts')]
+    latest = max(value for value in timestamps if value is not None)
+    counts = '-'.join(str(row[f'{name}_count'] or 0) for name in relations)
+    return f"{latest.timestamp():.6f}-{counts}"
+
+
+def refresh_overdue_summary(contracts=None):
+    """
+    Recalcula o resumo de marcos atrasados dos contratos em um único UPDATE.
+
+    Sem `contracts`, atualiza apenas os contratos que possuem marcos atrasados
+    ou que estavam marcados como atrasados.
+
+    Returns:
+        Quantidade de contratos atualizados
+    """
+    overdue = ContractMilestone.objects.filter(
+        contract=OuterRef('pk'),
+        status=ContractMilestone.StatusChoices.ATRASADO
+    ).order_by().values('contract')
+
+    if contracts is None:
+        contracts = Contract.objects.filter(Q(is_late=True) | Exists(overdue))
+
+    return contracts.update(
+        is_late=Exists(overdue),
+        overdue_milestones=Coalesce(
+            Subquery(overdue.annotate(total=Count('pk')).values('total')[:1]), 0
+        ),
+        overdue_value=Coalesce(
+            Subquery(overdue.annotate(total=Sum('valor')).values('total')[:1]), Decimal('0')
+        ),
+    )
+
+
+def mark_overdue_milestones(today=None):
+    """
+    Marca como ATRASADO, em um único UPDATE, os marcos vencidos e não concluídos.
+
+    Marcos atrasados cuja data de vencimento foi prorrogada voltam para
+    PENDENTE. Em seguida o resumo por contrato é materializado.
+
+    Returns:
+        Tupla (marcos marcados como atrasados, contratos atualizados)
+    """
+    today = today or timezone.localdate()
+    now = timezone.now()
+
+    with transaction.atomic():
+        marked = ContractMilestone.objects.filter(due_dt__lt=today).exclude(
+            status__in=[ContractMilestone.StatusChoices.CONCLUIDO, ContractMilestone.StatusChoices.ATRASADO]
+        ).update(status=ContractMilestone.StatusChoices.ATRASADO, updated_at=now)
+
+        ContractMilestone.objects.filter(
+            due_dt__gte=today,
+            status=ContractMilestone.StatusChoices.ATRASADO
+        ).update(status=ContractMilestone.StatusChoices.PENDENTE, updated_at=now)
+
+        contracts = refresh_overdue_summary()
+
+    return marked, contracts
+
+
+def refresh_supplier_stats(suppliers=None):
+    """
+    Recalcula os agregados de participação dos fornecedores em um único UPDATE.
+
+    Sem `suppliers`, recalcula todos (usado no backfill).
+
+    Returns:
+        Quantidade de fornecedores atualizados
+    """
+    if suppliers is None:
+        suppliers = Supplier.objects.all()
+
+    def count_of(queryset):
+        grouped = queryset.order_by().values('supplier_ref')
+        return Coalesce(Subquery(grouped.annotate(total=Count('pk')).values('total')[:1]), 0)
+
+    proposals = Proposal.objects.annotate(supplier_ref=F('supplier_id')).filter(supplier_ref=OuterRef('pk'))
+    wins = Award.objects.annotate(supplier_ref=F('supplier__supplier_id')).filter(supplier_ref=OuterRef('pk'))
+    contracts = Contract.objects.annotate(supplier_ref=F('supplier_id')).filter(supplier_ref=OuterRef('pk'))
+    contracted = contracts.exclude(status=Contract.StatusChoices.RASCUNHO).order_by().values('supplier_ref')
+
+    return suppliers.update(
+        proposals_count=count_of(proposals),
+        wins_count=count_of(wins),
+        contracted_value=Coalesce(
+            Subquery(contracted.annotate(total=Sum('valor_total')).values('total')[:1]), Decimal('0')
+        ),
+        active_contracts_count=count_of(contracts.filter(status=Contract.StatusChoices.ATIVO)),
+        updated_at=timezone.now(),
+    )
+
+
+# Durações das fases (em dias): concluídas usam end_dt; em andamento, o tempo
+# decorrido até agora. A fase atual de cada processo é a última iniciada
+# (ROW_NUMBER sobre start_dt).
+PHASE_DURATIONS_CTE = """
+    WITH durations AS (
+        SELECT
+            ph.id,
+            ph.procurement_id,
+            pr.numero_processo,
+            pr.modalidade,
+            EXTRACT(YEAR FROM ph.start_dt)::int AS ano,
+            ph.fase,
+            ph.status,
+            ph.start_dt,
+            EXTRACT(EPOCH FROM (
+                CASE WHEN ph.status = %(done)s THEN ph.end_dt ELSE %(now)s END - ph.start_dt
+            )) / 86400.0 AS dias,
+            ROW_NUMBER() OVER (PARTITION BY ph.procurement_id ORDER BY ph.start_dt DESC, ph.id DESC) AS recency
+        FROM licitacao_procphase AS ph
+        JOIN licitacao_procurement AS pr ON pr.id = ph.procurement_id
+        WHERE ph.status IN (%(done)s, %(running)s) AND ph.start_dt <= %(now)s
+    )
+"""
+
+PHASE_SLA_SQL = PHASE_DURATIONS_CTE + """
+    SELECT
+        modalidade,
+        ano,
+        fase,
+        COUNT(*) AS total,
+        ROUND(AVG(dias)::numeric, 2) AS media,
+        ROUND(percentile_cont(0.5) WITHIN GROUP (ORDER BY dias)::numeric, 2) AS p50,
+        ROUND(percentile_cont(0.9) WITHIN GROUP (ORDER BY dias)::numeric, 2) AS p90,
+        ROUND(MAX(dias)::numeric, 2) AS maximo
+    FROM durations
+    WHERE status = %(done)s
+    GROUP BY modalidade, ano, fase
+    ORDER BY modalidade, ano, fase
+"""
+
+PHASE_BOTTLENECKS_SQL = PHASE_DURATIONS_CTE + """
+    , reference AS (
+        SELECT modalidade, fase, percentile_cont(0.9) WITHIN GROUP (ORDER BY dias) AS p90
+        FROM durations
+        WHERE status = %(done)s
+        GROUP BY modalidade, fase
+    )
+    SELECT
+        d.procurement_id,
+        d.numero_processo,
+        d.modalidade,
+        d.fase,
+        d.start_dt,
+        ROUND(d.dias::numeric, 2) AS dias,
+        ROUND(r.p90::numeric, 2) AS p90
+    FROM durations AS d
+    JOIN reference AS r ON r.modalidade = d.modalidade AND r.fase = d.fase
+    WHERE d.recency = 1 AND d.status = %(running)s AND d.dias > r.p90
+    ORDER BY d.dias / NULLIF(r.p90, 0) DESC NULLS FIRST
+"""
+
+
+def _fetch_dicts(cursor, sql, params):
+    cursor.execute(sql, params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def phase_sla_report():
+    """
+    Duração das fases por modalidade/ano (média, p50, p90) e gargalos atuais.
+
+    Gargalos são os processos cuja fase atual (em andamento) já dura mais que
+    o p90 das fases concluídas da mesma modalidade.
+
+    Returns:
+        Dicionário com 'generated_at', 'stats' e 'bottlenecks'
+    """
+    now = timezone.now()
+    params = {
+        'done': ProcPhase.StatusChoices.CONCLUIDA,
+        'running': ProcPhase.StatusChoices.EM_ANDAMENTO,
+        'now': now,
+    }
+
+    with connection.cursor() as cursor:
+        stats = _fetch_dicts(cursor, PHASE_SLA_SQL, params)
+        bottlenecks = _fetch_dicts(cursor, PHASE_BOTTLENECKS_SQL, params)
+
+    return {
+        'generated_at': now,
+        'stats': stats,
+        'bottlenecks': bottlenecks,
+    }
+
+
+EXPIRING_HORIZONS = [30, 60, 90]
+
+
+def expiring_contracts(days=30, today=None):
+    """
+    Contratos ativos com término nos próximos `days` dias (índice parcial em end_dt).
+    """
+    today = today or timezone.localdate()
+    return Contract.objects.filter(
+        status=Contract.StatusChoices.ATIVO,
+        end_dt__gte=today,
+        end_dt__lte=today + timedelta(days=days)
+    ).order_by('end_dt')
+
+
+def _sector_recipients(sectors):
+    """E-mails dos administradores de cada setor (uma consulta)"""
+    recipients = {}
+    admins = User.objects.filter(
+        is_active=True,
+        role=User.RoleChoices.SECTOR_ADMIN,
+        sector__in=sectors
+    ).values_list('sector', 'email')
+    for sector, email in admins:
+        recipients.setdefault(sector, []).append(email)
+    return recipients
+
+
+def expiry_horizon(days_left):
+    """Menor horizonte de EXPIRING_HORIZONS que contém os dias restantes (None se fora)"""
+    return next((days for days in sorted(EXPIRING_HORIZONS) if days_left <= days), None)
+
+
+def send_expiring_contracts_digest(days=90, today=None):
+    """
+    Envia um resumo por setor responsável dos contratos que vencem nos próximos dias.
+
+    Cada contrato é notificado uma vez por horizonte (90, 60 e 30 dias): só
+    entra no resumo quando cruzou um horizonte desde o último aviso
+    (last_expiry_notice). Uma prorrogação do término volta a notificar o
+    contrato. Os contratos são agrupados por setor e todas as mensagens são
+    enviadas por uma única conexão SMTP. Setores sem administrador ativo
+    recebem cópia nos administradores master.
+
+    Returns:
+        Tupla (mensagens enviadas, contratos notificados)
+    """
+    today = today or timezone.localdate()
+
+    by_sector = {}
+    for contract in expiring_contracts(days, today):
+        contract.dias_restantes = (contract.end_dt - today).days
+        if contract.last_expiry_notice:
+            notified = expiry_horizon((contract.end_dt - contract.last_expiry_notice).days)
+            if notified is not None and notified <= expiry_horizon(contract.dias_restantes):
+                continue
+        by_sector.setdefault(contract.setor_responsavel, []).append(contract)
+    if not by_sector:
+        return 0, 0
+
+    recipients = _sector_recipients(by_sector.keys())
+    masters = None
+
+    messages = []
+    sector_labels = dict(User.SectorChoices.choices)
+    for sector, contracts in by_sector.items():
+        to = recipients.get(sector)
+        if not to:
+            if masters is None:
+                masters = list(User.objects.filter(
+                    is_active=True, role=User.RoleChoices.MASTER_ADMIN
+                ).values_list('email', flat=True))
+            to = masters
+        if not to:
+            continue
+
+        context = {
+            'sector_display': sector_labels.get(sector, sector),
+            'days': days,
+            'contracts': contracts,
+            'total_value': sum(contract.valor_total for contract in contracts),
+        }
+        message = EmailMultiAlternatives(
+            subject=f"Contratos a vencer nos próximos {days} dias - {context['sector_display']}",
+            body=render_to_string('licitacao/emails/expiring_contracts.txt', context),
+            from_email=settings.EMAIL_FROM,
+            to=to,
+        )
+        message.attach_alternative(
+            render_to_string('licitacao/emails/expiring_contracts.html', context), 'text/html'
+        )
+        messages.append((message, contracts))
+
+    if not messages:
+        return 0, 0
+
+    # Uma única conexão SMTP para todos os resumos
+    mail_connection = get_connection(fail_silently=False)
+    sent = mail_connection.send_messages([message for message, _ in messages]) or 0
+
+    notified_ids = [contract.pk for _, contracts in messages for contract in contracts]
+    Contract.objects.filter(pk__in=notified_ids).update(last_expiry_notice=today)
+
+    return sent, len(notified_ids)
@@ -0,0 +1,98 @@
+"""
+Sinais do módulo de licitação: mantêm o cadastro de fornecedores, seus agregados
+e o índice de preços de referência
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Supplier, Procurement, Proposal, Award, Contract
+from .pricing import reindex_procurements, reindex_proposal, reindex_award
+from .services import refresh_supplier_stats
+
+
+@receiver(pre_save, sender=Proposal)
+@receiver(pre_save, sender=Contract)
+def link_supplier(sender, instance, **kwargs):
+    """Vincula a proposta/contrato ao fornecedor pelo documento informado"""
+    instance._previous_supplier_id = None
+    if instance.pk:
+        instance._previous_supplier_id = sender.objects.filter(pk=instance.pk).values_list(
+            'supplier_id', flat=True
+        ).first()
+    
+    normalized = Supplier.normalize_doc(instance.supplier_doc)
+    if instance.supplier_id is None or instance.supplier.doc != normalized:
+        instance.supplier = Supplier.for_document(instance.supplier_doc, instance.supplier_name)
+
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_save, sender=Contract)
+def refresh_supplier_on_save(sender, instance, **kwargs):
+    """Atualiza os agregados do fornecedor atual e do anterior (se mudou)"""
+    supplier_ids = {instance.supplier_id, getattr(instance, '_previous_supplier_id', None)} - {None}
+    if supplier_ids:
+        refresh_supplier_stats(Supplier.objects.filter(pk__in=supplier_ids))
+
+
+@receiver(post_delete, sender=Proposal)
+@receiver(post_delete, sender=Contract)
+def refresh_supplier_on_delete(sender, instance, **kwargs):
+    if instance.supplier_id:
+        refresh_supplier_stats(Supplier.objects.filter(pk=instance.supplier_id))
+
+
+@receiver(pre_save, sender=Award)
+def remember_previous_winner(sender, instance, **kwargs):
+    """Guarda a proposta vencedora anterior caso a adjudicação mude de vencedor"""
+    instance._previous_proposal_id = None
+    if instance.pk:
+        instance._previous_proposal_id = sender.objects.filter(pk=instance.pk).values_list(
+            'supplier_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Award)
+@receiver(post_delete, sender=Award)
+def refresh_supplier_on_award(sender, instance, **kwargs):
+    """Atualiza a contagem de vitórias do fornecedor vencedor e do anterior (se mudou)"""
+    proposal_ids = {instance.supplier_id, getattr(instance, '_previous_proposal_id', None)} - {None}
+    supplier_ids = set(
+        Proposal.objects.filter(pk__in=proposal_ids).values_list('supplier_id', flat=True)
+    ) - {None}
+    if supplier_ids:
+        refresh_supplier_stats(Supplier.objects.filter(pk__in=supplier_ids))
+
+
+# Campos do processo que alteram as entradas do índice de preços
+PRICE_INDEX_FIELDS = ('objeto', 'modalidade', 'status')
+
+
+@receiver(pre_save, sender=Procurement)
+def remember_indexed_fields(sender, instance, **kwargs):
+    instance._previous_indexed = None
+    if instance.pk:
+        instance._previous_indexed = sender.objects.filter(pk=instance.pk).values_list(
+            *PRICE_INDEX_FIELDS
+        ).first()
+
+
+@receiver(post_save, sender=Procurement)
+def reindex_prices_on_procurement(sender, instance, created, **kwargs):
+    """Reindexa os preços do processo apenas se objeto, modalidade ou status mudaram"""
+    current = tuple(getattr(instance, field) for field in PRICE_INDEX_FIELDS)
+    if not created and getattr(instance, '_previous_indexed', None) != current:
+        reindex_procurements([instance.pk])
+
+
+@receiver(post_save, sender=Proposal)
+def reindex_prices_on_proposal(sender, instance, **kwargs):
+    """Reindexa apenas as entradas da proposta alterada (exclusões removem as entradas em cascata)"""
+    reindex_proposal(instance)
+
+
+@receiver(post_save, sender=Award)
+@receiver(post_delete, sender=Award)
+def reindex_prices_on_award(sender, instance, **kwargs):
+    """Reindexa as entradas de adjudicação do processo"""
+    if Procurement.objects.filter(pk=instance.procurement_id).exists():
+        reindex_award(instance.procurement_id)
@@ -1,3 +1,170 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .models import Supplier, Procurement, Proposal, Contract, ContractMilestone
+from .views import ProcurementViewSet, ProposalViewSet, ContractViewSet, ContractMilestoneViewSet
 
 # Create your tests here.
+
+
+class FilterIndexPlanTests(TestCase):
+    """
+    Verifica, via EXPLAIN, que os filtros dos ViewSets de licitação usam os
+    índices compostos (filtro + ordenação) em uma base grande gerada.
+    """
+
+    PROCUREMENTS = 20000
+    CONTRACTS = 20000
+    PROPOSALS_PER_PROCUREMENT = 3
+    MILESTONES_PER_CONTRACT = 3
+    SUPPLIERS = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        modalidades = Procurement.ModalidadeChoices.values
+        statuses = Procurement.StatusChoices.values
+        first_day = date(2020, 1, 1)
+
+        Procurement.objects.bulk_create([
+            Procurement(
+                modalidade=modalidades[i % len(modalidades)],
+                objeto=f'Objeto {i}',
+                numero_processo=f'{i:06d}/2024',
+                valor_estimado=Decimal('1000.00') + i,
+                status=statuses[(i // 7) % len(statuses)],
+                data_abertura=first_day + timedelta(days=i % 1800),
+                data_encerramento=first_day + timedelta(days=i % 1800 + 30),
+            )
+            for i in range(cls.PROCUREMENTS)
+        ], batch_size=5000)
+        procurement_ids = list(Procurement.objects.values_list('pk', flat=True))
+
+        Supplier.objects.bulk_create([
+            Supplier(doc=f'{n:014d}', name=f'Fornecedor {n}') for n in range(cls.SUPPLIERS)
+        ])
+        supplier_ids = list(Supplier.objects.order_by('pk').values_list('pk', flat=True))
+
+        Proposal.objects.bulk_create([
+            Proposal(
+                procurement_id=procurement_id,
+                supplier_name=f'Fornecedor {n}',
+                supplier_doc=f'{n:014d}',
+                supplier_id=supplier_ids[(index * cls.PROPOSALS_PER_PROCUREMENT + n) % cls.SUPPLIERS],
+                valor=Decimal('900.00') + n,
+                classificacao=n + 1,
+            )
+            for index, procurement_id in enumerate(procurement_ids)
+            for n in range(cls.PROPOSALS_PER_PROCUREMENT)
+        ], batch_size=5000)
+
+        contract_statuses = Contract.StatusChoices.values
+        Contract.objects.bulk_create([
+            Contract(
+                procurement_id=procurement_ids[i % len(procurement_ids)],
+                number=f'CT-{i:06d}',
+                supplier_name=f'Fornecedor {i}',
+                supplier_doc=f'{i:014d}',
+                supplier_id=supplier_ids[i % cls.SUPPLIERS],
+                start_dt=first_day + timedelta(days=i % 1800),
+                end_dt=first_day + timedelta(days=i % 1800 + 365),
+                valor_total=Decimal('5000.00') + i,
+                status=contract_statuses[(i // 5) % len(contract_statuses)],
+                objeto=f'Contrato {i}',
+            )
+            for i in range(cls.CONTRACTS)
+        ], batch_size=5000)
+        contract_ids = list(Contract.objects.values_list('pk', flat=True))
+
+        ContractMilestone.objects.bulk_create([
+            ContractMilestone(
+                contract_id=contract_id,
+                desc=f'Marco {n}',
+                due_dt=first_day + timedelta(days=(contract_id + n * 30) % 1800),
+                valor=Decimal('100.00'),
+                status=(
+                    ContractMilestone.StatusChoices.ATRASADO
+                    if contract_id % 50 == 0 else ContractMilestone.StatusChoices.PENDENTE
+                ),
+            )
+            for contract_id in contract_ids
+            for n in range(cls.MILESTONES_PER_CONTRACT)
+        ], batch_size=5000)
+
+        with connection.cursor() as cursor:
+            for model in (Supplier, Procurement, Proposal, Contract, ContractMilestone):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        cls.procurement_id = procurement_ids[len(procurement_ids) // 2]
+        cls.contract_id = contract_ids[len(contract_ids) // 2]
+        cls.supplier_doc = Supplier.objects.get(pk=supplier_ids[cls.SUPPLIERS // 2]).doc
+
+    def plan(self, viewset_class, params):
+        """Plano de execução da primeira página da listagem com os filtros informados"""
+        view = viewset_class()
+        view.request = Request(APIRequestFactory().get('/', params))
+        view.action = 'list'
+        view.format_kwarg = None
+        return view.get_queryset()[:20].explain()
+
+    def assertUsesIndex(self, plan, index_name):
+        self.assertIn(index_name, plan, msg=f'Índice {index_name} não utilizado:\n{plan}')
+
+    def test_procurement_default_ordering(self):
+        self.assertUsesIndex(self.plan(ProcurementViewSet, {}), 'proc_created_idx')
+
+    def test_procurement_status_filter(self):
+        plan = self.plan(ProcurementViewSet, {'status': Procurement.StatusChoices.ABERTA})
+        self.assertUsesIndex(plan, 'proc_status_created_idx')
+
+    def test_procurement_modalidade_filter(self):
+        plan = self.plan(ProcurementViewSet, {'modalidade': Procurement.ModalidadeChoices.PREGAO})
+        self.assertUsesIndex(plan, 'proc_modal_created_idx')
+
+    def test_procurement_date_range_filter(self):
+        plan = self.plan(ProcurementViewSet, {'start_date': '2021-03-01', 'end_date': '2021-03-03'})
+        self.assertUsesIndex(plan, 'proc_abertura_idx')
+
+    def test_proposal_procurement_filter(self):
+        plan = self.plan(ProposalViewSet, {'procurement': self.procurement_id})
+        self.assertUsesIndex(plan, 'proposal_ranking_idx')
+
+    def test_proposal_supplier_filter(self):
+        plan = self.plan(ProposalViewSet, {'supplier_doc': self.supplier_doc})
+        self.assertUsesIndex(plan, 'proposal_supplier_idx')
+
+    def test_contract_status_filter(self):
+        plan = self.plan(ContractViewSet, {'status': Contract.StatusChoices.SUSPENSO})
+        self.assertUsesIndex(plan, 'contract_status_created_idx')
+
+    def test_contract_procurement_filter(self):
+        plan = self.plan(ContractViewSet, {'procurement': self.procurement_id})
+        self.assertUsesIndex(plan, 'contract_proc_created_idx')
+
+    def test_contract_supplier_filter(self):
+        plan = self.plan(ContractViewSet, {'supplier_doc': self.supplier_doc})
+        self.assertUsesIndex(plan, 'contract_supplier_created_idx')
+
+    def test_contract_start_range_filter(self):
+        plan = self.plan(ContractViewSet, {'start_date': '2022-06-01', 'end_date': '2022-06-03'})
+        self.assertUsesIndex(plan, 'contract_start_idx')
+
+    def test_contract_end_range_filter(self):
+        plan = self.plan(ContractViewSet, {'end_from': '2022-06-01', 'end_to': '2022-06-03'})
+        self.assertUsesIndex(plan, 'contract_end_idx')
+
+    def test_milestone_contract_filter(self):
+        plan = self.plan(ContractMilestoneViewSet, {'contract': self.contract_id})
+        self.assertUsesIndex(plan, 'milestone_contract_due_idx')
+
+    def test_milestone_status_filter(self):
+        plan = self.plan(ContractMilestoneViewSet, {'status': ContractMilestone.StatusChoices.ATRASADO})
+        self.assertUsesIndex(plan, 'milestone_status_due_idx')
+
+    def test_milestone_due_range_filter(self):
+        plan = self.plan(ContractMilestoneViewSet, {'start_date': '2022-06-01', 'end_date': '2022-06-03'})
+        self.assertUsesIndex(plan, 'milestone_due_idx')
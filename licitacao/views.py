@@ -1,22 +1,255 @@
+import math
+
 from django.shortcuts import render
-from rest_framework import viewsets
-from .models import Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db.models import Q
+from .models import Supplier, Procurement, ProcPhase, Proposal, Award, Contract, ContractMilestone
 from .serializers import (
-    ProcurementSerializer, ProcPhaseSerializer, ProposalSerializer, 
-    AwardSerializer, ContractSerializer, ContractMilestoneSerializer
+    SupplierSerializer, ProcurementSerializer, ProcPhaseSerializer, ProposalSerializer, 
+    AwardSerializer, ContractSerializer, ContractMilestoneSerializer,
+    ProcurementFullSerializer
+)
+from .services import (
+    rank_proposals, procurement_graph_version, refresh_overdue_summary, phase_sla_report,
+    expiring_contracts, EXPIRING_HORIZONS
 )
+from .pricing import reference_price
 from users.permissions import IsSectorAdmin, IsSectorOperator
 
 
 # Create your views here.
 
 
+def filter_date_range(queryset, field, start_date=None, end_date=None):
+    """Aplica o intervalo de datas (inclusivo) ao campo, ignorando datas inválidas"""
+    if start_date:
+        try:
+            queryset = queryset.filter(**{f'{field}__gte': start_date})
+        except (ValueError, TypeError, ValidationError):
+            pass
+    
+    if end_date:
+        try:
+            queryset = queryset.filter(**{f'{field}__lte': end_date})
+        except (ValueError, TypeError, ValidationError):
+            pass
+    
+    return queryset
+
+
+def filter_int(queryset, params, param, field):
+    """Aplica o filtro por ID informado na query string (ignora valores inválidos)"""
+    value = params.get(param)
+    if value:
+        try:
+            queryset = queryset.filter(**{field: int(value)})
+        except (ValueError, TypeError):
+            pass
+    return queryset
+
+
+def filter_supplier_doc(queryset, doc):
+    """
+    Filtra pelo fornecedor do CPF/CNPJ informado.
+
+    O id do fornecedor é resolvido antes (índice único de Supplier.doc), então
+    o filtro usa a coluna supplier_id indexada, sem junção.
+    """
+    supplier_id = Supplier.objects.filter(doc=Supplier.normalize_doc(doc)).values_list('pk', flat=True).first()
+    if supplier_id is None:
+        return queryset.none()
+    return queryset.filter(supplier_id=supplier_id)
+
+
+class SupplierViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para fornecedores (cadastro mantido a partir de propostas e contratos)"""
+    queryset = Supplier.objects.all()
+    serializer_class = SupplierSerializer
+    permission_classes = [IsSectorAdmin]
+    sector = 'LICITACAO'
+    
+    def get_queryset(self):
+        queryset = Supplier.objects.all()
+        
+        # Aplicar filtros de query string
+        doc = self.request.query_params.get('doc')
+        if doc:
+            queryset = queryset.filter(doc=Supplier.normalize_doc(doc))
+        
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset.filter(
+                Q(name__icontains=search) |
+                Q(doc__startswith=Supplier.normalize_doc(search) or search)
+            )
+        
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Histórico de participação do fornecedor: propostas, vitórias e contratos"""
+        supplier = self.get_object()
+        
+        proposals = supplier.proposals.select_related('procurement').order_by('-created_at')
+        wins = Award.objects.filter(supplier__supplier=supplier).select_related('procurement').order_by('-homolog_dt')
+        contracts = supplier.contracts.order_by('-start_dt')
+        
+        return Response({
+            'supplier': self.get_serializer(supplier).data,
+            'proposals': [
+                {
+                    **ProposalSerializer(proposal).data,
+                    'numero_processo': proposal.procurement.numero_processo,
+                    'modalidade': proposal.procurement.modalidade,
+                }
+                for proposal in proposals
+            ],
+            'wins': [
+                {
+                    **AwardSerializer(award).data,
+                    'numero_processo': award.procurement.numero_processo,
+                }
+                for award in wins
+            ],
+            'contracts': ContractSerializer(contracts, many=True).data,
+        })
+
+
 class ProcurementViewSet(viewsets.ModelViewSet):
     """ViewSet para processos de licitação"""
     queryset = Procurement.objects.all()
     serializer_class = ProcurementSerializer
     permission_classes = [IsSectorAdmin]
     sector = 'LICITACAO'
+    
+    FULL_CACHE_TIMEOUT = 60 * 60
+    
+    def get_queryset(self):
+        queryset = Procurement.objects.all()
+        
+        if self.action == 'full':
+            return queryset.select_related('award').prefetch_related(
+                'phases', 'proposals', 'contracts__milestones'
+            )
+        
+        # Aplicar filtros de query string (cada combinação filtro + ordenação possui índice)
+        params = self.request.query_params
+        
+        status_filter = params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        modalidade = params.get('modalidade')
+        if modalidade:
+            queryset = queryset.filter(modalidade=modalidade)
+        
+        queryset = filter_date_range(
+            queryset, 'data_abertura', params.get('start_date'), params.get('end_date')
+        )
+        
+        search = params.get('search')
+        if search:
+            queryset = queryset.filter(
+                Q(numero_processo__icontains=search) |
+                Q(objeto__icontains=search)
+            )
+        
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def full(self, request, pk=None):
+        """
+        Processo completo com fases, propostas, adjudicação, contratos e marcos
+        
+        Executa um número fixo de consultas (select_related/prefetch_related) e
+        guarda o resultado em cache pela versão do grafo (maior updated_at).
+        """
+        try:
+            version = procurement_graph_version(int(pk))
+        except (ValueError, TypeError):
+            raise Http404
+        if version is None:
+            raise Http404
+        
+        # Permissões de objeto verificadas sempre, independente do cache
+        procurement = Procurement.objects.filter(pk=pk).first()
+        if procurement is None:
+            raise Http404
+        self.check_object_permissions(request, procurement)
+        
+        etag = f'"{pk}-{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        cache_key = f'licitacao:procurement_full:{pk}:{version}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = ProcurementFullSerializer(self.get_object()).data
+            cache.set(cache_key, data, self.FULL_CACHE_TIMEOUT)
+        
+        return Response(data, headers={'ETag': etag})
+    
+    @action(detail=False, methods=['get'])
+    def reference_price(self, request):
+        """
+        Faixas de preço de referência (p10/p50/p90) para um objeto
+        
+        Query params: objeto (obrigatório), modalidade, min_match (0-1, padrão 0.5)
+        """
+        objeto = request.query_params.get('objeto', '').strip()
+        if not objeto:
+            return Response(
+                {'error': 'Informe o objeto.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        modalidade = request.query_params.get('modalidade')
+        if modalidade and modalidade not in Procurement.ModalidadeChoices.values:
+            return Response(
+                {'error': 'Modalidade inválida.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            min_match = float(request.query_params.get('min_match', 0.5))
+        except ValueError:
+            min_match = 0.5
+        if not math.isfinite(min_match):
+            return Response(
+                {'error': 'min_match deve ser um número entre 0 e 1.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        min_match = min(max(min_match, 0.0), 1.0)
+        
+        return Response(reference_price(objeto, modalidade=modalidade, min_match=min_match))
+    
+    @action(detail=True, methods=['post'])
+    def rank(self, request, pk=None):
+        """
+        Classifica todas as propostas do processo conforme o critério da modalidade
+        
+        Body opcional: {"create_award": true} para adjudicar ao primeiro colocado
+        """
+        procurement = self.get_object()
+        create_award = str(request.data.get('create_award', '')).lower() in ('1', 'true')
+        
+        try:
+            ranked, award = rank_proposals(procurement, create_award=create_award)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        proposals = procurement.proposals.order_by('classificacao', 'valor')
+        return Response({
+            'ranked': ranked,
+            'proposals': ProposalSerializer(proposals, many=True).data,
+            'award': AwardSerializer(award).data if award else None,
+        })
 
 
 class ProcPhaseViewSet(viewsets.ModelViewSet):
@@ -25,6 +258,48 @@ class ProcPhaseViewSet(viewsets.ModelViewSet):
     serializer_class = ProcPhaseSerializer
     permission_classes = [IsSectorAdmin]
     sector = 'LICITACAO'
+    
+    SLA_CACHE_TIMEOUT = 60 * 60 * 24
+    
+    @action(detail=False, methods=['get'])
+    def sla(self, request):
+        """
+        Duração das fases (média, p50, p90) por modalidade/ano e gargalos atuais
+        
+        Calculado uma vez por dia e servido do cache.
+        Query params: modalidade, ano, fase
+        """
+        cache_key = f'licitacao:phase_sla:{timezone.localdate().isoformat()}'
+        report = cache.get(cache_key)
+        if report is None:
+            report = phase_sla_report()
+            cache.set(cache_key, report, self.SLA_CACHE_TIMEOUT)
+        
+        stats = report['stats']
+        bottlenecks = report['bottlenecks']
+        
+        modalidade = request.query_params.get('modalidade')
+        if modalidade:
+            stats = [row for row in stats if row['modalidade'] == modalidade]
+            bottlenecks = [row for row in bottlenecks if row['modalidade'] == modalidade]
+        
+        fase = request.query_params.get('fase')
+        if fase:
+            stats = [row for row in stats if row['fase'] == fase]
+            bottlenecks = [row for row in bottlenecks if row['fase'] == fase]
+        
+        ano = request.query_params.get('ano')
+        if ano:
+            try:
+                stats = [row for row in stats if row['ano'] == int(ano)]
+            except (ValueError, TypeError):
+                pass
+        
+        return Response({
+            'generated_at': report['generated_at'],
+            'stats': stats,
+            'bottlenecks': bottlenecks,
+        })
 
 
 class ProposalViewSet(viewsets.ModelViewSet):
@@ -33,6 +308,24 @@ class ProposalViewSet(viewsets.ModelViewSet):
     serializer_class = ProposalSerializer
     permission_classes = [IsSectorAdmin]
     sector = 'LICITACAO'
+    
+    def get_queryset(self):
+        queryset = Proposal.objects.all()
+        
+        # Aplicar filtros de query string
+        params = self.request.query_params
+        
+        queryset = filter_int(queryset, params, 'procurement', 'procurement_id')
+        
+        status_filter = params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        supplier_doc = params.get('supplier_doc')
+        if supplier_doc:
+            queryset = filter_supplier_doc(queryset, supplier_doc)
+        
+        return queryset
 
 
 class AwardViewSet(viewsets.ModelViewSet):
@@ -49,6 +342,77 @@ class ContractViewSet(viewsets.ModelViewSet):
     serializer_class = ContractSerializer
     permission_classes = [IsSectorAdmin]
     sector = 'LICITACAO'
+    
+    def get_queryset(self):
+        queryset = Contract.objects.all()
+        
+        # Aplicar filtros de query string
+        params = self.request.query_params
+        
+        # Filtro de contratos com marcos atrasados (coluna indexada)
+        atrasado = params.get('atrasado', '').lower()
+        if atrasado in ('1', 'true'):
+            queryset = queryset.filter(is_late=True)
+        elif atrasado in ('0', 'false'):
+            queryset = queryset.filter(is_late=False)
+        
+        status_filter = params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        queryset = filter_int(queryset, params, 'procurement', 'procurement_id')
+        
+        supplier_doc = params.get('supplier_doc')
+        if supplier_doc:
+            queryset = filter_supplier_doc(queryset, supplier_doc)
+        
+        # Início da vigência (start_date/end_date) e término (end_from/end_to)
+        queryset = filter_date_range(
+            queryset, 'start_dt', params.get('start_date'), params.get('end_date')
+        )
+        queryset = filter_date_range(
+            queryset, 'end_dt', params.get('end_from'), params.get('end_to')
+        )
+        
+        setor = params.get('setor')
+        if setor:
+            queryset = queryset.filter(setor_responsavel=setor)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        """
+        Contratos ativos que vencem nos próximos 30/60/90 dias
+        
+        Query params: days (30, 60 ou 90; padrão 30), setor
+        """
+        try:
+            days = int(request.query_params.get('days', EXPIRING_HORIZONS[0]))
+        except (ValueError, TypeError):
+            days = None
+        if days not in EXPIRING_HORIZONS:
+            return Response(
+                {'error': f'Informe days entre {EXPIRING_HORIZONS}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        today = timezone.localdate()
+        queryset = expiring_contracts(days, today)
+        
+        setor = request.query_params.get('setor')
+        if setor:
+            queryset = queryset.filter(setor_responsavel=setor)
+        
+        page = self.paginate_queryset(queryset)
+        contracts = page if page is not None else list(queryset)
+        data = [
+            {**ContractSerializer(contract).data, 'dias_restantes': (contract.end_dt - today).days}
+            for contract in contracts
+        ]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
 
 class ContractMilestoneViewSet(viewsets.ModelViewSet):
@@ -57,3 +421,40 @@ class ContractMilestoneViewSet(viewsets.ModelViewSet):
     serializer_class = ContractMilestoneSerializer
     permission_classes = [IsSectorAdmin]
     sector = 'LICITACAO'
+    
+    def get_queryset(self):
+        queryset = ContractMilestone.objects.all()
+        
+        # Aplicar filtros de query string
+        params = self.request.query_params
+        
+        queryset = filter_int(queryset, params, 'contract', 'contract_id')
+        
+        status_filter = params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        queryset = filter_date_range(
+            queryset, 'due_dt', params.get('start_date'), params.get('end_date')
+        )
+        
+        return queryset
+    
+    def perform_create(self, serializer):
+        """Criar marco e atualizar o resumo de atrasos do contrato"""
+        milestone = serializer.save()
+        refresh_overdue_summary(Contract.objects.filter(pk=milestone.contract_id))
+    
+    def perform_update(self, serializer):
+        """Atualizar marco e o resumo de atrasos do(s) contrato(s)"""
+        previous_contract_id = serializer.instance.contract_id
+        milestone = serializer.save()
+        refresh_overdue_summary(
+            Contract.objects.filter(pk__in=[previous_contract_id, milestone.contract_id])
+        )
+    
+    def perform_destroy(self, instance):
+        """Deletar marco e atualizar o resumo de atrasos do contrato"""
+        contract_id = instance.contract_id
+        instance.delete()
+        refresh_overdue_summary(Contract.objects.filter(pk=contract_id))
@@ -1,11 +1,11 @@
 from django.contrib import admin
-from .models import WorkProject, WorkProgress, WorkPhoto
+from .models import WorkProject, WorkProgress, WorkPhoto, UploadSession
 
 
 @admin.register(WorkProject)
 class WorkProjectAdmin(admin.ModelAdmin):
     """Admin para obras/projetos"""
-    list_display = ('name', 'status', 'budget', 'start_date', 'expected_end_date', 'responsible', 'created_at')
+    list_display = ('name', 'status', 'budget', 'start_date', 'expected_end_date', 'last_physical_pct', 'responsible', 'created_at')
     list_filter = ('status', 'start_date', 'expected_end_date', 'created_at')
     search_fields = ('name', 'description', 'responsible', 'address')
     ordering = ('-created_at',)
@@ -16,7 +16,10 @@ class WorkProjectAdmin(admin.ModelAdmin):
         ('Contrato', {'fields': ('contract',)}),
         ('Orçamento e Datas', {'fields': ('budget', 'start_date', 'expected_end_date', 'actual_end_date')}),
         ('Status', {'fields': ('status',)}),
+        ('Último Progresso', {'fields': ('last_physical_pct', 'last_financial_pct', 'last_progress_month')}),
     )
+    
+    readonly_fields = WorkProject.PROGRESS_FIELDS
 
 
 @admin.register(WorkProgress)
@@ -37,12 +40,27 @@ class WorkProgressAdmin(admin.ModelAdmin):
 @admin.register(WorkPhoto)
 class WorkPhotoAdmin(admin.ModelAdmin):
     """Admin para fotos das obras"""
-    list_display = ('project', 'title', 'taken_date', 'location', 'created_at')
+    list_display = ('project', 'title', 'taken_date', 'location', 'duplicate_of', 'created_at')
     list_filter = ('taken_date', 'created_at')
-    search_fields = ('title', 'description', 'project__name', 'location')
+    search_fields = ('title', 'description', 'project__name', 'location', 'phash')
     ordering = ('project', '-taken_date')
+    raw_id_fields = ('duplicate_of',)
     
     fieldsets = (
         ('Projeto', {'fields': ('project', 'title', 'description')}),
         ('Foto', {'fields': ('photo', 'taken_date', 'location')}),
+        ('Duplicidade', {'fields': ('phash', 'duplicate_of')}),
     )
+    
+    readonly_fields = ('phash', 'duplicate_of')
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Admin para sessões de upload em partes"""
+    list_display = ('upload_id', 'project', 'filename', 'total_size', 'total_chunks', 'status', 'user', 'updated_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('filename', 'project__name', 'user__email')
+    ordering = ('-created_at',)
+    
+    readonly_fields = ('upload_id', 'photo', 'created_at', 'updated_at')
@@ -5,3 +5,6 @@ class ObrasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'obras'
     verbose_name = 'Obras'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
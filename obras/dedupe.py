@@ -0,0 +1,265 @@
+"""
+Fotos quase-duplicadas das obras pelo hash perceptual (dHash)
+
+O hash de 64 bits é dividido em 4 faixas de 16 bits indexadas: dois hashes a
+até 3 bits de distância (Hamming) têm ao menos uma faixa idêntica, então os
+candidatos saem das faixas pelo índice e a distância exata é calculada sobre
+eles.
+"""
+import hashlib
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from operator import or_
+
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+
+from .imaging import _executor, _init_django_worker, perceptual_hash, read_photo_bytes, PILLOW_AVAILABLE
+from .models import WorkPhoto
+
+logger = logging.getLogger(__name__)
+
+PHASH_BANDS = 4
+PHASH_BAND_BITS = 16
+# Maior distância garantida pela busca por faixas (PHASH_BANDS - 1)
+MAX_DUPLICATE_DISTANCE = 3
+
+BAND_FIELDS = [f'phash_band{band}' for band in range(PHASH_BANDS)]
+FILE_FIELDS = ['photo', 'thumbnail', 'medium', 'webp']
+
+
+def hash_bands(value):
+    """Faixas de 16 bits do hash, da mais significativa para a menos"""
+    mask = (1 << PHASH_BAND_BITS) - 1
+    return [
+        (value >> (PHASH_BAND_BITS * (PHASH_BANDS - 1 - band))) & mask
+        for band in range(PHASH_BANDS)
+    ]
+
+
+def hash_fields(value):
+    """Valores dos campos de hash da WorkPhoto"""
+    return {'phash': f'{value:016x}', **dict(zip(BAND_FIELDS, hash_bands(value)))}
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def near_duplicates(value, queryset=None, max_distance=MAX_DUPLICATE_DISTANCE):
+    """
+    Fotos com hash a até `max_distance` bits do hash informado.
+
+    Returns:
+        Lista de tuplas (id da foto, distância), da mais próxima para a mais distante
+    """
+    if queryset is None:
+        queryset = WorkPhoto.objects.all()
+
+    bands = hash_bands(value)
+    candidates = queryset.filter(
+        reduce(or_, [Q(**{field: band}) for field, band in zip(BAND_FIELDS, bands)])
+    ).order_by().values_list('pk', 'phash')
+
+    matches = []
+    for pk, phash in candidates:
+        distance = hamming_distance(value, int(phash, 16))
+        if distance <= max_distance:
+            matches.append((pk, distance))
+    return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+def assign_perceptual_hash(photo_id, value):
+    """
+    Grava o hash da foto e a marca como duplicata da foto mais antiga
+    semelhante (sem disparar sinais).
+    """
+    matches = near_duplicates(value, WorkPhoto.objects.filter(pk__lt=photo_id))
+    duplicate_of = min((pk for pk, _ in matches), default=None)
+    WorkPhoto.objects.filter(pk=photo_id).update(duplicate_of=duplicate_of, **hash_fields(value))
+    return duplicate_of
+
+
+def compute_photo_hash(photo_id):
+    """Calcula o hash de uma foto e verifica duplicatas (executado no pool de threads)"""
+    try:
+        photo = WorkPhoto.objects.filter(pk=photo_id).first()
+        if photo is None or not photo.photo:
+            return
+        with photo.photo.open('rb') as source:
+            value = perceptual_hash(source)
+        assign_perceptual_hash(photo.pk, value)
+    except Exception:
+        logger.exception('Falha ao calcular o hash perceptual da foto %s', photo_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_perceptual_hash(photo_id):
+    """Agenda o cálculo do hash para depois do commit da transação atual"""
+    transaction.on_commit(lambda: _executor.submit(compute_photo_hash, photo_id))
+
+
+def backfill_perceptual_hashes(queryset=None, workers=None, chunk_size=32, batch_size=500):
+    """
+    Calcula em um pool de processos o hash das fotos armazenadas (arquivos
+    lidos pelo storage no processo principal).
+
+    Sem `queryset`, processa as fotos que ainda não possuem hash. Os hashes
+    são gravados com bulk_update.
+
+    Returns:
+        Tupla (fotos processadas, falhas)
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow não está disponível. Instale com: pip install Pillow")
+
+    if queryset is None:
+        queryset = WorkPhoto.objects.filter(phash='')
+
+    photos = [photo for photo in queryset.exclude(photo='').order_by('pk') if photo.photo]
+    fields = ['phash'] + BAND_FIELDS
+    processed = failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_django_worker) as executor:
+        for start in range(0, len(photos), chunk_size):
+            chunk = []
+            futures = []
+            for photo in photos[start:start + chunk_size]:
+                try:
+                    futures.append(executor.submit(perceptual_hash, read_photo_bytes(photo.photo)))
+                    chunk.append(photo)
+                except OSError:
+                    logger.warning('Arquivo da foto %s não encontrado', photo.pk)
+                    failed += 1
+            updated = []
+            for photo, future in zip(chunk, futures):
+                try:
+                    for field, value in hash_fields(future.result()).items():
+                        setattr(photo, field, value)
+                    updated.append(photo)
+                except Exception:
+                    logger.exception('Falha ao calcular o hash perceptual da foto %s', photo.pk)
+                    failed += 1
+            WorkPhoto.objects.bulk_update(updated, fields, batch_size=batch_size)
+            processed += len(updated)
+
+    return processed, failed
+
+
+def flag_duplicates(max_distance=MAX_DUPLICATE_DISTANCE, batch_size=1000):
+    """
+    Recalcula `duplicate_of` de todas as fotos com hash.
+
+    Cada foto aponta para a foto mais antiga (menor id) semelhante. As faixas
+    são agrupadas em memória, então a comparação é feita só entre fotos que
+    compartilham alguma faixa.
+
+    Returns:
+        Quantidade de fotos marcadas como duplicatas
+    """
+    rows = list(
+        WorkPhoto.objects.exclude(phash='').order_by('pk').values_list('pk', 'phash', 'duplicate_of_id')
+    )
+
+    buckets = {}
+    changed = []
+    duplicates = 0
+    for pk, phash, current in rows:
+        value = int(phash, 16)
+        keys = list(enumerate(hash_bands(value)))
+
+        # Fotos anteriores (menor id) que compartilham alguma faixa
+        candidates = set()
+        for key in keys:
+            candidates.update(buckets.get(key, ()))
+        matches = [
+            other_pk for other_pk, other_value in candidates
+            if hamming_distance(value, other_value) <= max_distance
+        ]
+        duplicate_of = min(matches, default=None)
+
+        if duplicate_of is not None:
+            duplicates += 1
+        if duplicate_of != current:
+            changed.append(WorkPhoto(pk=pk, duplicate_of_id=duplicate_of))
+        for key in keys:
+            buckets.setdefault(key, []).append((pk, value))
+
+    WorkPhoto.objects.bulk_update(changed, ['duplicate_of'], batch_size=batch_size)
+    return duplicates
+
+
+def _file_digest(storage, name, cache):
+    if name not in cache:
+        digest = hashlib.sha256()
+        with storage.open(name, 'rb') as source:
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(block)
+        cache[name] = digest.hexdigest()
+    return cache[name]
+
+
+def dedupe_storage(dry_run=False):
+    """
+    Faz as duplicatas com conteúdo idêntico ao da foto original apontarem
+    para os arquivos da original e remove os arquivos repetidos.
+
+    Apenas arquivos byte a byte iguais (SHA-256) são compartilhados; fotos
+    semelhantes mas diferentes continuam apenas marcadas. Um arquivo só é
+    removido quando nenhuma outra foto o referencia. Com `dry_run`, apenas
+    calcula o resultado.
+
+    Returns:
+        Tupla (fotos deduplicadas, bytes liberados)
+    """
+    storage = WorkPhoto._meta.get_field('photo').storage
+    names = {
+        row[0]: dict(zip(FILE_FIELDS, row[1:]))
+        for row in WorkPhoto.objects.values_list('pk', *FILE_FIELDS)
+    }
+    references = Counter(name for files in names.values() for name in files.values() if name)
+    duplicates = WorkPhoto.objects.filter(duplicate_of__isnull=False).order_by('pk').values_list(
+        'pk', 'duplicate_of_id'
+    )
+
+    digests = {}
+    deduplicated = freed = 0
+    for pk, original_pk in duplicates:
+        own, original = names[pk], names[original_pk]
+        if not own['photo'] or not original['photo'] or own['photo'] == original['photo']:
+            continue
+        try:
+            if storage.size(own['photo']) != storage.size(original['photo']):
+                continue
+            if _file_digest(storage, own['photo'], digests) != _file_digest(storage, original['photo'], digests):
+                continue
+        except OSError:
+            logger.warning('Arquivo da foto %s ou %s não encontrado', pk, original_pk)
+            continue
+
+        # Versões da original só substituem as próprias quando já existem
+        replaced = {
+            field: original[field]
+            for field in FILE_FIELDS
+            if original[field] and original[field] != own[field]
+        }
+        released = [own[field] for field in replaced if own[field]]
+        for field, name in replaced.items():
+            references[name] += 1
+        for name in released:
+            references[name] -= 1
+        own.update(replaced)
+        deduplicated += 1
+
+        if not dry_run:
+            WorkPhoto.objects.filter(pk=pk).update(**replaced)
+        for name in released:
+            if references[name] == 0 and storage.exists(name):
+                freed += storage.size(name)
+                if not dry_run:
+                    storage.delete(name)
+
+    return deduplicated, freed
@@ -0,0 +1,114 @@
+"""
+Funções geográficas do módulo de obras (sem PostGIS)
+"""
+import math
+
+from django.conf import settings
+
+# Import condicional do NumPy para não quebrar o sistema
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+EARTH_RADIUS_M = 6371008.8
+
+# Distância a partir da qual a foto é considerada tirada fora da obra
+LOCATION_MISMATCH_DISTANCE_M = getattr(settings, 'WORK_PHOTO_MISMATCH_DISTANCE_M', 1000)
+
+
+def haversine_distance_m(lat1, lng1, lat2, lng2):
+    """Distância em metros entre dois pontos (graus decimais)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """
+    Distâncias em metros entre arrays de pontos (graus decimais), vetorizado.
+
+    Aceita arrays de mesmo formato ou escalares (broadcast do NumPy).
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy não está disponível. Instale com: pip install numpy")
+
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+# Máximo de células (prefixos) usadas para cobrir uma área na consulta
+MAX_QUERY_CELLS = 32
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Codifica a coordenada em geohash (células vizinhas compartilham prefixo)"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision):
+    """Dimensões (graus de latitude, graus de longitude) de uma célula"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_cells(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_QUERY_CELLS):
+    """
+    Prefixos geohash que cobrem o retângulo informado.
+
+    Usa a maior precisão cuja cobertura não ultrapassa `max_cells` células,
+    para que a consulta seja um conjunto pequeno de buscas por prefixo no índice.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lng, max_lng = max(min_lng, -180.0), min(max_lng, 180.0)
+
+    cells = {''}
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lng_step = geohash_cell_size(precision)
+        rows = int(max_lat // lat_step - min_lat // lat_step) + 1
+        cols = int(max_lng // lng_step - min_lng // lng_step) + 1
+        if rows * cols > max_cells:
+            break
+
+        cells = set()
+        lat = (min_lat // lat_step) * lat_step + lat_step / 2
+        for _ in range(rows):
+            lng = (min_lng // lng_step) * lng_step + lng_step / 2
+            for _ in range(cols):
+                cells.add(encode_geohash(min(lat, 90.0), min(lng, 180.0), precision))
+                lng += lng_step
+            lat += lat_step
+    return sorted(cells)
+
+
+def bbox_around(lat, lng, radius_m):
+    """Retângulo (min_lat, min_lng, max_lat, max_lng) que contém o círculo informado"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(180.0, math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
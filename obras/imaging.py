@@ -0,0 +1,330 @@
+"""
+Processamento de imagens das fotos das obras: versões otimizadas (miniatura,
+média e WebP), leitura dos metadados EXIF (data e GPS) e hash perceptual
+"""
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+import django
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+
+from .models import WorkPhoto
+
+# Import condicional do Pillow para não quebrar o sistema
+try:
+    from PIL import Image, ImageOps
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Versão -> (maior lado em pixels, formato, extensão, qualidade)
+DERIVATIVES = {
+    'thumbnail': (320, 'JPEG', 'jpg', 80),
+    'medium': (1280, 'JPEG', 'jpg', 85),
+    'webp': (1920, 'WEBP', 'webp', 80),
+}
+
+# Tags EXIF utilizadas
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+TAG_DATETIME = 306
+TAG_DATETIME_ORIGINAL = 36867
+GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE = 1, 2, 3, 4
+
+# O EXIF de JPEG fica no segmento APP1, limitado a 64 KB no início do arquivo
+EXIF_HEADER_BYTES = 128 * 1024
+
+# Lado da grade do dHash (hash de PHASH_SIZE * PHASH_SIZE bits)
+PHASH_SIZE = 8
+
+# Pool de threads para gerar as versões em segundo plano após o upload
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='work-photo-derivatives')
+
+
+def _init_django_worker():
+    """Garante o Django configurado nos processos dos pools (o módulo importa obras.models)"""
+    django.setup()
+
+
+def _image_source(source):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def read_photo_bytes(field_file):
+    """
+    Conteúdo do arquivo lido pelo storage (funciona também com storages
+    remotos, sem caminho local), para envio aos pools de processos.
+    """
+    with field_file.open('rb') as source:
+        return source.read()
+
+
+def render_derivatives(source):
+    """
+    Gera as versões da imagem informada (caminho, arquivo ou bytes).
+
+    Função de módulo (sem acesso ao banco) para poder ser executada em um
+    pool de processos.
+
+    Returns:
+        Dicionário versão -> conteúdo em bytes
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow não está disponível. Instale com: pip install Pillow")
+
+    with Image.open(_image_source(source)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        rendered = {}
+        for name, (size, image_format, _, quality) in DERIVATIVES.items():
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format=image_format, quality=quality, optimize=True)
+            rendered[name] = buffer.getvalue()
+    return rendered
+
+
+def perceptual_hash(source):
+    """
+    dHash de 64 bits da imagem (caminho, arquivo ou bytes).
+
+    A imagem é reduzida a 9x8 em tons de cinza e cada bit indica se um pixel é
+    mais claro que o vizinho à direita: recompressões e redimensionamentos da
+    mesma foto geram hashes iguais ou a poucos bits de distância. Em JPEG a
+    decodificação já é feita em escala reduzida (draft).
+
+    Função de módulo (sem acesso ao banco) para poder ser executada em um
+    pool de processos.
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow não está disponível. Instale com: pip install Pillow")
+
+    with Image.open(_image_source(source)) as original:
+        original.draft('L', (PHASH_SIZE * 8, PHASH_SIZE * 8))
+        image = ImageOps.exif_transpose(original).convert('L')
+        pixels = image.resize((PHASH_SIZE + 1, PHASH_SIZE), Image.LANCZOS).tobytes()
+
+    value = 0
+    for row in range(PHASH_SIZE):
+        offset = row * (PHASH_SIZE + 1)
+        for col in range(PHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def _gps_to_degrees(value, ref):
+    degrees, minutes, seconds = (float(part) for part in value)
+    result = degrees + minutes / 60 + seconds / 3600
+    return -result if ref in ('S', 'W') else result
+
+
+def read_exif(source):
+    """
+    Lê data e coordenadas GPS dos metadados EXIF (caminho ou arquivo).
+
+    O Pillow abre a imagem de forma preguiçosa: apenas o cabeçalho é lido,
+    sem decodificar os pixels.
+
+    Returns:
+        Dicionário com 'taken_date', 'lat' e 'lng' (None quando ausentes)
+    """
+    metadata = {'taken_date': None, 'lat': None, 'lng': None}
+    if not PILLOW_AVAILABLE:
+        return metadata
+
+    try:
+        with Image.open(source) as image:
+            exif = image.getexif()
+            details = exif.get_ifd(EXIF_IFD)
+            gps = exif.get_ifd(GPS_IFD)
+    except Exception:
+        return metadata
+
+    raw_date = details.get(TAG_DATETIME_ORIGINAL) or exif.get(TAG_DATETIME)
+    if raw_date:
+        try:
+            metadata['taken_date'] = datetime.strptime(str(raw_date).strip('\x00 ')[:19], '%Y:%m:%d %H:%M:%S').date()
+        except ValueError:
+            pass
+
+    try:
+        if GPS_LATITUDE in gps and GPS_LONGITUDE in gps:
+            lat = _gps_to_degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF, 'N'))
+            lng = _gps_to_degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF, 'E'))
+            if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat, lng) != (0.0, 0.0):
+                metadata['lat'], metadata['lng'] = round(lat, 6), round(lng, 6)
+    except (TypeError, ValueError, ZeroDivisionError):
+        pass
+
+    return metadata
+
+
+def read_exif_header(source):
+    """
+    Lê os metadados EXIF a partir apenas dos primeiros bytes do arquivo
+    (caminho ou arquivo aberto, p.ex. do storage).
+
+    Se o cabeçalho não for suficiente (formatos com EXIF no fim do arquivo),
+    abre o arquivo completo de forma preguiçosa.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as opened:
+            return read_exif_header(opened)
+
+    header = source.read(EXIF_HEADER_BYTES)
+    metadata = read_exif(io.BytesIO(header))
+    if metadata['taken_date'] is None and metadata['lat'] is None and len(header) == EXIF_HEADER_BYTES:
+        source.seek(0)
+        metadata = read_exif(source)
+    return metadata
+
+
+def save_derivatives(photo, rendered):
+    """Grava as versões geradas no storage e atualiza a foto (sem disparar sinais)"""
+    base = os.path.splitext(os.path.basename(photo.photo.name))[0]
+    values = {}
+    for name, content in rendered.items():
+        field_file = getattr(photo, name)
+        # Arquivos compartilhados com duplicatas (obras.dedupe) são preservados
+        if field_file and not WorkPhoto.objects.filter(**{name: field_file.name}).exclude(pk=photo.pk).exists():
+            field_file.storage.delete(field_file.name)
+        extension = DERIVATIVES[name][2]
+        field_file.save(f'{base}-{name}.{extension}', ContentFile(content), save=False)
+        values[name] = field_file.name
+
+    WorkPhoto.objects.filter(pk=photo.pk).update(derivatives_pending=False, **values)
+
+
+def delete_photo_files(names):
+    """
+    Remove do storage os arquivos de uma foto excluída.
+
+    Arquivos ainda referenciados por outras fotos (duplicatas compartilhadas
+    por obras.dedupe) são preservados.
+    """
+    storage = WorkPhoto._meta.get_field('photo').storage
+    for field, name in names.items():
+        if name and not WorkPhoto.objects.filter(**{field: name}).exists():
+            storage.delete(name)
+
+
+def generate_photo_derivatives(photo_id):
+    """Gera e grava as versões de uma foto (executado no pool de threads)"""
+    try:
+        photo = WorkPhoto.objects.filter(pk=photo_id).first()
+        if photo is None or not photo.photo:
+            return
+        with photo.photo.open('rb') as source:
+            rendered = render_derivatives(source)
+        save_derivatives(photo, rendered)
+    except Exception:
+        logger.exception('Falha ao gerar as versões da foto %s', photo_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(photo_id):
+    """
+    Agenda a geração das versões para depois do commit da transação atual.
+
+    A foto fica com derivatives_pending até as versões serem gravadas; se o
+    processo for reiniciado antes disso, o comando generate_photo_derivatives
+    retoma as pendentes.
+    """
+    transaction.on_commit(lambda: _executor.submit(generate_photo_derivatives, photo_id))
+
+
+def backfill_derivatives(queryset=None, workers=None, chunk_size=32):
+    """
+    Gera as versões das fotos existentes em um pool de processos.
+
+    Os arquivos são lidos pelo storage no processo principal e enviados aos
+    workers em lotes de `chunk_size` fotos.
+
+    Sem `queryset`, processa as fotos sem miniatura ou com geração pendente.
+
+    Returns:
+        Tupla (fotos processadas, falhas)
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow não está disponível. Instale com: pip install Pillow")
+
+    if queryset is None:
+        queryset = WorkPhoto.objects.filter(Q(thumbnail='') | Q(derivatives_pending=True))
+
+    photos = [photo for photo in queryset.exclude(photo='').order_by('pk') if photo.photo]
+    processed = failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_django_worker) as executor:
+        for start in range(0, len(photos), chunk_size):
+            chunk = []
+            futures = []
+            for photo in photos[start:start + chunk_size]:
+                try:
+                    futures.append(executor.submit(render_derivatives, read_photo_bytes(photo.photo)))
+                    chunk.append(photo)
+                except OSError:
+                    logger.warning('Arquivo da foto %s não encontrado', photo.pk)
+                    failed += 1
+            for photo, future in zip(chunk, futures):
+                try:
+                    save_derivatives(photo, future.result())
+                    processed += 1
+                except Exception:
+                    logger.exception('Falha ao gerar as versões da foto %s', photo.pk)
+                    failed += 1
+
+    return processed, failed
+
+
+def backfill_exif(queryset=None, workers=8, update_dates=False, batch_size=500):
+    """
+    Lê em paralelo o EXIF das fotos armazenadas (apenas os bytes do cabeçalho).
+
+    A leitura é limitada por E/S, por isso usa um pool de threads. As
+    coordenadas (e, se `update_dates`, a data) são gravadas com bulk_update.
+
+    Returns:
+        Tupla (fotos lidas, fotos com GPS)
+    """
+    if queryset is None:
+        queryset = WorkPhoto.objects.all()
+
+    photos = [photo for photo in queryset.exclude(photo='').order_by('pk') if photo.photo]
+
+    def read(photo):
+        try:
+            with photo.photo.open('rb') as source:
+                return read_exif_header(source)
+        except OSError:
+            logger.warning('Arquivo da foto %s não encontrado', photo.pk)
+            return None
+
+    fields = ['exif_lat', 'exif_lng'] + (['taken_date'] if update_dates else [])
+    updated = []
+    with_gps = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for photo, metadata in zip(photos, executor.map(read, photos)):
+            if metadata is None:
+                continue
+            if metadata['lat'] is not None:
+                photo.exif_lat = Decimal(str(metadata['lat']))
+                photo.exif_lng = Decimal(str(metadata['lng']))
+                with_gps += 1
+            if update_dates and metadata['taken_date']:
+                photo.taken_date = metadata['taken_date']
+            updated.append(photo)
+
+    WorkPhoto.objects.bulk_update(updated, fields, batch_size=batch_size)
+    return len(updated), with_gps
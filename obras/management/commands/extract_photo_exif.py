@@ -0,0 +1,38 @@
+"""
+Comando para extrair data e GPS do EXIF das fotos já armazenadas
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from obras.imaging import PILLOW_AVAILABLE, backfill_exif
+from obras.services import refresh_photo_location_checks
+from obras.geo import NUMPY_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = 'Lê em paralelo o EXIF das fotos das obras e marca as fotos tiradas longe da obra'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Threads de leitura (padrão: 8)'
+        )
+        parser.add_argument(
+            '--update-dates',
+            action='store_true',
+            help='Substitui a data informada pela data do EXIF, quando existir'
+        )
+
+    def handle(self, *args, **options):
+        if not PILLOW_AVAILABLE or not NUMPY_AVAILABLE:
+            raise CommandError('Pillow e NumPy são necessários. Instale com: pip install Pillow numpy')
+        
+        processed, with_gps = backfill_exif(workers=options['workers'], update_dates=options['update_dates'])
+        mismatches = refresh_photo_location_checks()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{processed} fotos lidas; {with_gps} com GPS; {mismatches} distantes da obra.'
+            )
+        )
@@ -0,0 +1,62 @@
+"""
+Comando para calcular o hash perceptual das fotos e marcar as quase-duplicatas
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from obras.dedupe import backfill_perceptual_hashes, flag_duplicates, dedupe_storage
+from obras.imaging import PILLOW_AVAILABLE
+from obras.models import WorkPhoto
+
+
+class Command(BaseCommand):
+    help = (
+        'Calcula em paralelo o hash perceptual (dHash) das fotos das obras, marca as '
+        'quase-duplicatas e, opcionalmente, deduplica os arquivos idênticos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processos usados no cálculo dos hashes (padrão: número de CPUs)'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcula o hash de todas as fotos, não apenas das que ainda não possuem'
+        )
+        parser.add_argument(
+            '--dedupe-storage',
+            action='store_true',
+            help='Faz as duplicatas idênticas apontarem para os arquivos da original e remove as cópias'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Com --dedupe-storage, apenas informa o que seria removido'
+        )
+
+    def handle(self, *args, **options):
+        if not PILLOW_AVAILABLE:
+            raise CommandError('Pillow não está disponível. Instale com: pip install Pillow')
+        
+        queryset = WorkPhoto.objects.all() if options['all'] else None
+        
+        processed, failed = backfill_perceptual_hashes(queryset, workers=options['workers'])
+        duplicates = flag_duplicates()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{processed} hashes calculados; {failed} falhas; {duplicates} fotos marcadas como duplicatas.'
+            )
+        )
+        
+        if options['dedupe_storage']:
+            deduplicated, freed = dedupe_storage(dry_run=options['dry_run'])
+            suffix = ' (dry-run)' if options['dry_run'] else ''
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{deduplicated} duplicatas idênticas; {freed / (1024 * 1024):.1f} MB liberados{suffix}.'
+                )
+            )
@@ -0,0 +1,35 @@
+"""
+Comando para gerar as versões otimizadas (miniatura, média e WebP) das fotos existentes
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from obras.imaging import PILLOW_AVAILABLE, backfill_derivatives
+from obras.models import WorkPhoto
+
+
+class Command(BaseCommand):
+    help = 'Gera em paralelo as versões otimizadas das fotos das obras que ainda não as possuem ou estão pendentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenera as versões de todas as fotos'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processos usados no redimensionamento (padrão: número de CPUs)'
+        )
+
+    def handle(self, *args, **options):
+        if not PILLOW_AVAILABLE:
+            raise CommandError('Pillow não disponível. Instale com: pip install Pillow')
+        
+        queryset = WorkPhoto.objects.all() if options['all'] else None
+        processed, failed = backfill_derivatives(queryset, workers=options['workers'])
+        
+        self.stdout.write(self.style.SUCCESS(f'{processed} fotos processadas.'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} fotos com falha (ver log).'))
@@ -0,0 +1,23 @@
+"""
+Comando para expirar sessões de upload em partes abandonadas
+"""
+from django.core.management.base import BaseCommand
+
+from obras.uploads import purge_expired_sessions, SESSION_EXPIRES_HOURS
+
+
+class Command(BaseCommand):
+    help = 'Expira as sessões de upload pendentes sem atividade e remove as partes do disco'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=SESSION_EXPIRES_HOURS,
+            help=f'Horas sem atividade para expirar (padrão: {SESSION_EXPIRES_HOURS})'
+        )
+
+    def handle(self, *args, **options):
+        expired = purge_expired_sessions(hours=options['hours'])
+        
+        self.stdout.write(self.style.SUCCESS(f'{expired} sessões de upload expiradas.'))
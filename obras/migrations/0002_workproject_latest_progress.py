@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:12
+
+from django.db import migrations, models
+
+
+# Último progresso de cada obra (DISTINCT ON pelo mês mais recente)
+BACKFILL_LATEST_PROGRESS_SQL = """
+    UPDATE obras_workproject AS wp
+    SET
+        last_physical_pct = latest.physical_pct,
+        last_financial_pct = latest.financial_pct,
+        last_progress_month = latest.ref_month
+    FROM (
+        SELECT DISTINCT ON (project_id) project_id, physical_pct, financial_pct, ref_month
+        FROM obras_workprogress
+        ORDER BY project_id, ref_month DESC
+    ) AS latest
+    WHERE wp.id = latest.project_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workproject',
+            name='last_financial_pct',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='Último Progresso Financeiro (%)'),
+        ),
+        migrations.AddField(
+            model_name='workproject',
+            name='last_physical_pct',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='Último Progresso Físico (%)'),
+        ),
+        migrations.AddField(
+            model_name='workproject',
+            name='last_progress_month',
+            field=models.DateField(blank=True, null=True, verbose_name='Mês do Último Progresso'),
+        ),
+        migrations.RunSQL(BACKFILL_LATEST_PROGRESS_SQL, migrations.RunSQL.noop),
+    ]
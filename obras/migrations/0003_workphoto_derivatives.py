@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0002_workproject_latest_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workphoto',
+            name='medium',
+            field=models.ImageField(blank=True, upload_to='work_photos/derivatives/', verbose_name='Versão Média'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='work_photos/derivatives/', verbose_name='Miniatura'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='webp',
+            field=models.ImageField(blank=True, upload_to='work_photos/derivatives/', verbose_name='Versão WebP'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:15
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0003_workphoto_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='Identificador')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nome do Arquivo')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='Tamanho Total (bytes)')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Tamanho da Parte (bytes)')),
+                ('total_chunks', models.PositiveIntegerField(verbose_name='Quantidade de Partes')),
+                ('title', models.CharField(max_length=200, verbose_name='Título')),
+                ('description', models.TextField(blank=True, verbose_name='Descrição')),
+                ('taken_date', models.DateField(blank=True, null=True, verbose_name='Data da Foto')),
+                ('location', models.CharField(blank=True, max_length=200, verbose_name='Localização')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('CONCLUIDA', 'Concluída'), ('EXPIRADA', 'Expirada')], default='PENDENTE', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('photo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='obras.workphoto', verbose_name='Foto')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='obras.workproject', verbose_name='Projeto')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Sessão de Upload',
+                'verbose_name_plural': 'Sessões de Upload',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='obras_uploa_status_798cae_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0004_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workphoto',
+            name='distance_from_project_m',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distância da Obra (m)'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='exif_lat',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude (EXIF)'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='exif_lng',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude (EXIF)'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='location_mismatch',
+            field=models.BooleanField(default=False, verbose_name='Foto Distante da Obra'),
+        ),
+    ]
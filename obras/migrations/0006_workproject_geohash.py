@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:18
+
+from django.db import migrations, models
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Cópia do codificador de obras.geo no momento da migração"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    WorkProject = apps.get_model('obras', 'WorkProject')
+    projects = list(
+        WorkProject.objects.filter(location_lat__isnull=False, location_lng__isnull=False).only(
+            'pk', 'location_lat', 'location_lng'
+        )
+    )
+    for project in projects:
+        project.geohash = encode_geohash(float(project.location_lat), float(project.location_lng))
+    WorkProject.objects.bulk_update(projects, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licitacao', '0006_contract_setor_responsavel_expiring'),
+        ('obras', '0005_workphoto_exif'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workproject',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, verbose_name='Geohash'),
+        ),
+        migrations.AddIndex(
+            model_name='workproject',
+            index=models.Index(fields=['geohash'], name='workproject_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='workproject',
+            index=models.Index(fields=['status', 'geohash'], name='workproject_status_geo_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0006_workproject_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workphoto',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='obras.workphoto', verbose_name='Duplicata de'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='phash',
+            field=models.CharField(blank=True, max_length=16, verbose_name='Hash Perceptual'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='phash_band0',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Faixa 1 do Hash'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='phash_band1',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Faixa 2 do Hash'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='phash_band2',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Faixa 3 do Hash'),
+        ),
+        migrations.AddField(
+            model_name='workphoto',
+            name='phash_band3',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Faixa 4 do Hash'),
+        ),
+        migrations.AddIndex(
+            model_name='workphoto',
+            index=models.Index(fields=['phash_band0'], name='workphoto_phash_band0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workphoto',
+            index=models.Index(fields=['phash_band1'], name='workphoto_phash_band1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workphoto',
+            index=models.Index(fields=['phash_band2'], name='workphoto_phash_band2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workphoto',
+            index=models.Index(fields=['phash_band3'], name='workphoto_phash_band3_idx'),
+        ),
+    ]
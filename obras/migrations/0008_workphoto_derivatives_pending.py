@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0007_workphoto_phash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workphoto',
+            name='derivatives_pending',
+            field=models.BooleanField(default=False, verbose_name='Versões Pendentes'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0008_workphoto_derivatives_pending'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando'), ('CONCLUIDA', 'Concluída'), ('EXPIRADA', 'Expirada')], default='PENDENTE', max_length=20, verbose_name='Status'),
+        ),
+    ]
@@ -1,7 +1,12 @@
+import uuid
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
+from users.models import User
+from .geo import haversine_distance_m, encode_geohash, LOCATION_MISMATCH_DISTANCE_M
+
 
 class WorkProject(models.Model):
     """Modelo para obras/projetos"""
@@ -14,6 +19,10 @@ class WorkProject(models.Model):
         CONCLUIDA = 'CONCLUIDA', 'Concluída'
         CANCELADA = 'CANCELADA', 'Cancelada'
     
+    # Campos desnormalizados do último progresso (atualizados só pelos sinais;
+    # somente leitura na API e no admin)
+    PROGRESS_FIELDS = ('last_physical_pct', 'last_financial_pct', 'last_progress_month')
+    
     name = models.CharField(max_length=200, verbose_name='Nome da Obra')
     contract = models.ForeignKey(
         'licitacao.Contract',
@@ -37,6 +46,8 @@ class WorkProject(models.Model):
         blank=True,
         verbose_name='Longitude'
     )
+    # Célula geohash das coordenadas (calculada no save) para consultas espaciais
+    geohash = models.CharField(max_length=12, blank=True, editable=False, verbose_name='Geohash')
     address = models.TextField(verbose_name='Endereço')
     budget = models.DecimalField(
         max_digits=15, 
@@ -56,6 +67,25 @@ class WorkProject(models.Model):
     description = models.TextField(verbose_name='Descrição da Obra')
     responsible = models.CharField(max_length=200, verbose_name='Responsável')
     
+    # Último progresso registrado (mantido por obras.signals)
+    last_physical_pct = models.DecimalField(
+        max_digits=5, 
+        decimal_places=2, 
+        default=0,
+        verbose_name='Último Progresso Físico (%)'
+    )
+    last_financial_pct = models.DecimalField(
+        max_digits=5, 
+        decimal_places=2, 
+        default=0,
+        verbose_name='Último Progresso Financeiro (%)'
+    )
+    last_progress_month = models.DateField(
+        null=True, 
+        blank=True, 
+        verbose_name='Mês do Último Progresso'
+    )
+    
     # Campos de auditoria
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
@@ -64,21 +94,42 @@ class WorkProject(models.Model):
         verbose_name = 'Obra/Projeto'
         verbose_name_plural = 'Obras/Projetos'
         ordering = ['-created_at']
+        indexes = [
+            # Buscas por prefixo (LIKE 'abc%') precisam da classe de operadores *_pattern_ops
+            models.Index(
+                fields=['geohash'],
+                opclasses=['varchar_pattern_ops'],
+                name='workproject_geohash_idx'
+            ),
+            models.Index(
+                fields=['status', 'geohash'],
+                opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'],
+                name='workproject_status_geo_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.get_status_display()}"
     
+    def save(self, *args, **kwargs):
+        if self.location_lat is not None and self.location_lng is not None:
+            self.geohash = encode_geohash(float(self.location_lat), float(self.location_lng))
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'location_lat', 'location_lng'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+    
     @property
     def progress_physical(self):
         """Retorna o progresso físico mais recente"""
-        latest_progress = self.progress_set.order_by('-ref_month').first()
-        return latest_progress.physical_pct if latest_progress else 0
+        return self.last_physical_pct
     
     @property
     def progress_financial(self):
         """Retorna o progresso financeiro mais recente"""
-        latest_progress = self.progress_set.order_by('-ref_month').first()
-        return latest_progress.financial_pct if latest_progress else 0
+        return self.last_financial_pct
 
 
 class WorkProgress(models.Model):
@@ -137,6 +188,68 @@ class WorkPhoto(models.Model):
     taken_date = models.DateField(verbose_name='Data da Foto')
     location = models.CharField(max_length=200, blank=True, verbose_name='Localização')
     
+    # Metadados EXIF (preenchidos no upload ou pelo comando extract_photo_exif)
+    exif_lat = models.DecimalField(
+        max_digits=9, 
+        decimal_places=6, 
+        null=True, 
+        blank=True,
+        verbose_name='Latitude (EXIF)'
+    )
+    exif_lng = models.DecimalField(
+        max_digits=9, 
+        decimal_places=6, 
+        null=True, 
+        blank=True,
+        verbose_name='Longitude (EXIF)'
+    )
+    distance_from_project_m = models.FloatField(
+        null=True, 
+        blank=True, 
+        verbose_name='Distância da Obra (m)'
+    )
+    location_mismatch = models.BooleanField(
+        default=False, 
+        verbose_name='Foto Distante da Obra'
+    )
+    
+    # Versões otimizadas (geradas em segundo plano por obras.imaging)
+    thumbnail = models.ImageField(
+        upload_to='work_photos/derivatives/',
+        blank=True,
+        verbose_name='Miniatura'
+    )
+    medium = models.ImageField(
+        upload_to='work_photos/derivatives/',
+        blank=True,
+        verbose_name='Versão Média'
+    )
+    webp = models.ImageField(
+        upload_to='work_photos/derivatives/',
+        blank=True,
+        verbose_name='Versão WebP'
+    )
+    derivatives_pending = models.BooleanField(
+        default=False,
+        verbose_name='Versões Pendentes'
+    )
+    
+    # Hash perceptual (dHash de 64 bits) e suas 4 faixas de 16 bits, indexadas
+    # para a busca de quase-duplicatas (preenchidos por obras.dedupe)
+    phash = models.CharField(max_length=16, blank=True, verbose_name='Hash Perceptual')
+    phash_band0 = models.PositiveIntegerField(null=True, blank=True, verbose_name='Faixa 1 do Hash')
+    phash_band1 = models.PositiveIntegerField(null=True, blank=True, verbose_name='Faixa 2 do Hash')
+    phash_band2 = models.PositiveIntegerField(null=True, blank=True, verbose_name='Faixa 3 do Hash')
+    phash_band3 = models.PositiveIntegerField(null=True, blank=True, verbose_name='Faixa 4 do Hash')
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        verbose_name='Duplicata de'
+    )
+    
     # Campos de auditoria
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
@@ -145,6 +258,102 @@ class WorkPhoto(models.Model):
         verbose_name = 'Foto da Obra'
         verbose_name_plural = 'Fotos da Obra'
         ordering = ['project', '-taken_date']
+        indexes = [
+            models.Index(fields=['phash_band0'], name='workphoto_phash_band0_idx'),
+            models.Index(fields=['phash_band1'], name='workphoto_phash_band1_idx'),
+            models.Index(fields=['phash_band2'], name='workphoto_phash_band2_idx'),
+            models.Index(fields=['phash_band3'], name='workphoto_phash_band3_idx'),
+        ]
     
     def __str__(self):
         return f"Foto: {self.title} - {self.project.name}"
+    
+    def save(self, *args, **kwargs):
+        self.refresh_location_check()
+        super().save(*args, **kwargs)
+    
+    def apply_exif(self, metadata):
+        """Aplica os metadados EXIF lidos (data só é usada se não informada)"""
+        if metadata.get('lat') is not None:
+            self.exif_lat = Decimal(str(metadata['lat']))
+            self.exif_lng = Decimal(str(metadata['lng']))
+        if not self.taken_date and metadata.get('taken_date'):
+            self.taken_date = metadata['taken_date']
+    
+    def refresh_location_check(self):
+        """Calcula a distância entre o GPS da foto e a localização da obra"""
+        project = self.project
+        if self.exif_lat is None or project.location_lat is None or project.location_lng is None:
+            self.distance_from_project_m = None
+            self.location_mismatch = False
+            return
+        
+        self.distance_from_project_m = round(haversine_distance_m(
+            float(self.exif_lat), float(self.exif_lng),
+            float(project.location_lat), float(project.location_lng)
+        ), 1)
+        self.location_mismatch = self.distance_from_project_m > LOCATION_MISMATCH_DISTANCE_M
+
+
+class UploadSession(models.Model):
+    """Sessão de upload em partes (retomável) de fotos das obras"""
+    
+    class StatusChoices(models.TextChoices):
+        PENDENTE = 'PENDENTE', 'Pendente'
+        PROCESSANDO = 'PROCESSANDO', 'Processando'
+        CONCLUIDA = 'CONCLUIDA', 'Concluída'
+        EXPIRADA = 'EXPIRADA', 'Expirada'
+    
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name='Identificador')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Usuário'
+    )
+    project = models.ForeignKey(
+        WorkProject,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Projeto'
+    )
+    filename = models.CharField(max_length=255, verbose_name='Nome do Arquivo')
+    total_size = models.PositiveBigIntegerField(verbose_name='Tamanho Total (bytes)')
+    chunk_size = models.PositiveIntegerField(verbose_name='Tamanho da Parte (bytes)')
+    total_chunks = models.PositiveIntegerField(verbose_name='Quantidade de Partes')
+    
+    # Dados da foto criada ao concluir
+    title = models.CharField(max_length=200, verbose_name='Título')
+    description = models.TextField(blank=True, verbose_name='Descrição')
+    taken_date = models.DateField(null=True, blank=True, verbose_name='Data da Foto')
+    location = models.CharField(max_length=200, blank=True, verbose_name='Localização')
+    
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDENTE,
+        verbose_name='Status'
+    )
+    photo = models.ForeignKey(
+        WorkPhoto,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions',
+        verbose_name='Foto'
+    )
+    
+    # Campos de auditoria
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    
+    class Meta:
+        verbose_name = 'Sessão de Upload'
+        verbose_name_plural = 'Sessões de Upload'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"Upload {self.upload_id} - {self.filename}"
@@ -0,0 +1,189 @@
+"""
+Curva S das obras: avanço físico previsto x realizado, índice de desempenho
+de prazo (SPI) e projeção de conclusão por tendência (mínimos quadrados)
+
+Todas as obras são calculadas em uma única passada vetorizada com NumPy, a
+partir de duas consultas (obras e progressos).
+"""
+from django.utils import timezone
+
+from .models import WorkProgress
+
+# Import condicional do NumPy para não quebrar o sistema
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Quantidade de medições mais recentes usadas na tendência
+TREND_WINDOW = 6
+DAYS_PER_MONTH = 30.4375
+# Projeções além deste prazo após o término previsto são descartadas (tendência
+# próxima de zero), o que também as mantém dentro do intervalo de datetime.date
+MAX_PROJECTION_DAYS = 100 * 365
+
+
+def _days(dates):
+    """Datas -> dias desde 1970-01-01 (int64)"""
+    return np.array(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def _date(days):
+    return np.datetime64(int(days), 'D').item()
+
+
+def planned_curve(elapsed, duration):
+    """
+    Avanço físico previsto (%) no formato de S (smoothstep 3t² - 2t³).
+
+    `elapsed` e `duration` em dias, escalares ou arrays.
+    """
+    t = np.clip(np.asarray(elapsed, dtype=np.float64) / np.maximum(duration, 1), 0.0, 1.0)
+    return 100.0 * t * t * (3.0 - 2.0 * t)
+
+
+def _round(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _curve(start, end, today, progress):
+    """Pontos mensais da curva S (previsto x realizado) de uma obra"""
+    last = max([end, today] + [month for month, _ in progress])
+    months = np.arange(
+        np.datetime64(start, 'M'), np.datetime64(last, 'M') + 1
+    ).astype('datetime64[D]')
+    planned = planned_curve(months.astype(np.int64) - _days([start])[0], (end - start).days)
+    actual = dict(progress)
+    return [
+        {
+            'month': month,
+            'planned_pct': round(float(planned_pct), 2),
+            'actual_pct': actual.get(month),
+        }
+        for month, planned_pct in zip((m.item() for m in months), planned)
+    ]
+
+
+def schedule_analysis(projects, today=None, window=TREND_WINDOW, include_curves=False):
+    """
+    Indicadores de prazo das obras informadas.
+
+    Para cada obra: avanço previsto na data da última medição e hoje, variação
+    de prazo (realizado - previsto), SPI (realizado / previsto), tendência
+    (% por mês) ajustada por mínimos quadrados nas `window` medições mais
+    recentes e a data de conclusão projetada por essa tendência.
+
+    Args:
+        projects: QuerySet de WorkProject
+        include_curves: inclui os pontos mensais da curva S de cada obra
+
+    Returns:
+        Lista de dicionários, um por obra
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy não está disponível. Instale com: pip install numpy")
+
+    today = today or timezone.localdate()
+    rows = list(projects.order_by('pk').values_list(
+        'pk', 'name', 'status', 'start_date', 'expected_end_date', 'actual_end_date'
+    ))
+    if not rows:
+        return []
+
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    start = _days([row[3] for row in rows])
+    end = _days([row[4] for row in rows])
+    duration = end - start
+    today_day = _days([today])[0]
+
+    progress = list(
+        WorkProgress.objects.filter(project__in=projects).order_by('project_id', 'ref_month').values_list(
+            'project_id', 'ref_month', 'physical_pct'
+        )
+    )
+    index = np.searchsorted(ids, np.array([row[0] for row in progress], dtype=np.int64))
+    day = _days([row[1] for row in progress])
+    pct = np.array([float(row[2]) for row in progress], dtype=np.float64)
+
+    # Última medição de cada obra (progresso ordenado por obra e mês)
+    counts = np.bincount(index, minlength=len(ids))
+    has_progress = counts > 0
+    last_position = np.clip(np.cumsum(counts) - 1, 0, None)
+    if len(progress):
+        status_day = np.where(has_progress, day[last_position], today_day)
+        actual = np.where(has_progress, pct[last_position], 0.0)
+    else:
+        status_day = np.full(len(ids), today_day)
+        actual = np.zeros(len(ids))
+
+    planned = planned_curve(status_day - start, duration)
+    planned_today = planned_curve(today_day - start, duration)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spi = np.where(planned > 0, actual / planned, np.nan)
+
+    # Regressão linear (pct = a + b * dias) por obra, via somas agrupadas
+    from_end = (np.cumsum(counts) - 1)[index] - np.arange(len(progress))
+    weight = (from_end < window).astype(np.float64)
+    x = (day - start[index]).astype(np.float64)
+    n = np.bincount(index, weights=weight, minlength=len(ids))
+    sx = np.bincount(index, weights=weight * x, minlength=len(ids))
+    sy = np.bincount(index, weights=weight * pct, minlength=len(ids))
+    sxx = np.bincount(index, weights=weight * x * x, minlength=len(ids))
+    sxy = np.bincount(index, weights=weight * x * pct, minlength=len(ids))
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where((n >= 2) & (denominator > 0), (n * sxy - sx * sy) / denominator, np.nan)
+        days_to_finish = np.where(slope > 0, (100.0 - actual) / slope, np.nan)
+
+    finished = actual >= 100.0
+    projected = np.where(finished, status_day, status_day + np.ceil(days_to_finish))
+    projected = np.where(projected - end > MAX_PROJECTION_DAYS, np.nan, projected)
+    slippage = projected - end
+
+    curves = {}
+    if include_curves:
+        by_project = {}
+        for project_id, ref_month, physical_pct in progress:
+            by_project.setdefault(project_id, []).append((ref_month, float(physical_pct)))
+
+    results = []
+    for i, (pk, name, project_status, start_date, expected_end_date, actual_end_date) in enumerate(rows):
+        projected_end = actual_end_date if finished[i] and actual_end_date else (
+            None if np.isnan(projected[i]) else _date(projected[i])
+        )
+        item = {
+            'id': pk,
+            'name': name,
+            'status': project_status,
+            'start_date': start_date,
+            'expected_end_date': expected_end_date,
+            'last_progress_month': _date(status_day[i]) if has_progress[i] else None,
+            'actual_pct': round(float(actual[i]), 2),
+            'planned_pct': round(float(planned[i]), 2),
+            'planned_pct_today': round(float(planned_today[i]), 2),
+            'schedule_variance': round(float(actual[i] - planned[i]), 2),
+            'spi': _round(spi[i], 3),
+            'trend_pct_per_month': _round(slope[i] * DAYS_PER_MONTH),
+            'projected_end_date': projected_end,
+            'slippage_days': None if projected_end is None else (projected_end - expected_end_date).days,
+        }
+        if include_curves:
+            item['curve'] = _curve(start_date, expected_end_date, today, by_project.get(pk, []))
+        results.append(item)
+
+    return results
+
+
+def rank_by_slippage(results):
+    """
+    Ordena as obras da mais atrasada para a mais adiantada.
+
+    Obras sem projeção (menos de duas medições, sem avanço ou tendência lenta
+    demais) ficam ao final, ordenadas pela variação de prazo.
+    """
+    return sorted(results, key=lambda item: (
+        item['slippage_days'] is None,
+        -(item['slippage_days'] or 0),
+        item['schedule_variance'],
+    ))
@@ -1,5 +1,9 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import WorkProject, WorkProgress, WorkPhoto
+from .models import WorkProject, WorkProgress, WorkPhoto, UploadSession
+from .imaging import read_exif
+from .uploads import received_chunks
 from licitacao.serializers import ContractSerializer
 
 
@@ -8,7 +12,12 @@ class WorkPhotoSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = WorkPhoto
-        fields = ['id', 'title', 'description', 'photo', 'taken_date', 'location', 'created_at']
+        fields = [
+            'id', 'title', 'description', 'photo', 'thumbnail', 'medium', 'webp',
+            'derivatives_pending', 'taken_date', 'location', 'exif_lat', 'exif_lng',
+            'distance_from_project_m', 'location_mismatch', 'phash', 'duplicate_of', 'created_at'
+        ]
+        read_only_fields = ['derivatives_pending']
 
 
 class WorkProgressSerializer(serializers.ModelSerializer):
@@ -19,14 +28,37 @@ class WorkProgressSerializer(serializers.ModelSerializer):
         fields = ['id', 'ref_month', 'physical_pct', 'financial_pct', 'notes', 'created_at', 'updated_at']
 
 
+class WorkProjectListSerializer(serializers.ModelSerializer):
+    """Serializer resumido para listagem de obras/projetos (sem histórico)"""
+    
+    progress_physical = serializers.DecimalField(
+        source='last_physical_pct', max_digits=5, decimal_places=2, read_only=True
+    )
+    progress_financial = serializers.DecimalField(
+        source='last_financial_pct', max_digits=5, decimal_places=2, read_only=True
+    )
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = WorkProject
+        fields = [
+            'id', 'name', 'contract', 'location_lat', 'location_lng', 'address', 'budget',
+            'status', 'status_display', 'start_date', 'expected_end_date', 'actual_end_date',
+            'responsible', 'progress_physical', 'progress_financial', 'last_progress_month',
+            'created_at', 'updated_at'
+        ]
+
+
 class WorkProjectSerializer(serializers.ModelSerializer):
-    """Serializer para obras/projetos"""
+    """Serializer para obras/projetos (histórico nas ações progress e photos)"""
     
     contract_details = ContractSerializer(source='contract', read_only=True)
-    progress_set = WorkProgressSerializer(many=True, read_only=True)
-    photos = WorkPhotoSerializer(many=True, read_only=True)
-    progress_physical = serializers.ReadOnlyField()
-    progress_financial = serializers.ReadOnlyField()
+    progress_physical = serializers.DecimalField(
+        source='last_physical_pct', max_digits=5, decimal_places=2, read_only=True
+    )
+    progress_financial = serializers.DecimalField(
+        source='last_financial_pct', max_digits=5, decimal_places=2, read_only=True
+    )
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
@@ -34,8 +66,8 @@ class WorkProjectSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'contract', 'contract_details', 'location_lat', 'location_lng', 
             'address', 'budget', 'status', 'status_display', 'start_date', 'expected_end_date',
-            'actual_end_date', 'description', 'responsible', 'progress_set', 'photos',
-            'progress_physical', 'progress_financial', 'created_at', 'updated_at'
+            'actual_end_date', 'description', 'responsible', 'progress_physical',
+            'progress_financial', 'last_progress_month', 'created_at', 'updated_at'
         ]
 
 
@@ -48,6 +80,16 @@ class WorkProjectCreateUpdateSerializer(serializers.ModelSerializer):
             'name', 'contract', 'location_lat', 'location_lng', 'address', 'budget',
             'status', 'start_date', 'expected_end_date', 'actual_end_date', 'description', 'responsible'
         ]
+    
+    def update(self, instance, validated_data):
+        """
+        Grava apenas os campos enviados, para não sobrescrever o último progresso
+        (WorkProject.PROGRESS_FIELDS) atualizado pelos sinais desde a leitura
+        """
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 
 class WorkProgressCreateUpdateSerializer(serializers.ModelSerializer):
@@ -61,9 +103,66 @@ class WorkProgressCreateUpdateSerializer(serializers.ModelSerializer):
 class WorkPhotoCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer para criação e atualização de fotos"""
     
+    taken_date = serializers.DateField(required=False)
+    
     class Meta:
         model = WorkPhoto
         fields = ['project', 'title', 'description', 'photo', 'taken_date', 'location']
+    
+    def validate(self, attrs):
+        """Preenche data e GPS a partir do EXIF da foto enviada"""
+        photo = attrs.get('photo')
+        if photo is not None:
+            metadata = read_exif(photo)
+            photo.seek(0)
+            
+            has_gps = metadata['lat'] is not None
+            attrs['exif_lat'] = Decimal(str(metadata['lat'])) if has_gps else None
+            attrs['exif_lng'] = Decimal(str(metadata['lng'])) if has_gps else None
+            if not attrs.get('taken_date') and metadata['taken_date']:
+                attrs['taken_date'] = metadata['taken_date']
+        
+        if self.instance is None and not attrs.get('taken_date'):
+            raise serializers.ValidationError({
+                'taken_date': 'Informe a data da foto (não encontrada nos metadados EXIF).'
+            })
+        
+        return attrs
+
+
+class UploadSessionCreateSerializer(serializers.ModelSerializer):
+    """Serializer para iniciar um upload em partes"""
+    
+    chunk_size = serializers.IntegerField(required=False, min_value=1)
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'project', 'filename', 'total_size', 'chunk_size',
+            'title', 'description', 'taken_date', 'location'
+        ]
+
+
+class UploadSessionCompleteSerializer(serializers.Serializer):
+    """Dados opcionais informados ao concluir um upload em partes"""
+    
+    taken_date = serializers.DateField(required=False)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer para o estado de um upload em partes"""
+    
+    received_chunks = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'upload_id', 'project', 'filename', 'total_size', 'chunk_size', 'total_chunks',
+            'received_chunks', 'status', 'photo', 'created_at', 'updated_at'
+        ]
+    
+    def get_received_chunks(self, obj):
+        return received_chunks(obj)
 
 
 class ObrasDashboardSerializer(serializers.Serializer):
@@ -0,0 +1,655 @@
+"""
+Serviços para o módulo de obras
+"""
+import csv
+import json
+import math
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count, FloatField, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Floor
+
+from licitacao.models import Contract, ContractMilestone
+from .geo import (
+    haversine_m, geohash_cells, bbox_around, LOCATION_MISMATCH_DISTANCE_M, NUMPY_AVAILABLE
+)
+from .models import WorkProject, WorkProgress, WorkPhoto
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# Execução físico-financeira por contrato ativo em uma única consulta:
+# marcos agregados e último progresso de cada obra via LATERAL (usa o índice
+# único de (project_id, ref_month)). O progresso do contrato é a média dos
+# percentuais das obras ponderada pelo orçamento.
+EXECUTION_REPORT_SQL = """
+    SELECT
+        c.id,
+        c.number,
+        c.supplier_name,
+        c.start_dt,
+        c.end_dt,
+        c.valor_total,
+        m.milestones_count,
+        m.milestones_value,
+        m.milestones_done_value,
+        p.projects,
+        p.physical_pct,
+        p.financial_pct,
+        ROUND(c.valor_total * COALESCE(p.financial_pct, 0) / 100, 2) AS executed_value,
+        ROUND(c.valor_total * COALESCE(p.physical_pct, 0) / 100, 2) AS physical_value,
+        ROUND(COALESCE(p.physical_pct, 0) - COALESCE(p.financial_pct, 0), 2) AS gap_pct
+    FROM licitacao_contract AS c
+    LEFT JOIN LATERAL (
+        SELECT
+            COUNT(*) AS milestones_count,
+            COALESCE(SUM(ms.valor), 0) AS milestones_value,
+            COALESCE(SUM(ms.valor) FILTER (WHERE ms.status = %(milestone_done)s), 0) AS milestones_done_value
+        FROM licitacao_contractmilestone AS ms
+        WHERE ms.contract_id = c.id
+    ) AS m ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT
+            json_agg(json_build_object(
+                'id', wp.id,
+                'name', wp.name,
+                'status', wp.status,
+                'budget', wp.budget,
+                'ref_month', lp.ref_month,
+                'physical_pct', lp.physical_pct,
+                'financial_pct', lp.financial_pct
+            ) ORDER BY wp.id) AS projects,
+            ROUND(SUM(wp.budget * COALESCE(lp.physical_pct, 0)) / NULLIF(SUM(wp.budget), 0), 2) AS physical_pct,
+            ROUND(SUM(wp.budget * COALESCE(lp.financial_pct, 0)) / NULLIF(SUM(wp.budget), 0), 2) AS financial_pct
+        FROM obras_workproject AS wp
+        LEFT JOIN LATERAL (
+            SELECT pr.ref_month, pr.physical_pct, pr.financial_pct
+            FROM obras_workprogress AS pr
+            WHERE pr.project_id = wp.id
+            ORDER BY pr.ref_month DESC
+            LIMIT 1
+        ) AS lp ON TRUE
+        WHERE wp.contract_id = c.id AND wp.status <> %(project_cancelled)s
+    ) AS p ON TRUE
+    WHERE c.status = %(contract_status)s
+    {extra_where}
+    ORDER BY c.end_dt, c.number
+"""
+
+
+def execution_report(contract_id=None):
+    """
+    Relatório de execução físico-financeira dos contratos ativos.
+
+    Para cada contrato retorna o valor contratado, os marcos (total e
+    concluídos), o último progresso de cada obra vinculada, o valor executado
+    (pelo percentual financeiro) e a diferença entre os avanços físico e
+    financeiro.
+
+    Returns:
+        Lista de dicionários, um por contrato
+    """
+    params = {
+        'milestone_done': ContractMilestone.StatusChoices.CONCLUIDO,
+        'project_cancelled': WorkProject.StatusChoices.CANCELADA,
+        'contract_status': Contract.StatusChoices.ATIVO,
+    }
+    extra_where = ''
+    if contract_id is not None:
+        extra_where = 'AND c.id = %(contract_id)s'
+        params['contract_id'] = contract_id
+
+    with connection.cursor() as cursor:
+        cursor.execute(EXECUTION_REPORT_SQL.format(extra_where=extra_where), params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    for row in rows:
+        row['projects'] = row['projects'] or []
+        row['gap_value'] = row['physical_value'] - row['executed_value']
+    return rows
+
+
+def refresh_latest_progress(projects=None):
+    """
+    Atualiza, em um único UPDATE, os campos do último progresso das obras.
+
+    Sem `projects`, recalcula todas as obras.
+
+    Returns:
+        Quantidade de obras atualizadas
+    """
+    if projects is None:
+        projects = WorkProject.objects.all()
+
+    latest = WorkProgress.objects.filter(project=OuterRef('pk')).order_by('-ref_month')
+
+    return projects.update(
+        last_physical_pct=Coalesce(Subquery(latest.values('physical_pct')[:1]), Decimal('0')),
+        last_financial_pct=Coalesce(Subquery(latest.values('financial_pct')[:1]), Decimal('0')),
+        last_progress_month=Subquery(latest.values('ref_month')[:1]),
+    )
+
+
+DASHBOARD_VERSION_KEY = 'obras:dashboard_version'
+DASHBOARD_CACHE_TIMEOUT = 15 * 60
+
+
+def _cache_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+def _bump_cache_version(key):
+    cache.set(key, time.time_ns(), None)
+
+
+def dashboard_cache_version():
+    """Versão atual dos indicadores de obras (alterada a cada mudança de obra ou progresso)"""
+    return _cache_version(DASHBOARD_VERSION_KEY)
+
+
+def bump_dashboard_cache_version():
+    """Invalida os dashboards de obras em cache"""
+    _bump_cache_version(DASHBOARD_VERSION_KEY)
+
+
+def latest_progress(projects=None):
+    """
+    Último progresso de cada obra.
+
+    O subconjunto é selecionado com DISTINCT ON (project) ordenado pelo mês de
+    referência mais recente, para que medições antigas não entrem nas médias.
+    """
+    latest = WorkProgress.objects.order_by('project_id', '-ref_month').distinct('project_id')
+    if projects is not None:
+        latest = latest.filter(project__in=projects)
+    return WorkProgress.objects.filter(pk__in=latest.values('pk'))
+
+
+def progress_averages(projects=None):
+    """
+    Médias de avanço físico e financeiro pelo último progresso de cada obra.
+
+    Sem `projects`, considera todas as obras e o resultado fica em cache até a
+    próxima alteração de obra ou progresso.
+
+    Returns:
+        Dicionário com 'avg_physical' e 'avg_financial'
+    """
+    cache_key = None
+    if projects is None:
+        cache_key = f'obras:progress_averages:{dashboard_cache_version()}'
+        averages = cache.get(cache_key)
+        if averages is not None:
+            return averages
+
+    averages = latest_progress(projects).aggregate(
+        avg_physical=Avg('physical_pct'),
+        avg_financial=Avg('financial_pct')
+    )
+    averages = {key: round(float(value or 0), 2) for key, value in averages.items()}
+
+    if cache_key:
+        cache.set(cache_key, averages, DASHBOARD_CACHE_TIMEOUT)
+    return averages
+
+
+def refresh_photo_location_checks(photos=None, batch_size=1000):
+    """
+    Recalcula a distância entre o GPS das fotos e a localização das obras.
+
+    Carrega as coordenadas em uma única consulta e calcula todas as
+    distâncias com um haversine vetorizado.
+
+    Returns:
+        Quantidade de fotos marcadas como distantes da obra
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy não está disponível. Instale com: pip install numpy")
+
+    if photos is None:
+        photos = WorkPhoto.objects.all()
+
+    rows = list(photos.values_list(
+        'pk', 'exif_lat', 'exif_lng', 'project__location_lat', 'project__location_lng'
+    ).order_by())
+    if not rows:
+        return 0
+
+    coords = np.array(
+        [[np.nan if value is None else float(value) for value in row[1:]] for row in rows],
+        dtype=np.float64
+    )
+    with np.errstate(invalid='ignore'):
+        distances = haversine_m(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
+    known = ~np.isnan(distances)
+    mismatch = known & (distances > LOCATION_MISMATCH_DISTANCE_M)
+
+    objs = [
+        WorkPhoto(
+            pk=row[0],
+            distance_from_project_m=round(float(distance), 1) if has_distance else None,
+            location_mismatch=bool(is_far),
+        )
+        for row, distance, has_distance, is_far in zip(rows, distances, known, mismatch)
+    ]
+    WorkPhoto.objects.bulk_update(objs, ['distance_from_project_m', 'location_mismatch'], batch_size=batch_size)
+    return int(mismatch.sum())
+
+
+def filter_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    """
+    Obras dentro do retângulo informado.
+
+    Os prefixos geohash que cobrem o retângulo selecionam os candidatos pelo
+    índice; o filtro exato por latitude/longitude é aplicado sobre eles.
+    """
+    cells = geohash_cells(min_lat, min_lng, max_lat, max_lng)
+    return queryset.filter(
+        reduce(or_, [Q(geohash__startswith=cell) for cell in cells]),
+        location_lat__gte=min_lat,
+        location_lat__lte=max_lat,
+        location_lng__gte=min_lng,
+        location_lng__lte=max_lng,
+    )
+
+
+def filter_radius(queryset, lat, lng, radius_m):
+    """
+    Obras a até `radius_m` metros do ponto informado.
+
+    Os candidatos vêm do retângulo envolvente (índice geohash) e a distância
+    exata é calculada de forma vetorizada sobre eles.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy não está disponível. Instale com: pip install numpy")
+
+    candidates = list(
+        filter_bbox(queryset, *bbox_around(lat, lng, radius_m)).values_list(
+            'pk', 'location_lat', 'location_lng'
+        ).order_by()
+    )
+    if not candidates:
+        return queryset.none()
+
+    ids = np.array([row[0] for row in candidates], dtype=np.int64)
+    coords = np.array([[float(row[1]), float(row[2])] for row in candidates], dtype=np.float64)
+    distances = haversine_m(coords[:, 0], coords[:, 1], lat, lng)
+    return queryset.filter(pk__in=ids[distances <= radius_m].tolist())
+
+
+def parse_bbox(value):
+    """
+    Converte bbox=min_lng,min_lat,max_lng,max_lat em (min_lat, min_lng, max_lat, max_lng).
+
+    Raises:
+        ValueError: bbox malformado, fora dos limites ou invertido
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError('Informe bbox=min_lng,min_lat,max_lng,max_lat.')
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+        raise ValueError('bbox inválido: coordenadas fora dos limites ou mínimos maiores que máximos.')
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def apply_spatial_filters(queryset, params):
+    """
+    Aplica os filtros espaciais da query string.
+
+    bbox=min_lng,min_lat,max_lng,max_lat
+    lat=..&lng=..&radius_km=.. (valores inválidos são ignorados)
+
+    Raises:
+        ValueError: bbox inválido (ver parse_bbox)
+    """
+    bbox = params.get('bbox')
+    if bbox:
+        queryset = filter_bbox(queryset, *parse_bbox(bbox))
+
+    radius_km = params.get('radius_km')
+    if radius_km and params.get('lat') and params.get('lng'):
+        try:
+            lat, lng, radius_km = float(params['lat']), float(params['lng']), float(radius_km)
+            if radius_km > 0:
+                queryset = filter_radius(queryset, lat, lng, radius_km * 1000)
+        except (ValueError, TypeError):
+            pass
+
+    return queryset
+
+
+# Agrupamento do mapa: em cada nível de zoom o mundo é dividido em 2^z x 2^z
+# tiles (em graus) e cada tile em CLUSTER_GRID x CLUSTER_GRID células.
+CLUSTER_GRID = 8
+MAX_CLUSTER_ZOOM = 20
+MAX_CLUSTER_TILES = 64
+CLUSTER_CACHE_TIMEOUT = 60 * 60
+MAP_VERSION_KEY = 'obras:map_version'
+
+
+def map_cache_version():
+    """Versão atual dos dados do mapa (alterada a cada mudança de obra)"""
+    return _cache_version(MAP_VERSION_KEY)
+
+
+def bump_map_cache_version():
+    """Invalida os clusters em cache de todos os tiles"""
+    _bump_cache_version(MAP_VERSION_KEY)
+
+
+def _tile_size(zoom):
+    return 180.0 / (1 << zoom), 360.0 / (1 << zoom)
+
+
+def _tile_range(min_lat, min_lng, max_lat, max_lng, zoom):
+    """Intervalo de tiles (ty0, tx0, ty1, tx1) que cobre o retângulo"""
+    tile_h, tile_w = _tile_size(zoom)
+    last = (1 << zoom) - 1
+
+    def clamp(value):
+        return min(max(value, 0), last)
+
+    return (
+        clamp(math.floor((min_lat + 90) / tile_h)),
+        clamp(math.floor((min_lng + 180) / tile_w)),
+        clamp(math.floor((max_lat + 90) / tile_h)),
+        clamp(math.floor((max_lng + 180) / tile_w)),
+    )
+
+
+def _compute_tiles(queryset, zoom, tile_range):
+    """
+    Clusters de todos os tiles do intervalo em uma única consulta agrupada.
+
+    As obras são agrupadas por célula da grade (FLOOR das coordenadas) com
+    contagem, orçamento total, posição média e contagem por status.
+    """
+    ty0, tx0, ty1, tx1 = tile_range
+    tile_h, tile_w = _tile_size(zoom)
+    cell_h, cell_w = tile_h / CLUSTER_GRID, tile_w / CLUSTER_GRID
+
+    queryset = filter_bbox(
+        queryset,
+        ty0 * tile_h - 90, tx0 * tile_w - 180,
+        (ty1 + 1) * tile_h - 90, (tx1 + 1) * tile_w - 180,
+    )
+    status_counts = {
+        status: Count('pk', filter=Q(status=status))
+        for status in WorkProject.StatusChoices.values
+    }
+    cells = queryset.order_by().annotate(
+        cell_y=Floor((Cast('location_lat', FloatField()) + 90.0) / cell_h),
+        cell_x=Floor((Cast('location_lng', FloatField()) + 180.0) / cell_w),
+    ).values('cell_y', 'cell_x').annotate(
+        count=Count('pk'),
+        total_budget=Sum('budget'),
+        lat=Avg('location_lat'),
+        lng=Avg('location_lng'),
+        project_id=Min('pk'),
+        **status_counts
+    )
+
+    tiles = {
+        (ty, tx): []
+        for ty in range(ty0, ty1 + 1)
+        for tx in range(tx0, tx1 + 1)
+    }
+    for cell in cells:
+        tile = (int(cell['cell_y']) // CLUSTER_GRID, int(cell['cell_x']) // CLUSTER_GRID)
+        if tile not in tiles:
+            # Pontos exatamente na borda norte/leste do mundo
+            continue
+        tiles[tile].append({
+            'lat': round(float(cell['lat']), 6),
+            'lng': round(float(cell['lng']), 6),
+            'count': cell['count'],
+            'total_budget': cell['total_budget'],
+            'status': {status: cell[status] for status in status_counts if cell[status]},
+            'project_id': cell['project_id'] if cell['count'] == 1 else None,
+        })
+    return tiles
+
+
+def map_clusters(queryset, scope, min_lat, min_lng, max_lat, max_lng, zoom):
+    """
+    Clusters das obras visíveis no retângulo, com cache por tile.
+
+    `scope` identifica o conjunto de obras visível ao usuário (perfil e
+    filtros) e faz parte da chave de cache. Apenas os tiles ainda não
+    calculados são consultados ao banco.
+
+    Returns:
+        Lista de clusters do retângulo
+    """
+    zoom = min(max(zoom, 0), MAX_CLUSTER_ZOOM)
+    ty0, tx0, ty1, tx1 = _tile_range(min_lat, min_lng, max_lat, max_lng, zoom)
+    if (ty1 - ty0 + 1) * (tx1 - tx0 + 1) > MAX_CLUSTER_TILES:
+        raise ValueError('Área muito grande para o nível de zoom informado.')
+
+    version = map_cache_version()
+    keys = {
+        (ty, tx): f'obras:clusters:{version}:{scope}:{zoom}:{ty}:{tx}'
+        for ty in range(ty0, ty1 + 1)
+        for tx in range(tx0, tx1 + 1)
+    }
+    cached = cache.get_many(keys.values())
+    tiles = {tile: cached[key] for tile, key in keys.items() if key in cached}
+
+    missing = [tile for tile in keys if tile not in tiles]
+    if missing:
+        missing_range = (
+            min(ty for ty, _ in missing), min(tx for _, tx in missing),
+            max(ty for ty, _ in missing), max(tx for _, tx in missing),
+        )
+        computed = _compute_tiles(queryset, zoom, missing_range)
+        cache.set_many(
+            {keys[tile]: clusters for tile, clusters in computed.items() if tile in keys},
+            CLUSTER_CACHE_TIMEOUT
+        )
+        tiles.update(computed)
+
+    return [cluster for tile in keys for cluster in tiles.get(tile, [])]
+
+
+GEOJSON_FIELDS = (
+    'id', 'name', 'status', 'budget', 'address', 'contract_id',
+    'last_physical_pct', 'last_financial_pct', 'last_progress_month',
+)
+
+
+def _geojson_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_geojson(queryset, chunk_size=2000):
+    """
+    FeatureCollection GeoJSON das obras com coordenadas, gerada em partes.
+
+    Lê as linhas com values().iterator() (cursor no servidor, sem instanciar
+    modelos nem serializers), mantendo a memória constante.
+    """
+    rows = queryset.filter(
+        location_lat__isnull=False,
+        location_lng__isnull=False
+    ).order_by('pk').values('location_lat', 'location_lng', *GEOJSON_FIELDS).iterator(chunk_size=chunk_size)
+
+    yield '{"type":"FeatureCollection","features":['
+    separator = ''
+    for row in rows:
+        feature = {
+            'type': 'Feature',
+            'id': row['id'],
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [float(row['location_lng']), float(row['location_lat'])],
+            },
+            'properties': {field: _geojson_value(row[field]) for field in GEOJSON_FIELDS},
+        }
+        yield separator + json.dumps(feature, ensure_ascii=False, separators=(',', ':'))
+        separator = ','
+    yield ']}'
+
+
+PROGRESS_IMPORT_FIELDS = ['project', 'ref_month', 'physical_pct', 'financial_pct', 'notes']
+PROGRESS_IMPORT_REQUIRED_FIELDS = ['project', 'ref_month', 'physical_pct', 'financial_pct']
+
+
+def read_progress_csv(file):
+    """Lê o CSV de progresso mensal retornando uma lista de dicionários"""
+    reader = csv.DictReader(file)
+    return [
+        {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        for row in reader
+    ]
+
+
+def _parse_month(value):
+    """Aceita YYYY-MM (primeiro dia do mês) ou YYYY-MM-DD"""
+    value = str(value).strip()
+    if len(value) == 7:
+        value = f'{value}-01'
+    return date.fromisoformat(value)
+
+
+def _parse_pct(value):
+    pct = Decimal(str(value).strip().replace(',', '.')).quantize(Decimal('0.01'))
+    if not Decimal('0') <= pct <= Decimal('100'):
+        raise InvalidOperation
+    return pct
+
+
+def validate_progress_rows(rows, projects=None, start=2):
+    """
+    Valida as linhas de progresso mensal (envio em lote ou CSV).
+
+    A existência das obras e os pares (project, ref_month) já cadastrados
+    (unique_together) são verificados com uma consulta cada, em vez de uma por
+    linha. Linhas já cadastradas são marcadas para atualização.
+
+    Args:
+        rows: Lista de dicionários com project, ref_month, physical_pct,
+            financial_pct e notes (opcional)
+        projects: QuerySet das obras permitidas (padrão: todas)
+        start: número da primeira linha nos erros (2 no CSV, após o
+            cabeçalho; 0 para a posição do item em envios JSON)
+
+    Returns:
+        Tupla (linhas válidas, lista de erros {'line', 'error'})
+    """
+    errors = []
+    valid = []
+    seen = set()
+
+    for line, row in enumerate(rows, start=start):
+        missing = [field for field in PROGRESS_IMPORT_REQUIRED_FIELDS if row.get(field) in (None, '')]
+        if missing:
+            errors.append({'line': line, 'error': f"Campos obrigatórios ausentes: {', '.join(missing)}"})
+            continue
+
+        try:
+            project_id = int(row['project'])
+        except (TypeError, ValueError):
+            errors.append({'line': line, 'error': f"Obra inválida: {row['project']}"})
+            continue
+        try:
+            ref_month = _parse_month(row['ref_month'])
+        except ValueError:
+            errors.append({'line': line, 'error': 'Mês de referência inválido (use YYYY-MM ou YYYY-MM-DD)'})
+            continue
+        try:
+            physical_pct = _parse_pct(row['physical_pct'])
+            financial_pct = _parse_pct(row['financial_pct'])
+        except (InvalidOperation, ValueError):
+            errors.append({'line': line, 'error': 'Percentuais devem estar entre 0 e 100'})
+            continue
+
+        key = (project_id, ref_month)
+        if key in seen:
+            errors.append({'line': line, 'error': f'Obra {project_id} repetida para o mês {ref_month:%m/%Y}'})
+            continue
+        seen.add(key)
+
+        valid.append({
+            '_line': line,
+            'project': project_id,
+            'ref_month': ref_month,
+            'physical_pct': physical_pct,
+            'financial_pct': financial_pct,
+            'notes': str(row.get('notes') or ''),
+        })
+
+    if projects is None:
+        projects = WorkProject.objects.all()
+    project_ids = {row['project'] for row in valid}
+    existing_projects = set(projects.filter(pk__in=project_ids).values_list('pk', flat=True))
+    existing_pairs = set(
+        WorkProgress.objects.filter(
+            project_id__in=existing_projects,
+            ref_month__in={row['ref_month'] for row in valid}
+        ).values_list('project_id', 'ref_month')
+    )
+
+    accepted = []
+    for row in valid:
+        if row['project'] not in existing_projects:
+            errors.append({'line': row['_line'], 'error': f"Obra não encontrada: {row['project']}"})
+            continue
+        row['_exists'] = (row['project'], row['ref_month']) in existing_pairs
+        accepted.append(row)
+
+    errors.sort(key=lambda item: item['line'])
+    return accepted, errors
+
+
+def bulk_upsert_progress(rows, batch_size=None):
+    """
+    Grava as linhas de progresso já validadas em um único INSERT ... ON CONFLICT.
+
+    bulk_create não dispara os sinais de WorkProgress: o último progresso das
+    obras e o cache dos dashboards são atualizados aqui.
+
+    Returns:
+        Lista de WorkProgress gravados (com pk)
+    """
+    objs = [
+        WorkProgress(
+            project_id=row['project'],
+            ref_month=row['ref_month'],
+            physical_pct=row['physical_pct'],
+            financial_pct=row['financial_pct'],
+            notes=row['notes'],
+        )
+        for row in rows
+    ]
+    if not objs:
+        return []
+
+    with transaction.atomic():
+        saved = WorkProgress.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['project', 'ref_month'],
+            update_fields=['physical_pct', 'financial_pct', 'notes', 'updated_at'],
+        )
+        refresh_latest_progress(WorkProject.objects.filter(pk__in={row['project'] for row in rows}))
+        # Dentro de uma transação externa, invalida só após o commit
+        transaction.on_commit(bump_dashboard_cache_version)
+
+    return saved
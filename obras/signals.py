@@ -0,0 +1,98 @@
+"""
+Sinais do módulo de obras: mantêm o último progresso desnormalizado em WorkProject,
+agendam a geração das versões otimizadas das fotos, removem os arquivos das
+fotos excluídas e invalidam os clusters do mapa e os dashboards em cache
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .dedupe import schedule_perceptual_hash
+from .imaging import DERIVATIVES, delete_photo_files, schedule_derivatives
+from .models import WorkProject, WorkProgress, WorkPhoto
+from .services import (
+    bump_dashboard_cache_version, bump_map_cache_version,
+    refresh_latest_progress, refresh_photo_location_checks
+)
+
+
+@receiver(pre_save, sender=WorkProgress)
+def remember_previous_project(sender, instance, **kwargs):
+    """Guarda a obra anterior caso o progresso seja movido para outra obra"""
+    instance._previous_project_id = None
+    if instance.pk:
+        instance._previous_project_id = sender.objects.filter(pk=instance.pk).values_list(
+            'project_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=WorkProgress)
+@receiver(post_delete, sender=WorkProgress)
+def refresh_project_progress(sender, instance, **kwargs):
+    """Recalcula o último progresso da obra (e da anterior, se mudou)"""
+    project_ids = {instance.project_id, getattr(instance, '_previous_project_id', None)} - {None}
+    refresh_latest_progress(WorkProject.objects.filter(pk__in=project_ids))
+    transaction.on_commit(bump_dashboard_cache_version)
+
+
+@receiver(pre_save, sender=WorkPhoto)
+def remember_previous_photo(sender, instance, **kwargs):
+    """Guarda a foto anterior e marca as versões como pendentes quando a foto muda"""
+    instance._previous_photo = None
+    if instance.pk:
+        instance._previous_photo = sender.objects.filter(pk=instance.pk).values_list(
+            'photo', flat=True
+        ).first()
+    if instance.photo and instance.photo.name != instance._previous_photo:
+        instance.derivatives_pending = True
+
+
+@receiver(post_save, sender=WorkPhoto)
+def generate_derivatives_on_upload(sender, instance, created, **kwargs):
+    """
+    Gera as versões otimizadas e o hash perceptual quando a foto é enviada ou
+    substituída, e remove o arquivo original substituído
+    """
+    previous = getattr(instance, '_previous_photo', None)
+    if instance.photo and (created or instance.photo.name != previous):
+        schedule_derivatives(instance.pk)
+        schedule_perceptual_hash(instance.pk)
+    
+    # Foto substituída: remove o original anterior se nenhuma outra foto o usa
+    if previous and previous != instance.photo.name:
+        transaction.on_commit(lambda: delete_photo_files({'photo': previous}))
+
+
+@receiver(post_delete, sender=WorkPhoto)
+def delete_files_on_photo_delete(sender, instance, **kwargs):
+    """Remove a foto e suas versões do storage após o commit da exclusão"""
+    names = {field: getattr(instance, field).name for field in ('photo', *DERIVATIVES)}
+    transaction.on_commit(lambda: delete_photo_files(names))
+
+
+@receiver(pre_save, sender=WorkProject)
+def remember_previous_location(sender, instance, **kwargs):
+    instance._previous_location = None
+    if instance.pk:
+        instance._previous_location = sender.objects.filter(pk=instance.pk).values_list(
+            'location_lat', 'location_lng'
+        ).first()
+
+
+@receiver(post_save, sender=WorkProject)
+def refresh_photo_checks_on_relocation(sender, instance, created, **kwargs):
+    """Recalcula a distância das fotos quando a localização da obra muda"""
+    previous = getattr(instance, '_previous_location', None)
+    if not created and previous != (instance.location_lat, instance.location_lng):
+        refresh_photo_location_checks(WorkPhoto.objects.filter(project=instance, exif_lat__isnull=False))
+
+
+@receiver(post_save, sender=WorkProject)
+@receiver(post_delete, sender=WorkProject)
+def invalidate_project_caches(sender, instance, **kwargs):
+    """
+    Nova versão do cache de clusters e dashboards a cada alteração de obra,
+    após o commit (antes dele, uma leitura gravaria os dados antigos na nova versão)
+    """
+    transaction.on_commit(bump_map_cache_version)
+    transaction.on_commit(bump_dashboard_cache_version)
@@ -0,0 +1,316 @@
+"""
+Upload em partes (retomável) de fotos das obras
+
+As partes são gravadas diretamente em disco, sem passar pela memória, e
+concatenadas com os.sendfile (cópia feita pelo kernel) ao concluir.
+"""
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from .imaging import read_exif_header
+from .models import WorkPhoto, UploadSession
+
+# Import condicional do Pillow para não quebrar o sistema
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = 20 * 1024 * 1024
+MAX_UPLOAD_SIZE = getattr(settings, 'WORK_PHOTO_MAX_UPLOAD_SIZE', 200 * 1024 * 1024)
+SESSION_EXPIRES_HOURS = getattr(settings, 'UPLOAD_SESSION_EXPIRES_HOURS', 24)
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Erro de validação do upload em partes"""
+
+
+def chunks_root():
+    return getattr(settings, 'UPLOAD_CHUNKS_ROOT', os.path.join(settings.MEDIA_ROOT, 'upload_chunks'))
+
+
+def session_dir(session):
+    return os.path.join(chunks_root(), str(session.upload_id))
+
+
+def chunk_path(session, index):
+    return os.path.join(session_dir(session), f'{index:06d}.part')
+
+
+def expected_chunk_size(session, index):
+    """Tamanho esperado da parte (a última pode ser menor)"""
+    if index == session.total_chunks - 1:
+        return session.total_size - session.chunk_size * (session.total_chunks - 1)
+    return session.chunk_size
+
+
+def create_session(user, project, filename, total_size, chunk_size=None, **photo_data):
+    """
+    Inicia uma sessão de upload em partes.
+
+    Returns:
+        UploadSession criada
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    if total_size <= 0 or total_size > MAX_UPLOAD_SIZE:
+        raise UploadError(f'Tamanho do arquivo deve estar entre 1 e {MAX_UPLOAD_SIZE} bytes.')
+    if chunk_size <= 0 or chunk_size > MAX_CHUNK_SIZE:
+        raise UploadError(f'Tamanho da parte deve estar entre 1 e {MAX_CHUNK_SIZE} bytes.')
+
+    session = UploadSession.objects.create(
+        user=user,
+        project=project,
+        filename=os.path.basename(filename)[:255],
+        total_size=total_size,
+        chunk_size=chunk_size,
+        total_chunks=-(-total_size // chunk_size),
+        **photo_data
+    )
+    os.makedirs(session_dir(session), exist_ok=True)
+    return session
+
+
+def received_chunks(session):
+    """Índices das partes já recebidas (a partir dos arquivos em disco)"""
+    try:
+        names = os.listdir(session_dir(session))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-5]) for name in names if name.endswith('.part'))
+
+
+def write_chunk(session, index, stream):
+    """
+    Grava uma parte lendo o corpo da requisição em blocos (memória constante).
+
+    A parte é escrita em um arquivo temporário e renomeada ao final, para que
+    uma parte interrompida nunca seja considerada recebida. Reenviar uma
+    parte substitui a anterior.
+    """
+    if session.status != UploadSession.StatusChoices.PENDENTE:
+        raise UploadError('Sessão de upload não está pendente.')
+    if index < 0 or index >= session.total_chunks:
+        raise UploadError(f'Parte inválida: informe um índice entre 0 e {session.total_chunks - 1}.')
+
+    expected = expected_chunk_size(session, index)
+    path = chunk_path(session, index)
+    tmp_path = f'{path}.tmp'
+    os.makedirs(session_dir(session), exist_ok=True)
+
+    written = 0
+    with open(tmp_path, 'wb') as output:
+        while True:
+            block = stream.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            written += len(block)
+            if written > expected:
+                break
+            output.write(block)
+
+    if written != expected:
+        os.remove(tmp_path)
+        raise UploadError(f'Parte {index} com tamanho inválido: esperado {expected} bytes.')
+
+    os.replace(tmp_path, path)
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+    return written
+
+
+def _append_file(output, path):
+    """Concatena o arquivo ao destino com os.sendfile (sem copiar para o espaço do usuário)"""
+    with open(path, 'rb') as source:
+        size = os.fstat(source.fileno()).st_size
+        if not hasattr(os, 'sendfile'):
+            shutil.copyfileobj(source, output, STREAM_BLOCK_SIZE)
+            return
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(output.fileno(), source.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+
+def assemble(session):
+    """Monta o arquivo final a partir das partes e retorna o caminho"""
+    missing = sorted(set(range(session.total_chunks)) - set(received_chunks(session)))
+    if missing:
+        raise UploadError(f'Partes pendentes: {missing[:20]}')
+
+    assembled_path = os.path.join(session_dir(session), 'assembled')
+    with open(assembled_path, 'wb') as output:
+        for index in range(session.total_chunks):
+            _append_file(output, chunk_path(session, index))
+
+    if os.path.getsize(assembled_path) != session.total_size:
+        os.remove(assembled_path)
+        raise UploadError('Tamanho do arquivo montado não confere.')
+    return assembled_path
+
+
+def _validate_image(path):
+    """Valida a imagem lendo apenas o cabeçalho e a estrutura (sem decodificar os pixels)"""
+    if not PILLOW_AVAILABLE:
+        return
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        raise UploadError('O arquivo enviado não é uma imagem válida.')
+
+
+def process_uploaded_photo(project, photo_name, metadata=None, **photo_data):
+    """
+    Cria a WorkPhoto para um arquivo já gravado no storage.
+
+    Ponto único de processamento das fotos enviadas: aplica os metadados EXIF
+    (data e GPS) e as versões otimizadas são agendadas pelos sinais de WorkPhoto.
+    """
+    photo = WorkPhoto(project=project, **photo_data)
+    photo.photo.name = photo_name
+    if metadata:
+        photo.apply_exif(metadata)
+    photo.save()
+    return photo
+
+
+def _reserve_photo_name(storage, name):
+    """
+    Reserva no storage local o nome do arquivo final criando-o vazio (O_EXCL),
+    para que conclusões simultâneas de arquivos homônimos não se sobrescrevam.
+
+    Returns:
+        Tupla (nome no storage, caminho em disco)
+    """
+    while True:
+        available = storage.get_available_name(name)
+        target = storage.path(available)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.close(os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            continue
+        return available, target
+
+
+def _store_assembled(storage, assembled_path, filename):
+    """
+    Grava o arquivo montado no storage das fotos e retorna o nome gravado.
+
+    Em storage local (mesmo sistema de arquivos) o arquivo é apenas renomeado;
+    em storages remotos é enviado por storage.save.
+    """
+    name = WorkPhoto._meta.get_field('photo').generate_filename(None, filename)
+    if isinstance(storage, FileSystemStorage):
+        name, target = _reserve_photo_name(storage, name)
+        try:
+            shutil.move(assembled_path, target)
+        except Exception:
+            storage.delete(name)
+            raise
+        return name
+
+    with open(assembled_path, 'rb') as source:
+        name = storage.save(name, File(source))
+    os.remove(assembled_path)
+    return name
+
+
+def complete_session(session, taken_date=None):
+    """
+    Conclui o upload: monta o arquivo, move para o storage e cria a foto.
+
+    `taken_date` (opcional) substitui a data informada ao iniciar a sessão,
+    permitindo concluir fotos sem data nos metadados EXIF.
+
+    A sessão é bloqueada e passa a PROCESSANDO antes de montar o arquivo, então
+    conclusões simultâneas da mesma sessão são recusadas. Em caso de falha a
+    sessão volta a PENDENTE e apenas o arquivo criado por esta chamada é
+    removido do storage.
+
+    Returns:
+        WorkPhoto criada
+    """
+    with transaction.atomic():
+        locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if locked.status != UploadSession.StatusChoices.PENDENTE:
+            raise UploadError('Sessão de upload não está pendente.')
+        locked.status = UploadSession.StatusChoices.PROCESSANDO
+        if taken_date:
+            locked.taken_date = taken_date
+        locked.save(update_fields=['status', 'taken_date', 'updated_at'])
+    session.status = UploadSession.StatusChoices.PROCESSANDO
+    session.taken_date = locked.taken_date
+
+    storage = WorkPhoto._meta.get_field('photo').storage
+    name = None
+    try:
+        assembled_path = assemble(session)
+        _validate_image(assembled_path)
+        
+        metadata = read_exif_header(assembled_path)
+        if not session.taken_date and not metadata['taken_date']:
+            raise UploadError('Informe taken_date ao concluir (data não encontrada nos metadados EXIF).')
+
+        name = _store_assembled(storage, assembled_path, session.filename)
+
+        with transaction.atomic():
+            photo = process_uploaded_photo(
+                session.project,
+                name,
+                metadata=metadata,
+                title=session.title,
+                description=session.description,
+                taken_date=session.taken_date,
+                location=session.location,
+            )
+            session.status = UploadSession.StatusChoices.CONCLUIDA
+            session.photo = photo
+            session.save(update_fields=['status', 'photo', 'updated_at'])
+    except Exception:
+        if name is not None:
+            storage.delete(name)
+        UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.StatusChoices.PROCESSANDO
+        ).update(status=UploadSession.StatusChoices.PENDENTE, updated_at=timezone.now())
+        session.status = UploadSession.StatusChoices.PENDENTE
+        raise
+
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+    return photo
+
+
+def purge_expired_sessions(hours=None):
+    """
+    Expira as sessões pendentes (ou interrompidas durante o processamento)
+    sem atividade e remove as partes do disco.
+
+    Returns:
+        Quantidade de sessões expiradas
+    """
+    hours = SESSION_EXPIRES_HOURS if hours is None else hours
+    limit = timezone.now() - timedelta(hours=hours)
+
+    expired = list(UploadSession.objects.filter(
+        status__in=[UploadSession.StatusChoices.PENDENTE, UploadSession.StatusChoices.PROCESSANDO],
+        updated_at__lt=limit
+    ))
+    for session in expired:
+        shutil.rmtree(session_dir(session), ignore_errors=True)
+
+    UploadSession.objects.filter(pk__in=[session.pk for session in expired]).update(
+        status=UploadSession.StatusChoices.EXPIRADA,
+        updated_at=timezone.now()
+    )
+    return len(expired)
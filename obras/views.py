@@ -1,17 +1,32 @@
-from django.shortcuts import render
-from rest_framework import viewsets, status, permissions
+import csv
+import io
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Avg, Count, Sum, Q
+from django.db import transaction
+from django.db.models import Count, Sum, Q
 from django.utils import timezone
 from datetime import datetime
-from .models import WorkProject, WorkProgress, WorkPhoto
+from .models import WorkProject, WorkProgress, WorkPhoto, UploadSession
 from .serializers import (
-    WorkProjectSerializer, WorkProjectCreateUpdateSerializer,
+    WorkProjectSerializer, WorkProjectListSerializer, WorkProjectCreateUpdateSerializer,
     WorkProgressSerializer, WorkProgressCreateUpdateSerializer,
     WorkPhotoSerializer, WorkPhotoCreateUpdateSerializer,
+    UploadSessionCreateSerializer, UploadSessionCompleteSerializer, UploadSessionSerializer,
     ObrasDashboardSerializer
 )
+from .services import (
+    execution_report, apply_spatial_filters, parse_bbox, map_clusters, stream_geojson,
+    dashboard_cache_version, progress_averages, DASHBOARD_CACHE_TIMEOUT,
+    read_progress_csv, validate_progress_rows, bulk_upsert_progress
+)
+from .dedupe import near_duplicates
+from .schedule import schedule_analysis, rank_by_slippage
+from .uploads import UploadError, create_session, write_chunk, complete_session
 from users.permissions import IsSectorAdmin, IsSectorOperator
 from audit.models import AuditLog
 
@@ -29,27 +44,63 @@ class WorkProjectViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return WorkProjectCreateUpdateSerializer
+        if self.action == 'list':
+            return WorkProjectListSerializer
         return WorkProjectSerializer
     
-    def get_queryset(self):
-        """Filtrar por setor baseado no usuário"""
+    def get_visibility_scope(self):
+        """Conjunto de obras visível ao usuário: 'all', 'active' ou None"""
         user = self.request.user
         
         # MASTER_ADMIN vê tudo
         if user.is_master_admin:
-            return WorkProject.objects.all()
+            return 'all'
         
         # SECTOR_ADMIN e SECTOR_OPERATOR vêem apenas do seu setor
         if user.is_sector_admin or user.is_sector_operator:
-            if user.sector == 'OBRAS':
-                return WorkProject.objects.all()
-            return WorkProject.objects.none()
+            return 'all' if user.sector == 'OBRAS' else None
         
         # EMPLOYEE vê apenas projetos ativos
         if user.is_employee:
-            return WorkProject.objects.filter(status__in=['PLANEJAMENTO', 'EXECUCAO'])
+            return 'active'
+        
+        return None
+    
+    def get_status_filter(self):
+        """Status da query string validado contra StatusChoices ('' quando ausente)"""
+        status_filter = self.request.query_params.get('status', '')
+        if status_filter and status_filter not in WorkProject.StatusChoices.values:
+            raise serializers.ValidationError({'error': 'Status inválido.'})
+        return status_filter
+    
+    def get_base_queryset(self):
+        """Obras visíveis ao usuário com o filtro de status (sem filtros espaciais)"""
+        scope = self.get_visibility_scope()
+        queryset = WorkProject.objects.none()
+        
+        if scope == 'all':
+            queryset = WorkProject.objects.all()
+        elif scope == 'active':
+            queryset = WorkProject.objects.filter(status__in=['PLANEJAMENTO', 'EXECUCAO'])
+        
+        # Aplicar filtros de query string
+        status_filter = self.get_status_filter()
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        return queryset
+    
+    def get_queryset(self):
+        """Filtrar por setor baseado no usuário"""
+        queryset = self.get_base_queryset()
         
-        return WorkProject.objects.none()
+        # Filtros espaciais (bbox e raio) apoiados no índice geohash
+        try:
+            queryset = apply_spatial_filters(queryset, self.request.query_params)
+        except ValueError as e:
+            raise serializers.ValidationError({'error': str(e)})
+        
+        return queryset
     
     def perform_create(self, serializer):
         """Criar projeto e registrar auditoria"""
@@ -87,7 +138,7 @@ class WorkProjectViewSet(viewsets.ModelViewSet):
         """Exclusão lógica e auditoria"""
         # Marcar como cancelado em vez de deletar
         instance.status = 'CANCELADA'
-        instance.save()
+        instance.save(update_fields=['status', 'updated_at'])
         
         # Registrar auditoria
         AuditLog.log_action(
@@ -113,21 +164,18 @@ class WorkProjectViewSet(viewsets.ModelViewSet):
                 user.is_employee):
             return Response({'error': 'Acesso negado'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Calcular estatísticas
-        queryset = self.get_queryset()
-        
-        total_projects = queryset.count()
-        projects_in_execution = queryset.filter(status='EXECUCAO').count()
-        
-        # Calcular progresso médio
-        progress_avg = queryset.aggregate(
-            avg_progress=Avg('progress_set__physical_pct')
-        )['avg_progress'] or 0
+        # Cache por perfil e filtro de status, invalidado pelos sinais de obra/progresso
+        cache_key = 'obras:dashboard:{}:{}:{}'.format(
+            dashboard_cache_version(),
+            self.get_visibility_scope(),
+            self.get_status_filter()
+        )
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
         
-        # Calcular orçamento total
-        total_budget = queryset.aggregate(
-            total=Sum('budget')
-        )['total'] or 0
+        # Calcular estatísticas
+        queryset = self.get_base_queryset()
         
         # Contar projetos por status
         projects_by_status = queryset.values('status').annotate(
@@ -138,6 +186,17 @@ class WorkProjectViewSet(viewsets.ModelViewSet):
         for item in projects_by_status:
             status_dict[item['status']] = item['count']
         
+        total_projects = sum(status_dict.values())
+        projects_in_execution = status_dict.get('EXECUCAO', 0)
+        
+        # Progresso médio pelo último progresso de cada obra
+        progress_avg = progress_averages(queryset)['avg_physical']
+        
+        # Calcular orçamento total
+        total_budget = queryset.aggregate(
+            total=Sum('budget')
+        )['total'] or 0
+        
         # Progresso recente (últimos 3 meses)
         recent_progress = WorkProgress.objects.filter(
             project__in=queryset
@@ -146,14 +205,129 @@ class WorkProjectViewSet(viewsets.ModelViewSet):
         dashboard_data = {
             'total_projects': total_projects,
             'projects_in_execution': projects_in_execution,
-            'average_progress': round(float(progress_avg), 2),
+            'average_progress': progress_avg,
             'total_budget': total_budget,
             'projects_by_status': status_dict,
             'recent_progress': WorkProgressSerializer(recent_progress, many=True).data
         }
         
-        serializer = ObrasDashboardSerializer(dashboard_data)
-        return Response(serializer.data)
+        data = ObrasDashboardSerializer(dashboard_data).data
+        cache.set(cache_key, data, DASHBOARD_CACHE_TIMEOUT)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def execution(self, request):
+        """
+        Execução físico-financeira dos contratos ativos (valor contratado x executado)
+        
+        Query params: contract (ID do contrato, opcional)
+        """
+        user = request.user
+        
+        # Verificar permissões
+        if not (user.is_master_admin or 
+                (user.is_sector_admin and user.sector == 'OBRAS') or
+                (user.is_sector_operator and user.sector == 'OBRAS')):
+            return Response({'error': 'Acesso negado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        contract_id = request.query_params.get('contract')
+        if contract_id is not None:
+            try:
+                contract_id = int(contract_id)
+            except ValueError:
+                return Response(
+                    {'error': 'Contrato inválido.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        return Response(execution_report(contract_id=contract_id))
+    
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """
+        Clusters de obras para o mapa, agrupados em grade conforme o zoom
+        
+        Query params: bbox=min_lng,min_lat,max_lng,max_lat (obrigatório),
+        zoom (0 a 20, padrão 10), status
+        """
+        scope = self.get_visibility_scope()
+        if scope is None:
+            return Response({'error': 'Acesso negado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            min_lat, min_lng, max_lat, max_lng = parse_bbox(request.query_params.get('bbox', ''))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            zoom = int(request.query_params.get('zoom', 10))
+        except (ValueError, TypeError):
+            return Response({'error': 'Informe um zoom válido.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # O filtro de status faz parte da chave de cache dos tiles
+        status_filter = self.get_status_filter()
+        try:
+            clusters = map_clusters(
+                self.get_base_queryset(),
+                f'{scope}:{status_filter}',
+                min_lat, min_lng, max_lat, max_lng, zoom
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'zoom': zoom,
+            'count': sum(cluster['count'] for cluster in clusters),
+            'clusters': clusters
+        })
+    
+    @action(detail=False, methods=['get'])
+    def geojson(self, request):
+        """
+        Exportação GeoJSON das obras com coordenadas (mesmos filtros da listagem)
+        
+        A resposta é gerada em partes, sem paginação, para uso em ferramentas GIS.
+        """
+        response = StreamingHttpResponse(
+            stream_geojson(self.get_queryset()),
+            content_type='application/geo+json'
+        )
+        response['Content-Disposition'] = 'attachment; filename="obras.geojson"'
+        response['Access-Control-Expose-Headers'] = 'Content-Disposition'
+        return response
+    
+    @action(detail=True, methods=['get'], url_path='s-curve')
+    def s_curve(self, request, pk=None):
+        """Curva S (avanço previsto x realizado) e indicadores de prazo da obra"""
+        project = self.get_object()
+        analysis = schedule_analysis(WorkProject.objects.filter(pk=project.pk), include_curves=True)
+        return Response(analysis[0])
+    
+    @action(detail=False, methods=['get'])
+    def slippage(self, request):
+        """
+        Obras ordenadas pelo atraso projetado (mais atrasadas primeiro)
+        
+        Query params: mesmos filtros da listagem, curves (true para incluir a curva S)
+        """
+        results = rank_by_slippage(schedule_analysis(self.get_queryset()))
+        
+        page = self.paginate_queryset(results)
+        items = page if page is not None else results
+        
+        # Curvas apenas para as obras da página
+        if request.query_params.get('curves', '').lower() in ('1', 'true'):
+            with_curves = {
+                item['id']: item
+                for item in schedule_analysis(
+                    WorkProject.objects.filter(pk__in=[item['id'] for item in items]),
+                    include_curves=True
+                )
+            }
+            items = [with_curves[item['id']] for item in items]
+        
+        if page is not None:
+            return self.get_paginated_response(items)
+        return Response(items)
     
     @action(detail=True, methods=['get'])
     def progress(self, request, pk=None):
@@ -255,6 +429,94 @@ class WorkProgressViewSet(viewsets.ModelViewSet):
         )
         
         instance.delete()
+    
+    def _save_progress_rows(self, rows, start, skip_invalid):
+        """Valida e grava as linhas do envio em lote, com auditoria em lote"""
+        user = self.request.user
+        if not (user.is_master_admin or 
+                (user.is_sector_admin and user.sector == 'OBRAS') or
+                (user.is_sector_operator and user.sector == 'OBRAS')):
+            return Response({'error': 'Acesso negado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        accepted, errors = validate_progress_rows(rows, start=start)
+        if errors and not skip_invalid:
+            return Response(
+                {'error': f'{len(errors)} linhas com erro.', 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Progresso e auditoria gravados na mesma transação
+        with transaction.atomic():
+            saved = bulk_upsert_progress(accepted)
+            
+            # Registrar auditoria em um único insert
+            AuditLog.log_bulk_actions(
+                user=user,
+                entries=[
+                    (
+                        'UPDATE' if row['_exists'] else 'CREATE',
+                        progress,
+                        {
+                            'action': 'bulk_update_progress' if row['_exists'] else 'bulk_create_progress',
+                            'project_id': row['project']
+                        }
+                    )
+                    for row, progress in zip(accepted, saved)
+                ],
+                ip_address=self.request.META.get('REMOTE_ADDR'),
+                user_agent=self.request.META.get('HTTP_USER_AGENT'),
+                url=self.request.path,
+                method=self.request.method
+            )
+        
+        updated = sum(1 for row in accepted if row['_exists'])
+        return Response({
+            'created': len(accepted) - updated,
+            'updated': updated,
+            'errors': errors
+        })
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Envio em lote do progresso mensal (cria ou atualiza por obra e mês)
+        
+        Body: {"ref_month": "YYYY-MM" (padrão dos itens), "items": [{project,
+        ref_month, physical_pct, financial_pct, notes}], "skip_invalid": false}
+        """
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Envie um objeto JSON com a lista de itens.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        items = request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Informe a lista de itens.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        ref_month = request.data.get('ref_month')
+        rows = [
+            {'ref_month': ref_month, **item} if isinstance(item, dict) else {}
+            for item in items
+        ]
+        skip_invalid = str(request.data.get('skip_invalid', '')).lower() in ('1', 'true')
+        return self._save_progress_rows(rows, start=0, skip_invalid=skip_invalid)
+    
+    @action(detail=False, methods=['post'], url_path='import-csv')
+    def import_csv(self, request):
+        """
+        Importação do progresso mensal a partir de CSV (campo file)
+        
+        Colunas: project, ref_month, physical_pct, financial_pct, notes
+        """
+        file = request.FILES.get('file')
+        if file is None:
+            return Response({'error': 'Envie o arquivo CSV no campo file.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            rows = read_progress_csv(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response({'error': f'Erro ao ler o arquivo: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        skip_invalid = str(request.data.get('skip_invalid', '')).lower() in ('1', 'true')
+        return self._save_progress_rows(rows, start=2, skip_invalid=skip_invalid)
 
 
 class WorkPhotoViewSet(viewsets.ModelViewSet):
@@ -272,24 +534,28 @@ class WorkPhotoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtrar por setor baseado no usuário"""
         user = self.request.user
+        queryset = WorkPhoto.objects.none()
         
         # MASTER_ADMIN vê tudo
         if user.is_master_admin:
-            return WorkPhoto.objects.all()
+            queryset = WorkPhoto.objects.all()
         
         # SECTOR_ADMIN e SECTOR_OPERATOR vêem apenas do seu setor
-        if user.is_sector_admin or user.is_sector_operator:
+        elif user.is_sector_admin or user.is_sector_operator:
             if user.sector == 'OBRAS':
-                return WorkPhoto.objects.all()
-            return WorkPhoto.objects.none()
+                queryset = WorkPhoto.objects.all()
         
         # EMPLOYEE vê apenas fotos de projetos ativos
-        if user.is_employee:
-            return WorkPhoto.objects.filter(
+        elif user.is_employee:
+            queryset = WorkPhoto.objects.filter(
                 project__status__in=['PLANEJAMENTO', 'EXECUCAO']
             )
         
-        return WorkPhoto.objects.none()
+        # Galeria sem as fotos marcadas como duplicatas
+        if self.request.query_params.get('hide_duplicates', '').lower() in ('1', 'true'):
+            queryset = queryset.filter(duplicate_of__isnull=True)
+        
+        return queryset
     
     def perform_create(self, serializer):
         """Criar foto e registrar auditoria"""
@@ -340,3 +606,108 @@ class WorkPhotoViewSet(viewsets.ModelViewSet):
         )
         
         instance.delete()
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Fotos quase-duplicadas (hash perceptual a até 3 bits de distância)"""
+        photo = self.get_object()
+        if not photo.phash:
+            return Response(
+                {'error': 'Hash perceptual da foto ainda não calculado.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        matches = near_duplicates(int(photo.phash, 16), self.get_queryset().exclude(pk=photo.pk))
+        photos = self.get_queryset().in_bulk([photo_id for photo_id, _ in matches])
+        return Response([
+            {**WorkPhotoSerializer(photos[photo_id]).data, 'distance': distance}
+            for photo_id, distance in matches
+        ])
+    
+    def _can_upload(self, user):
+        return (user.is_master_admin or
+                ((user.is_sector_admin or user.is_sector_operator) and user.sector == 'OBRAS'))
+    
+    def _get_upload_session(self, request, upload_id):
+        return get_object_or_404(
+            UploadSession.objects.select_related('project'),
+            upload_id=upload_id,
+            user=request.user
+        )
+    
+    @action(detail=False, methods=['post'])
+    def uploads(self, request):
+        """
+        Inicia um upload em partes (retomável)
+        
+        Body: project, filename, total_size, chunk_size (opcional), title,
+        description, taken_date, location
+        """
+        if not self._can_upload(request.user):
+            return Response({'error': 'Acesso negado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            session = create_session(user=request.user, **serializer.validated_data)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})')
+    def upload_status(self, request, upload_id=None):
+        """Estado do upload: partes recebidas (para retomar do ponto em que parou)"""
+        session = self._get_upload_session(request, upload_id)
+        return Response(UploadSessionSerializer(session).data)
+    
+    @action(
+        detail=False,
+        methods=['put'],
+        url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})/chunks/(?P<index>\d+)'
+    )
+    def upload_chunk(self, request, upload_id=None, index=None):
+        """
+        Envia uma parte do arquivo (corpo binário da requisição)
+        
+        O corpo é lido em blocos direto para o disco, sem ser carregado em memória.
+        """
+        session = self._get_upload_session(request, upload_id)
+        
+        try:
+            written = write_chunk(session, int(index), request.stream)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'index': int(index), 'size': written})
+    
+    @action(detail=False, methods=['post'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})/complete')
+    def upload_complete(self, request, upload_id=None):
+        """
+        Conclui o upload: monta o arquivo e cria a foto da obra
+        
+        Body (opcional): taken_date, obrigatório quando a foto não tem data no EXIF
+        """
+        session = self._get_upload_session(request, upload_id)
+        serializer = UploadSessionCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            photo = complete_session(session, taken_date=serializer.validated_data.get('taken_date'))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Registrar auditoria
+        AuditLog.log_action(
+            user=request.user,
+            action='UPLOAD',
+            obj=photo,
+            payload={'action': 'upload_photo', 'project_id': photo.project_id, 'upload_id': str(session.upload_id)},
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT'),
+            url=request.path,
+            method=request.method
+        )
+        
+        return Response(WorkPhotoSerializer(photo, context={'request': request}).data, status=status.HTTP_201_CREATED)
@@ -2,7 +2,7 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Avg
+from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
 from users.permissions import IsMasterAdmin, IsSectorAdmin
@@ -57,11 +57,12 @@ class DashboardViewSet(viewsets.ViewSet):
         
         # Dados de Obras
         try:
-            from obras.models import WorkProject, WorkProgress
+            from obras.models import WorkProject
+            from obras.services import progress_averages
             obras_data = {
                 'total_projects': WorkProject.objects.count(),
                 'active_projects': WorkProject.objects.filter(status='EXECUCAO').count(),
-                'avg_progress': WorkProgress.objects.aggregate(avg=Avg('physical_pct'))['avg'] or 0,
+                'avg_progress': progress_averages()['avg_physical'],
             }
         except ImportError:
             obras_data = {'error': 'Módulo Obras não disponível'}
@@ -199,9 +200,11 @@ class DashboardViewSet(viewsets.ViewSet):
     def _get_obras_dashboard(self):
         """Dashboard específico de Obras"""
         try:
-            from obras.models import WorkProject, WorkProgress
-            from django.db.models import Avg, Sum
+            from obras.models import WorkProject
+            from obras.services import progress_averages
+            from django.db.models import Sum
             
+            averages = progress_averages()
             data = {
                 'projects': {
                     'total': WorkProject.objects.count(),
@@ -211,8 +214,8 @@ class DashboardViewSet(viewsets.ViewSet):
                     'cancelled': WorkProject.objects.filter(status='CANCELADA').count(),
                 },
                 'progress': {
-                    'avg_physical': WorkProgress.objects.aggregate(avg=Avg('physical_pct'))['avg'] or 0,
-                    'avg_financial': WorkProgress.objects.aggregate(avg=Avg('financial_pct'))['avg'] or 0,
+                    'avg_physical': averages['avg_physical'],
+                    'avg_financial': averages['avg_financial'],
                 },
                 'budget': {
                     'total_budget': WorkProject.objects.aggregate(total=Sum('budget'))['total'] or 0,
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Employee, VacationRequest, Payslip
+from .models import (
+    Employee, EmployeeStatusHistory, VacationRequest, Payslip, VacationBalance,
+    IncomeStatement, PayslipAnomaly
+)
 
 
 @admin.register(Employee)
@@ -47,3 +50,46 @@ class PayslipAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(VacationBalance)
+class VacationBalanceAdmin(admin.ModelAdmin):
+    """Admin para saldos de férias"""
+    list_display = ('employee', 'periodos_aquisitivos', 'dias_adquiridos', 'dias_gozados', 'ultima_apuracao')
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__matricula')
+    ordering = ('employee__user__first_name', 'employee__user__last_name')
+    
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(IncomeStatement)
+class IncomeStatementAdmin(admin.ModelAdmin):
+    """Admin para informes de rendimentos"""
+    list_display = ('employee', 'ano', 'total_bruto', 'total_descontos', 'total_liquido', 'meses', 'updated_at')
+    list_filter = ('ano',)
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__matricula')
+    ordering = ('-ano', 'employee__user__first_name')
+    
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(PayslipAnomaly)
+class PayslipAnomalyAdmin(admin.ModelAdmin):
+    """Admin para anomalias de contracheque"""
+    list_display = ('employee', 'competencia', 'metrica', 'motivo', 'delta', 'zscore', 'status')
+    list_filter = ('status', 'motivo', 'metrica', 'competencia')
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__matricula')
+    ordering = ('-competencia', 'status')
+    
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(EmployeeStatusHistory)
+class EmployeeStatusHistoryAdmin(admin.ModelAdmin):
+    """Admin para histórico funcional"""
+    list_display = ('employee', 'evento', 'status', 'lotacao', 'regime', 'valid_from')
+    list_filter = ('evento', 'status', 'regime', 'valid_from')
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__matricula', 'lotacao')
+    ordering = ('employee', 'valid_from')
+    
+    readonly_fields = ('created_at',)
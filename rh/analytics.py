@@ -0,0 +1,181 @@
+"""
+Análises de folha de pagamento do módulo de RH
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Payslip, PayslipAnomaly
+
+# Import condicional do NumPy para não quebrar o sistema
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+METRICS = [
+    PayslipAnomaly.MetricChoices.BRUTO,
+    PayslipAnomaly.MetricChoices.DESCONTOS,
+    PayslipAnomaly.MetricChoices.LIQUIDO,
+]
+
+# Constantes do z-score modificado (Iglewicz & Hoaglin)
+MAD_SCALE = 0.6745
+MEAN_AD_SCALE = 1.253314
+
+
+def group_median(values, groups, n_groups):
+    """
+    Mediana de `values` por grupo, totalmente vetorizada (ignora NaN).
+
+    Ordena por (grupo, valor) e toma o(s) elemento(s) central(is) de cada grupo.
+    """
+    mask = ~np.isnan(values)
+    v, g = values[mask], groups[mask]
+    order = np.lexsort((v, g))
+    v, g = v[order], g[order]
+
+    counts = np.bincount(g, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    medians = np.full(n_groups, np.nan)
+    has = counts > 0
+    lo = starts + (counts - 1) // 2
+    hi = starts + counts // 2
+    medians[has] = (v[lo[has]] + v[hi[has]]) / 2
+    return medians
+
+
+def robust_zscores(values, groups, n_groups, min_group_size=5):
+    """
+    Z-score robusto (baseado na mediana e no MAD) de cada valor em relação ao seu grupo.
+
+    Grupos com menos de `min_group_size` valores recebem z-score 0.
+    """
+    medians = group_median(values, groups, n_groups)
+    deviations = np.abs(values - medians[groups])
+    mad = group_median(deviations, groups, n_groups)
+
+    valid = ~np.isnan(deviations)
+    sizes = np.bincount(groups[valid], minlength=n_groups)
+    sums = np.bincount(groups[valid], weights=deviations[valid], minlength=n_groups)
+    mean_ad = np.divide(sums, sizes, out=np.zeros(n_groups), where=sizes > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Quando o MAD é zero usa-se o desvio absoluto médio
+        scores = np.where(
+            mad[groups] > 0,
+            MAD_SCALE * (values - medians[groups]) / mad[groups],
+            (values - medians[groups]) / (MEAN_AD_SCALE * mean_ad[groups]),
+        )
+    scores[~np.isfinite(scores)] = 0.0
+    scores[sizes[groups] < min_group_size] = 0.0
+    return scores
+
+
+def _decimal(value):
+    if value is None or np.isnan(value):
+        return None
+    return Decimal(f'{value:.2f}')
+
+
+def detect_payslip_anomalies(competencias, threshold=3.5, min_group_size=5):
+    """
+    Compara contracheques de duas ou mais competências e grava as anomalias encontradas.
+
+    Carrega todos os contracheques das competências em uma única consulta,
+    monta matrizes funcionário x competência e calcula, de forma vetorizada,
+    as variações mês a mês e os z-scores robustos por cargo/lotação.
+
+    Returns:
+        Quantidade de anomalias registradas
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy não está disponível. Instale com: pip install numpy")
+
+    competencias = sorted(set(competencias))
+    if len(competencias) < 2:
+        raise ValueError("Informe ao menos duas competências para comparação.")
+
+    rows = list(
+        Payslip.objects.filter(competencia__in=competencias).values_list(
+            'id', 'employee_id', 'competencia', 'bruto', 'descontos', 'liquido',
+            'employee__cargo', 'employee__lotacao'
+        ).order_by('competencia')
+    )
+    if not rows:
+        return 0
+
+    payslip_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    employee_ids = np.array([row[1] for row in rows], dtype=np.int64)
+    period_idx = np.array([competencias.index(row[2]) for row in rows], dtype=np.int64)
+    values = np.array([[row[3], row[4], row[5]] for row in rows], dtype=np.float64)
+    group_keys = np.array([f'{row[6]}|{row[7]}' for row in rows])
+
+    employees, emp_idx = np.unique(employee_ids, return_inverse=True)
+    n_emp, n_periods = len(employees), len(competencias)
+
+    # Matrizes funcionário x competência (x métrica)
+    matrix = np.full((n_emp, n_periods, len(METRICS)), np.nan)
+    matrix[emp_idx, period_idx] = values
+    slip_matrix = np.zeros((n_emp, n_periods), dtype=np.int64)
+    slip_matrix[emp_idx, period_idx] = payslip_ids
+
+    # Cargo/lotação de cada funcionário (linhas ordenadas por competência: a mais recente prevalece)
+    emp_group = np.empty(n_emp, dtype=group_keys.dtype)
+    emp_group[emp_idx] = group_keys
+    groups, group_idx = np.unique(emp_group, return_inverse=True)
+
+    previous = matrix[:, :-1, :]
+    current = matrix[:, 1:, :]
+    deltas = current - previous
+
+    anomalies = []
+
+    def add(emp, period, metric, reason, zscore=None):
+        prev_value = previous[emp, period, metric]
+        cur_value = current[emp, period, metric]
+        slip_id = slip_matrix[emp, period + 1]
+        anomalies.append(PayslipAnomaly(
+            employee_id=int(employees[emp]),
+            payslip_id=int(slip_id) or None,
+            competencia=competencias[period + 1],
+            metrica=METRICS[metric],
+            motivo=reason,
+            valor=_decimal(cur_value),
+            valor_anterior=_decimal(prev_value),
+            delta=_decimal(deltas[emp, period, metric]),
+            zscore=None if zscore is None else round(float(zscore), 4),
+        ))
+
+    bruto, descontos = 0, 1
+
+    # Regra: bruto ausente (havia contracheque no mês anterior e não há no atual, ou bruto zerado)
+    missing = ~np.isnan(previous[:, :, bruto]) & (
+        np.isnan(current[:, :, bruto]) | (current[:, :, bruto] == 0)
+    )
+    for emp, period in zip(*np.nonzero(missing)):
+        add(emp, period, bruto, PayslipAnomaly.ReasonChoices.BRUTO_AUSENTE)
+
+    # Regra: descontos dobrados em relação ao mês anterior
+    with np.errstate(invalid='ignore'):
+        doubled = (previous[:, :, descontos] > 0) & (current[:, :, descontos] >= 1.9 * previous[:, :, descontos])
+    for emp, period in zip(*np.nonzero(doubled)):
+        add(emp, period, descontos, PayslipAnomaly.ReasonChoices.DESCONTO_DOBRADO)
+
+    # Z-score robusto das variações por cargo/lotação, para cada par de competências e métrica
+    for period in range(n_periods - 1):
+        for metric in range(len(METRICS)):
+            scores = robust_zscores(deltas[:, period, metric], group_idx, len(groups), min_group_size)
+            for emp in np.nonzero(np.abs(scores) > threshold)[0]:
+                add(emp, period, metric, PayslipAnomaly.ReasonChoices.OUTLIER, scores[emp])
+
+    with transaction.atomic():
+        # Reprocessar substitui apenas as anomalias ainda não revisadas
+        PayslipAnomaly.objects.filter(
+            competencia__in=competencias[1:],
+            status=PayslipAnomaly.StatusChoices.PENDENTE
+        ).delete()
+        PayslipAnomaly.objects.bulk_create(anomalies, batch_size=1000, ignore_conflicts=True)
+
+    return len(anomalies)
@@ -0,0 +1,42 @@
+"""
+Comando para apurar mensalmente os períodos aquisitivos de férias
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rh.services import accrue_vacation_balances
+
+
+class Command(BaseCommand):
+    help = 'Apura os períodos aquisitivos de férias de todos os funcionários ativos (executar mensalmente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            default=None,
+            help='Data de referência da apuração (YYYY-MM-DD). Padrão: hoje'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tamanho dos lotes de gravação'
+        )
+
+    def handle(self, *args, **options):
+        ref_date = None
+        if options['date']:
+            try:
+                ref_date = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Data inválida. Use o formato YYYY-MM-DD.')
+        
+        created, updated = accrue_vacation_balances(ref_date, batch_size=options['batch_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Apuração concluída: {created} saldos criados, {updated} saldos atualizados.'
+            )
+        )
@@ -0,0 +1,55 @@
+"""
+Comando para detectar anomalias na comparação mensal de contracheques
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rh.analytics import NUMPY_AVAILABLE, detect_payslip_anomalies
+
+
+class Command(BaseCommand):
+    help = 'Compara duas ou mais competências de contracheques e registra as anomalias para revisão'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'competencias',
+            nargs='+',
+            type=str,
+            help='Competências no formato YYYY-MM (ao menos duas)'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=3.5,
+            help='Limite do z-score robusto para marcar uma variação como atípica'
+        )
+        parser.add_argument(
+            '--min-group-size',
+            type=int,
+            default=5,
+            help='Tamanho mínimo do grupo cargo/lotação para calcular o z-score'
+        )
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            raise CommandError('NumPy não disponível. Instale com: pip install numpy')
+        
+        try:
+            competencias = [
+                date(int(value[:4]), int(value[5:7]), 1)
+                for value in options['competencias']
+            ]
+        except (ValueError, IndexError):
+            raise CommandError('Competência inválida. Use o formato YYYY-MM.')
+        
+        try:
+            total = detect_payslip_anomalies(
+                competencias,
+                threshold=options['threshold'],
+                min_group_size=options['min_group_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        self.stdout.write(self.style.SUCCESS(f'{total} anomalias registradas para revisão.'))
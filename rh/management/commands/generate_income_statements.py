@@ -0,0 +1,37 @@
+"""
+Comando para gerar os informes de rendimentos anuais de todos os funcionários
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rh.reports import REPORTLAB_AVAILABLE
+from rh.services import generate_income_statements
+
+
+class Command(BaseCommand):
+    help = 'Gera os informes de rendimentos do ano-calendário para todos os funcionários'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            default=timezone.localdate().year - 1,
+            help='Ano-calendário (padrão: ano anterior)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processos usados na renderização dos PDFs (padrão: número de CPUs)'
+        )
+
+    def handle(self, *args, **options):
+        if not REPORTLAB_AVAILABLE:
+            raise CommandError('ReportLab não disponível. Instale com: pip install reportlab')
+        
+        year = options['year']
+        self.stdout.write(f'Gerando informes de rendimentos de {year}...')
+        
+        total = generate_income_statements(year, workers=options['workers'])
+        
+        self.stdout.write(self.style.SUCCESS(f'{total} informes de rendimentos gerados.'))
@@ -0,0 +1,69 @@
+"""
+Comando para importação em massa de funcionários a partir de CSV
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from rh.services import bulk_import_employees, read_employee_csv, validate_employee_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa funcionários (User + Employee) a partir de um CSV com as colunas: '
+        'email, first_name, last_name, cpf, matricula, cargo, lotacao, regime, '
+        'admissao_dt, status, password'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', type=str, help='Caminho do arquivo CSV')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Quantidade de registros por bulk_create'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processos usados no hashing das senhas (padrão: número de CPUs)'
+        )
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            help='Importa as linhas válidas mesmo que existam linhas com erro'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas valida o arquivo, sem gravar'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as file:
+                rows = read_employee_csv(file)
+        except OSError as e:
+            raise CommandError(f'Erro ao ler o arquivo: {str(e)}')
+        
+        self.stdout.write(f'{len(rows)} linhas lidas. Validando...')
+        accepted, errors = validate_employee_rows(rows)
+        
+        for error in errors:
+            self.stdout.write(self.style.WARNING(f"Linha {error['line']}: {error['error']}"))
+        
+        if errors and not options['skip_invalid']:
+            raise CommandError(
+                f'{len(errors)} linhas com erro. Corrija o arquivo ou use --skip-invalid.'
+            )
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{len(accepted)} linhas válidas (dry-run).'))
+            return
+        
+        created = bulk_import_employees(
+            accepted,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+        )
+        
+        self.stdout.write(self.style.SUCCESS(f'{created} funcionários importados com sucesso!'))
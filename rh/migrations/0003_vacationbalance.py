@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rh', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacationBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodos_aquisitivos', models.PositiveIntegerField(default=0, verbose_name='Períodos Aquisitivos Completos')),
+                ('periodo_atual_inicio', models.DateField(verbose_name='Início do Período Aquisitivo Atual')),
+                ('dias_adquiridos', models.PositiveIntegerField(default=0, verbose_name='Dias Adquiridos')),
+                ('dias_gozados', models.PositiveIntegerField(default=0, verbose_name='Dias Gozados')),
+                ('ultima_apuracao', models.DateField(blank=True, null=True, verbose_name='Última Apuração')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='vacation_balance', to='rh.employee', verbose_name='Funcionário')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Férias',
+                'verbose_name_plural': 'Saldos de Férias',
+                'ordering': ['employee__user__first_name', 'employee__user__last_name'],
+            },
+        ),
+    ]
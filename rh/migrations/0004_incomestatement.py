@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rh', '0003_vacationbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncomeStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField(verbose_name='Ano-Calendário')),
+                ('total_bruto', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total Bruto')),
+                ('total_descontos', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total de Descontos')),
+                ('total_liquido', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total Líquido')),
+                ('meses', models.PositiveSmallIntegerField(verbose_name='Meses com Contracheque')),
+                ('pdf_file', models.FileField(blank=True, null=True, upload_to='income_statements/', verbose_name='Arquivo PDF')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='income_statements', to='rh.employee', verbose_name='Funcionário')),
+            ],
+            options={
+                'verbose_name': 'Informe de Rendimentos',
+                'verbose_name_plural': 'Informes de Rendimentos',
+                'ordering': ['-ano', 'employee__user__first_name'],
+                'unique_together': {('employee', 'ano')},
+            },
+        ),
+    ]
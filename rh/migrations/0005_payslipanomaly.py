@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rh', '0004_incomestatement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayslipAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('competencia', models.DateField(verbose_name='Competência')),
+                ('metrica', models.CharField(choices=[('BRUTO', 'Valor Bruto'), ('DESCONTOS', 'Descontos'), ('LIQUIDO', 'Valor Líquido')], max_length=20, verbose_name='Métrica')),
+                ('motivo', models.CharField(choices=[('OUTLIER', 'Variação atípica para o cargo/lotação'), ('BRUTO_AUSENTE', 'Valor bruto ausente'), ('DESCONTO_DOBRADO', 'Descontos dobrados')], max_length=20, verbose_name='Motivo')),
+                ('valor', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor')),
+                ('valor_anterior', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor Anterior')),
+                ('delta', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Variação')),
+                ('zscore', models.FloatField(blank=True, null=True, verbose_name='Z-Score Robusto')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('CONFIRMADA', 'Confirmada'), ('DESCARTADA', 'Descartada')], default='PENDENTE', max_length=20, verbose_name='Status')),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True, verbose_name='Revisado em')),
+                ('review_notes', models.TextField(blank=True, verbose_name='Observações da Revisão')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payslip_anomalies', to='rh.employee', verbose_name='Funcionário')),
+                ('payslip', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='rh.payslip', verbose_name='Contracheque')),
+                ('reviewer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_payslip_anomalies', to=settings.AUTH_USER_MODEL, verbose_name='Revisor')),
+            ],
+            options={
+                'verbose_name': 'Anomalia de Contracheque',
+                'verbose_name_plural': 'Anomalias de Contracheque',
+                'ordering': ['-competencia', 'status', '-zscore'],
+                'indexes': [models.Index(fields=['status', 'competencia'], name='rh_payslipa_status_037170_idx')],
+                'unique_together': {('employee', 'competencia', 'metrica', 'motivo')},
+            },
+        ),
+    ]
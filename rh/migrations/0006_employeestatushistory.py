@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_admissions(apps, schema_editor):
+    """Cria o evento de admissão dos funcionários existentes com a situação atual"""
+    Employee = apps.get_model('rh', 'Employee')
+    EmployeeStatusHistory = apps.get_model('rh', 'EmployeeStatusHistory')
+    
+    EmployeeStatusHistory.objects.bulk_create(
+        [
+            EmployeeStatusHistory(
+                employee_id=employee_id,
+                evento='ADMISSAO',
+                status=status,
+                lotacao=lotacao,
+                regime=regime,
+                valid_from=admissao_dt,
+            )
+            for employee_id, status, lotacao, regime, admissao_dt in Employee.objects.values_list(
+                'id', 'status', 'lotacao', 'regime', 'admissao_dt'
+            ).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rh', '0005_payslipanomaly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento', models.CharField(choices=[('ADMISSAO', 'Admissão'), ('STATUS', 'Mudança de Status'), ('LOTACAO', 'Mudança de Lotação'), ('REGIME', 'Mudança de Regime')], max_length=20, verbose_name='Evento')),
+                ('status', models.CharField(choices=[('ATIVO', 'Ativo'), ('INATIVO', 'Inativo'), ('APOSENTADO', 'Aposentado'), ('DEMITIDO', 'Demitido')], max_length=20, verbose_name='Status')),
+                ('lotacao', models.CharField(max_length=100, verbose_name='Lotação')),
+                ('regime', models.CharField(choices=[('CLT', 'CLT'), ('ESTATUTARIO', 'Estatutário'), ('TEMPORARIO', 'Temporário'), ('TERCEIRIZADO', 'Terceirizado')], max_length=20, verbose_name='Regime')),
+                ('valid_from', models.DateField(verbose_name='Vigente desde')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='rh.employee', verbose_name='Funcionário')),
+            ],
+            options={
+                'verbose_name': 'Histórico Funcional',
+                'verbose_name_plural': 'Históricos Funcionais',
+                'ordering': ['employee', 'valid_from', 'id'],
+                'indexes': [models.Index(fields=['employee', 'valid_from'], name='rh_employee_employe_6c3380_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_admissions, migrations.RunPython.noop),
+    ]
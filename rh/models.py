@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from users.models import User
 
 
@@ -64,6 +65,83 @@ class Employee(models.Model):
     @property
     def email(self):
         return self.user.email
+    
+    def save(self, *args, **kwargs):
+        # Guarda a situação anterior para registrar o histórico funcional
+        previous = None
+        if self.pk:
+            previous = Employee.objects.filter(pk=self.pk).values('status', 'lotacao', 'regime').first()
+        
+        super().save(*args, **kwargs)
+        
+        if previous is None:
+            EmployeeStatusHistory.objects.create(
+                employee=self,
+                evento=EmployeeStatusHistory.EventChoices.ADMISSAO,
+                status=self.status,
+                lotacao=self.lotacao,
+                regime=self.regime,
+                valid_from=self.admissao_dt,
+            )
+            return
+        
+        evento = EmployeeStatusHistory.event_for_change(previous, self)
+        if evento:
+            EmployeeStatusHistory.objects.create(
+                employee=self,
+                evento=evento,
+                status=self.status,
+                lotacao=self.lotacao,
+                regime=self.regime,
+                valid_from=timezone.localdate(),
+            )
+
+
+class EmployeeStatusHistory(models.Model):
+    """Modelo para o histórico funcional do funcionário (admissão, status, lotação e regime)"""
+    
+    class EventChoices(models.TextChoices):
+        ADMISSAO = 'ADMISSAO', 'Admissão'
+        STATUS = 'STATUS', 'Mudança de Status'
+        LOTACAO = 'LOTACAO', 'Mudança de Lotação'
+        REGIME = 'REGIME', 'Mudança de Regime'
+    
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name='Funcionário'
+    )
+    evento = models.CharField(max_length=20, choices=EventChoices.choices, verbose_name='Evento')
+    status = models.CharField(max_length=20, choices=Employee.StatusChoices.choices, verbose_name='Status')
+    lotacao = models.CharField(max_length=100, verbose_name='Lotação')
+    regime = models.CharField(max_length=20, choices=Employee.RegimeChoices.choices, verbose_name='Regime')
+    valid_from = models.DateField(verbose_name='Vigente desde')
+    
+    # Campos de auditoria
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    
+    class Meta:
+        verbose_name = 'Histórico Funcional'
+        verbose_name_plural = 'Históricos Funcionais'
+        ordering = ['employee', 'valid_from', 'id']
+        indexes = [
+            models.Index(fields=['employee', 'valid_from']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_evento_display()} - {self.employee.matricula} em {self.valid_from.strftime('%d/%m/%Y')}"
+    
+    @classmethod
+    def event_for_change(cls, previous, employee):
+        """Retorna o evento correspondente à alteração (ou None se nada mudou)"""
+        if previous['status'] != employee.status:
+            return cls.EventChoices.STATUS
+        if previous['lotacao'] != employee.lotacao:
+            return cls.EventChoices.LOTACAO
+        if previous['regime'] != employee.regime:
+            return cls.EventChoices.REGIME
+        return None
 
 
 class VacationRequest(models.Model):
@@ -170,3 +248,148 @@ class Payslip(models.Model):
         if not self.liquido:
             self.liquido = self.bruto - self.descontos
         super().save(*args, **kwargs)
+
+
+class VacationBalance(models.Model):
+    """Modelo para o saldo de férias (razão de períodos aquisitivos) do funcionário"""
+    
+    DIAS_POR_PERIODO = 30
+    
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='vacation_balance',
+        verbose_name='Funcionário'
+    )
+    periodos_aquisitivos = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Períodos Aquisitivos Completos'
+    )
+    periodo_atual_inicio = models.DateField(verbose_name='Início do Período Aquisitivo Atual')
+    dias_adquiridos = models.PositiveIntegerField(default=0, verbose_name='Dias Adquiridos')
+    dias_gozados = models.PositiveIntegerField(default=0, verbose_name='Dias Gozados')
+    ultima_apuracao = models.DateField(null=True, blank=True, verbose_name='Última Apuração')
+    
+    # Campos de auditoria
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    
+    class Meta:
+        verbose_name = 'Saldo de Férias'
+        verbose_name_plural = 'Saldos de Férias'
+        ordering = ['employee__user__first_name', 'employee__user__last_name']
+    
+    def __str__(self):
+        return f"Saldo de férias de {self.employee.nome_completo} - {self.saldo} dias"
+    
+    @property
+    def saldo(self):
+        return self.dias_adquiridos - self.dias_gozados
+
+
+class IncomeStatement(models.Model):
+    """Modelo para informes de rendimentos anuais"""
+    
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='income_statements',
+        verbose_name='Funcionário'
+    )
+    ano = models.PositiveIntegerField(verbose_name='Ano-Calendário')
+    total_bruto = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Total Bruto')
+    total_descontos = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Total de Descontos')
+    total_liquido = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Total Líquido')
+    meses = models.PositiveSmallIntegerField(verbose_name='Meses com Contracheque')
+    pdf_file = models.FileField(
+        upload_to='income_statements/',
+        blank=True,
+        null=True,
+        verbose_name='Arquivo PDF'
+    )
+    
+    # Campos de auditoria
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    
+    class Meta:
+        verbose_name = 'Informe de Rendimentos'
+        verbose_name_plural = 'Informes de Rendimentos'
+        ordering = ['-ano', 'employee__user__first_name']
+        unique_together = ['employee', 'ano']
+    
+    def __str__(self):
+        return f"Informe de Rendimentos {self.ano} - {self.employee.nome_completo}"
+
+
+class PayslipAnomaly(models.Model):
+    """Modelo para anomalias detectadas na comparação mensal de contracheques"""
+    
+    class MetricChoices(models.TextChoices):
+        BRUTO = 'BRUTO', 'Valor Bruto'
+        DESCONTOS = 'DESCONTOS', 'Descontos'
+        LIQUIDO = 'LIQUIDO', 'Valor Líquido'
+    
+    class ReasonChoices(models.TextChoices):
+        OUTLIER = 'OUTLIER', 'Variação atípica para o cargo/lotação'
+        BRUTO_AUSENTE = 'BRUTO_AUSENTE', 'Valor bruto ausente'
+        DESCONTO_DOBRADO = 'DESCONTO_DOBRADO', 'Descontos dobrados'
+    
+    class StatusChoices(models.TextChoices):
+        PENDENTE = 'PENDENTE', 'Pendente'
+        CONFIRMADA = 'CONFIRMADA', 'Confirmada'
+        DESCARTADA = 'DESCARTADA', 'Descartada'
+    
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='payslip_anomalies',
+        verbose_name='Funcionário'
+    )
+    payslip = models.ForeignKey(
+        Payslip,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='anomalies',
+        verbose_name='Contracheque'
+    )
+    competencia = models.DateField(verbose_name='Competência')
+    metrica = models.CharField(max_length=20, choices=MetricChoices.choices, verbose_name='Métrica')
+    motivo = models.CharField(max_length=20, choices=ReasonChoices.choices, verbose_name='Motivo')
+    valor = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Valor')
+    valor_anterior = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Valor Anterior')
+    delta = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Variação')
+    zscore = models.FloatField(null=True, blank=True, verbose_name='Z-Score Robusto')
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDENTE,
+        verbose_name='Status'
+    )
+    reviewer = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reviewed_payslip_anomalies',
+        verbose_name='Revisor'
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True, verbose_name='Revisado em')
+    review_notes = models.TextField(blank=True, verbose_name='Observações da Revisão')
+    
+    # Campos de auditoria
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    
+    class Meta:
+        verbose_name = 'Anomalia de Contracheque'
+        verbose_name_plural = 'Anomalias de Contracheque'
+        ordering = ['-competencia', 'status', '-zscore']
+        unique_together = ['employee', 'competencia', 'metrica', 'motivo']
+        indexes = [
+            models.Index(fields=['status', 'competencia']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_motivo_display()} - {self.employee.matricula} - {self.competencia.strftime('%m/%Y')}"
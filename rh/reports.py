@@ -0,0 +1,116 @@
+"""
+Geração de documentos PDF do módulo de RH
+"""
+import io
+
+from django.utils import timezone
+
+# Import condicional do ReportLab para não quebrar o sistema
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+def render_income_statement_pdf(data):
+    """
+    Gera o PDF do informe de rendimentos a partir de um dicionário com os totais.
+
+    Função de módulo (sem acesso ao banco) para poder ser executada em um
+    pool de processos.
+
+    Returns:
+        Conteúdo do PDF em bytes
+    """
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("ReportLab não está disponível. Instale com: pip install reportlab")
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    story = []
+    styles = getSampleStyleSheet()
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+    header_style = ParagraphStyle(
+        'Header',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        alignment=TA_CENTER,
+        textColor=colors.grey
+    )
+
+    story.append(Paragraph("INFORME DE RENDIMENTOS", title_style))
+    story.append(Paragraph(f"PREFEITURA MUNICIPAL - Ano-calendário {data['ano']}", header_style))
+    story.append(Spacer(1, 20))
+
+    # Informações do funcionário
+    employee_data = [
+        ['Funcionário:', data['nome']],
+        ['CPF:', data.get('cpf') or '-'],
+        ['Matrícula:', data['matricula']],
+        ['Cargo:', data['cargo']],
+        ['Lotação:', data['lotacao']],
+    ]
+    employee_table = Table(employee_data, colWidths=[2*inch, 4*inch])
+    employee_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ]))
+    story.append(employee_table)
+    story.append(Spacer(1, 20))
+
+    # Totais do ano
+    financial_data = [
+        ['Descrição', 'Valor (R$)'],
+        ['Rendimentos Brutos', f"{data['total_bruto']:,.2f}"],
+        ['Descontos', f"{data['total_descontos']:,.2f}"],
+        ['RENDIMENTOS LÍQUIDOS', f"{data['total_liquido']:,.2f}"],
+        ['Meses com contracheque', str(data['meses'])],
+    ]
+    financial_table = Table(financial_data, colWidths=[4*inch, 2*inch])
+    financial_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 3), (-1, 3), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('BACKGROUND', (0, 3), (-1, 3), colors.lightblue),
+    ]))
+    story.append(financial_table)
+    story.append(Spacer(1, 30))
+
+    story.append(Paragraph(
+        f"Documento gerado em {timezone.now().strftime('%d/%m/%Y às %H:%M')}",
+        footer_style
+    ))
+
+    doc.build(story)
+    return buffer.getvalue()
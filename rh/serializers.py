@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Employee, VacationRequest, Payslip
+from .models import Employee, VacationRequest, Payslip, VacationBalance, IncomeStatement, PayslipAnomaly
 from users.serializers import UserSerializer
 
 
@@ -146,3 +146,50 @@ class PayslipCreateSerializer(serializers.ModelSerializer):
         except Employee.DoesNotExist:
             raise serializers.ValidationError("Funcionário não encontrado.")
         return value
+
+
+class VacationBalanceSerializer(serializers.ModelSerializer):
+    """Serializer para saldo de férias"""
+    saldo = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = VacationBalance
+        fields = [
+            'id', 'employee', 'periodos_aquisitivos', 'periodo_atual_inicio',
+            'dias_adquiridos', 'dias_gozados', 'saldo', 'ultima_apuracao', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class IncomeStatementSerializer(serializers.ModelSerializer):
+    """Serializer para informes de rendimentos"""
+    employee_name = serializers.CharField(source='employee.nome_completo', read_only=True)
+    matricula = serializers.CharField(source='employee.matricula', read_only=True)
+    
+    class Meta:
+        model = IncomeStatement
+        fields = [
+            'id', 'employee', 'employee_name', 'matricula', 'ano', 'total_bruto',
+            'total_descontos', 'total_liquido', 'meses', 'pdf_file', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class PayslipAnomalySerializer(serializers.ModelSerializer):
+    """Serializer para anomalias de contracheque"""
+    employee_name = serializers.CharField(source='employee.nome_completo', read_only=True)
+    matricula = serializers.CharField(source='employee.matricula', read_only=True)
+    cargo = serializers.CharField(source='employee.cargo', read_only=True)
+    lotacao = serializers.CharField(source='employee.lotacao', read_only=True)
+    metrica_display = serializers.CharField(source='get_metrica_display', read_only=True)
+    motivo_display = serializers.CharField(source='get_motivo_display', read_only=True)
+    
+    class Meta:
+        model = PayslipAnomaly
+        fields = [
+            'id', 'employee', 'employee_name', 'matricula', 'cargo', 'lotacao', 'payslip',
+            'competencia', 'metrica', 'metrica_display', 'motivo', 'motivo_display',
+            'valor', 'valor_anterior', 'delta', 'zscore', 'status', 'reviewer',
+            'reviewed_at', 'review_notes', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,490 @@
+"""
+Serviços para o módulo de RH
+"""
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import Employee, EmployeeStatusHistory, VacationBalance, VacationRequest, Payslip, IncomeStatement
+from .reports import render_income_statement_pdf
+
+User = get_user_model()
+
+EMPLOYEE_IMPORT_REQUIRED_FIELDS = [
+    'email', 'first_name', 'last_name', 'matricula', 'cargo', 'lotacao', 'admissao_dt'
+]
+
+
+def _add_years(value: date, years: int) -> date:
+    """Soma anos a uma data tratando 29 de fevereiro"""
+    try:
+        return value.replace(year=value.year + years)
+    except ValueError:
+        return value.replace(year=value.year + years, day=28)
+
+
+def completed_periods(admissao_dt: date, ref_date: date) -> int:
+    """Quantidade de períodos aquisitivos (12 meses) completos até a data de referência"""
+    if ref_date < admissao_dt:
+        return 0
+    years = ref_date.year - admissao_dt.year
+    if _add_years(admissao_dt, years) > ref_date:
+        years -= 1
+    return years
+
+
+def _build_balance(employee_id, admissao_dt, ref_date):
+    periodos = completed_periods(admissao_dt, ref_date)
+    return VacationBalance(
+        employee_id=employee_id,
+        periodos_aquisitivos=periodos,
+        periodo_atual_inicio=_add_years(admissao_dt, periodos),
+        dias_adquiridos=periodos * VacationBalance.DIAS_POR_PERIODO,
+        ultima_apuracao=ref_date,
+    )
+
+
+def approved_vacation_days(employee_ids=None, exclude_request_id=None):
+    """
+    Dias de férias já aprovados por funcionário (uma consulta agrupada).
+
+    Usado para iniciar os saldos criados depois de existirem solicitações aprovadas.
+    """
+    queryset = VacationRequest.objects.filter(status=VacationRequest.StatusChoices.APPROVED)
+    if employee_ids is not None:
+        queryset = queryset.filter(employee_id__in=employee_ids)
+    if exclude_request_id is not None:
+        queryset = queryset.exclude(pk=exclude_request_id)
+    return dict(
+        queryset.order_by().values('employee_id').annotate(
+            total=Sum('days_requested')
+        ).values_list('employee_id', 'total')
+    )
+
+
+def accrue_vacation_balances(ref_date=None, batch_size=1000):
+    """
+    Apura os períodos aquisitivos de todos os funcionários ativos em uma única passada.
+
+    Lê os funcionários e os saldos existentes em duas consultas e grava apenas
+    as linhas que mudaram com bulk_create/bulk_update.
+
+    Returns:
+        Tupla (saldos criados, saldos atualizados)
+    """
+    ref_date = ref_date or timezone.localdate()
+
+    employees = Employee.objects.filter(
+        status=Employee.StatusChoices.ATIVO
+    ).values_list('id', 'admissao_dt')
+    balances = {
+        balance.employee_id: balance
+        for balance in VacationBalance.objects.all()
+    }
+
+    approved_days = approved_vacation_days()
+
+    to_create = []
+    to_update = []
+    for employee_id, admissao_dt in employees:
+        computed = _build_balance(employee_id, admissao_dt, ref_date)
+        balance = balances.get(employee_id)
+
+        if balance is None:
+            computed.dias_gozados = approved_days.get(employee_id, 0)
+            to_create.append(computed)
+            continue
+
+        if balance.periodos_aquisitivos != computed.periodos_aquisitivos:
+            # Preserva os dias já gozados, apenas acumula os novos períodos
+            novos_periodos = computed.periodos_aquisitivos - balance.periodos_aquisitivos
+            balance.periodos_aquisitivos = computed.periodos_aquisitivos
+            balance.periodo_atual_inicio = computed.periodo_atual_inicio
+            balance.dias_adquiridos += novos_periodos * VacationBalance.DIAS_POR_PERIODO
+            balance.ultima_apuracao = ref_date
+            balance.updated_at = timezone.now()
+            to_update.append(balance)
+
+    with transaction.atomic():
+        VacationBalance.objects.bulk_create(to_create, batch_size=batch_size)
+        VacationBalance.objects.bulk_update(
+            to_update,
+            ['periodos_aquisitivos', 'periodo_atual_inicio', 'dias_adquiridos', 'ultima_apuracao', 'updated_at'],
+            batch_size=batch_size,
+        )
+
+    return len(to_create), len(to_update)
+
+
+def get_or_create_balance(employee: Employee, exclude_request_id=None) -> VacationBalance:
+    """
+    Retorna o saldo de férias do funcionário, apurando-o se ainda não existir.
+
+    Um saldo novo já considera como gozados os dias das solicitações aprovadas
+    (exceto `exclude_request_id`, que será debitada por quem chamou).
+    """
+    try:
+        return employee.vacation_balance
+    except VacationBalance.DoesNotExist:
+        pass
+
+    computed = _build_balance(employee.id, employee.admissao_dt, timezone.localdate())
+    approved_days = approved_vacation_days([employee.id], exclude_request_id=exclude_request_id)
+    balance, _ = VacationBalance.objects.get_or_create(
+        employee=employee,
+        defaults={
+            'periodos_aquisitivos': computed.periodos_aquisitivos,
+            'periodo_atual_inicio': computed.periodo_atual_inicio,
+            'dias_adquiridos': computed.dias_adquiridos,
+            'dias_gozados': approved_days.get(employee.id, 0),
+            'ultima_apuracao': computed.ultima_apuracao,
+        }
+    )
+    return balance
+
+
+def register_vacation_taken(vacation_request):
+    """Debita do saldo os dias de uma solicitação de férias aprovada"""
+    balance = get_or_create_balance(vacation_request.employee, exclude_request_id=vacation_request.pk)
+    VacationBalance.objects.filter(pk=balance.pk).update(
+        dias_gozados=F('dias_gozados') + vacation_request.days_requested,
+        updated_at=timezone.now(),
+    )
+
+
+def _init_django_worker():
+    """Garante o Django configurado nos processos dos pools (hashing e informes)"""
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Gera os hashes das senhas em um pool de processos.
+
+    Senhas vazias geram senhas inutilizáveis (make_password(None)).
+    """
+    passwords = [password or None for password in passwords]
+    if not passwords:
+        return []
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_django_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=64))
+
+
+def read_employee_csv(file):
+    """Lê o CSV de importação de funcionários retornando uma lista de dicionários"""
+    reader = csv.DictReader(file)
+    return [
+        {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        for row in reader
+    ]
+
+
+def validate_employee_rows(rows):
+    """
+    Valida as linhas de importação de funcionários.
+
+    A unicidade de matrícula, e-mail e username é verificada com uma consulta
+    por campo (filtros __in) em vez de um exists() por linha.
+
+    Returns:
+        Tupla (linhas válidas, lista de erros {'line', 'error'})
+    """
+    regimes = set(Employee.RegimeChoices.values)
+    statuses = set(Employee.StatusChoices.values)
+    
+    errors = []
+    valid = []
+    seen_matriculas = set()
+    seen_emails = set()
+    
+    # Linha 1 é o cabeçalho do CSV
+    for line, row in enumerate(rows, start=2):
+        missing = [field for field in EMPLOYEE_IMPORT_REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            errors.append({'line': line, 'error': f"Campos obrigatórios ausentes: {', '.join(missing)}"})
+            continue
+        
+        row['email'] = row['email'].lower()
+        row['regime'] = row.get('regime') or Employee.RegimeChoices.CLT
+        row['status'] = row.get('status') or Employee.StatusChoices.ATIVO
+        
+        if row['regime'] not in regimes:
+            errors.append({'line': line, 'error': f"Regime inválido: {row['regime']}"})
+            continue
+        if row['status'] not in statuses:
+            errors.append({'line': line, 'error': f"Status inválido: {row['status']}"})
+            continue
+        
+        try:
+            row['admissao_dt'] = date.fromisoformat(row['admissao_dt'])
+        except ValueError:
+            errors.append({'line': line, 'error': 'Data de admissão inválida (use YYYY-MM-DD)'})
+            continue
+        
+        if row['matricula'] in seen_matriculas:
+            errors.append({'line': line, 'error': f"Matrícula duplicada no arquivo: {row['matricula']}"})
+            continue
+        if row['email'] in seen_emails:
+            errors.append({'line': line, 'error': f"E-mail duplicado no arquivo: {row['email']}"})
+            continue
+        
+        seen_matriculas.add(row['matricula'])
+        seen_emails.add(row['email'])
+        row['_line'] = line
+        valid.append(row)
+    
+    # Verificações de unicidade contra o banco em consultas únicas
+    existing_matriculas = set(
+        Employee.objects.filter(matricula__in=seen_matriculas).values_list('matricula', flat=True)
+    )
+    existing_emails = set(
+        User.objects.filter(email__in=seen_emails).values_list('email', flat=True)
+    )
+    existing_usernames = set(
+        User.objects.filter(username__in=seen_emails).values_list('username', flat=True)
+    )
+    
+    accepted = []
+    for row in valid:
+        if row['matricula'] in existing_matriculas:
+            errors.append({'line': row['_line'], 'error': f"Matrícula já cadastrada: {row['matricula']}"})
+        elif row['email'] in existing_emails or row['email'] in existing_usernames:
+            errors.append({'line': row['_line'], 'error': f"E-mail já cadastrado: {row['email']}"})
+        else:
+            accepted.append(row)
+    
+    errors.sort(key=lambda item: item['line'])
+    return accepted, errors
+
+
+def bulk_import_employees(rows, chunk_size=1000, workers=None):
+    """
+    Cria pares User/Employee a partir de linhas já validadas.
+
+    Os hashes de senha são calculados em um pool de processos antes da
+    transação; as inserções são feitas em lotes com bulk_create.
+
+    Returns:
+        Quantidade de funcionários criados
+    """
+    hashes = hash_passwords([row.get('password') for row in rows], workers=workers)
+    
+    created = 0
+    with transaction.atomic():
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            users = User.objects.bulk_create([
+                User(
+                    username=row['email'],
+                    email=row['email'],
+                    first_name=row['first_name'],
+                    last_name=row['last_name'],
+                    cpf=row.get('cpf') or None,
+                    role=User.RoleChoices.EMPLOYEE,
+                    password=password_hash,
+                )
+                for row, password_hash in zip(chunk, hashes[start:start + chunk_size])
+            ])
+            employees = Employee.objects.bulk_create([
+                Employee(
+                    user=user,
+                    matricula=row['matricula'],
+                    cargo=row['cargo'],
+                    lotacao=row['lotacao'],
+                    regime=row['regime'],
+                    admissao_dt=row['admissao_dt'],
+                    status=row['status'],
+                )
+                for row, user in zip(chunk, users)
+            ])
+            # bulk_create não passa por Employee.save(): registrar a admissão aqui
+            EmployeeStatusHistory.objects.bulk_create([
+                EmployeeStatusHistory(
+                    employee=employee,
+                    evento=EmployeeStatusHistory.EventChoices.ADMISSAO,
+                    status=employee.status,
+                    lotacao=employee.lotacao,
+                    regime=employee.regime,
+                    valid_from=employee.admissao_dt,
+                )
+                for employee in employees
+            ])
+            created += len(chunk)
+    
+    return created
+
+
+def aggregate_income_statements(year):
+    """
+    Totaliza os contracheques do ano por funcionário em uma única consulta (GROUP BY employee)
+    """
+    rows = Payslip.objects.filter(competencia__year=year).values(
+        'employee_id',
+        'employee__matricula',
+        'employee__cargo',
+        'employee__lotacao',
+        'employee__user__first_name',
+        'employee__user__last_name',
+        'employee__user__cpf',
+    ).annotate(
+        total_bruto=Sum('bruto'),
+        total_descontos=Sum('descontos'),
+        total_liquido=Sum('liquido'),
+        meses=Count('id'),
+    ).order_by('employee_id')
+    
+    return [
+        {
+            'ano': year,
+            'employee_id': row['employee_id'],
+            'nome': f"{row['employee__user__first_name']} {row['employee__user__last_name']}".strip(),
+            'cpf': row['employee__user__cpf'],
+            'matricula': row['employee__matricula'],
+            'cargo': row['employee__cargo'],
+            'lotacao': row['employee__lotacao'],
+            'total_bruto': row['total_bruto'],
+            'total_descontos': row['total_descontos'],
+            'total_liquido': row['total_liquido'],
+            'meses': row['meses'],
+        }
+        for row in rows
+    ]
+
+
+def _delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def generate_income_statements(year, workers=None, batch_size=500):
+    """
+    Gera os informes de rendimentos de todos os funcionários para o ano informado.
+
+    Os totais vêm de uma única consulta agregada; os PDFs são renderizados em
+    um pool de processos e os registros gravados com upsert em lote. Os PDFs
+    anteriores só são removidos depois do commit do upsert.
+
+    Returns:
+        Quantidade de informes gerados
+    """
+    statements = aggregate_income_statements(year)
+    if not statements:
+        return 0
+    
+    pdf_field = IncomeStatement._meta.get_field('pdf_file')
+    storage = pdf_field.storage
+    previous = dict(
+        IncomeStatement.objects.filter(
+            ano=year, employee_id__in=[data['employee_id'] for data in statements]
+        ).values_list('employee_id', 'pdf_file')
+    )
+    
+    objs = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_django_worker) as executor:
+            pdfs = executor.map(render_income_statement_pdf, statements, chunksize=16)
+            
+            for data, pdf_bytes in zip(statements, pdfs):
+                statement = IncomeStatement(
+                    employee_id=data['employee_id'],
+                    ano=year,
+                    total_bruto=data['total_bruto'],
+                    total_descontos=data['total_descontos'],
+                    total_liquido=data['total_liquido'],
+                    meses=data['meses'],
+                )
+                # Novo arquivo com nome livre; o anterior só é removido após o commit
+                name = pdf_field.generate_filename(statement, f"informe-{year}-{data['matricula']}.pdf")
+                statement.pdf_file.name = storage.save(name, ContentFile(pdf_bytes))
+                objs.append(statement)
+        
+        with transaction.atomic():
+            IncomeStatement.objects.bulk_create(
+                objs,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['employee', 'ano'],
+                update_fields=['total_bruto', 'total_descontos', 'total_liquido', 'meses', 'pdf_file', 'updated_at'],
+            )
+            replaced = [
+                previous[statement.employee_id] for statement in objs
+                if previous.get(statement.employee_id) and previous[statement.employee_id] != statement.pdf_file.name
+            ]
+            transaction.on_commit(lambda: _delete_files(storage, replaced))
+    except Exception:
+        # Falha na renderização ou no upsert: descarta os arquivos novos
+        for statement in objs:
+            storage.delete(statement.pdf_file.name)
+        raise
+    
+    return len(objs)
+
+
+HEADCOUNT_SQL = """
+    WITH intervals AS (
+        SELECT
+            h.employee_id,
+            h.status,
+            h.lotacao,
+            h.regime,
+            h.valid_from,
+            LEAD(h.valid_from) OVER (
+                PARTITION BY h.employee_id ORDER BY h.valid_from, h.id
+            ) AS valid_to
+        FROM rh_employeestatushistory h
+    ),
+    months AS (
+        SELECT
+            month::date AS month,
+            (month + INTERVAL '1 month' - INTERVAL '1 day')::date AS month_end
+        FROM generate_series(
+            date_trunc('month', %(start)s::date),
+            date_trunc('month', %(end)s::date),
+            INTERVAL '1 month'
+        ) AS month
+    )
+    SELECT
+        m.month,
+        i.lotacao,
+        i.regime,
+        COUNT(*) AS headcount,
+        SUM(COUNT(*)) OVER (PARTITION BY m.month) AS month_total
+    FROM months m
+    JOIN intervals i
+        ON i.valid_from <= m.month_end
+        AND (i.valid_to IS NULL OR i.valid_to > m.month_end)
+    WHERE i.status = %(status)s
+        AND (%(lotacao)s::text IS NULL OR i.lotacao = %(lotacao)s)
+        AND (%(regime)s::text IS NULL OR i.regime = %(regime)s)
+    GROUP BY m.month, i.lotacao, i.regime
+    ORDER BY m.month, i.lotacao, i.regime
+"""
+
+
+def headcount_series(start, end, status=Employee.StatusChoices.ATIVO, lotacao=None, regime=None):
+    """
+    Série mensal de efetivo por lotação/regime a partir do histórico funcional.
+
+    Uma única consulta: LEAD() transforma o histórico em intervalos de vigência
+    e cada mês conta os funcionários cuja situação vigente no último dia do mês
+    corresponde aos filtros.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(HEADCOUNT_SQL, {
+            'start': start,
+            'end': end,
+            'status': status,
+            'lotacao': lotacao or None,
+            'regime': regime or None,
+        })
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -1,6 +1,6 @@
 from django.shortcuts import render
-from django.db import models
-from rest_framework import viewsets, status
+from django.db import models, transaction
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
@@ -8,6 +8,7 @@ from django.http import HttpResponse, FileResponse
 from django.conf import settings
 import os
 import io
+from datetime import date
 
 # Import condicional do ReportLab para não quebrar o sistema
 try:
@@ -23,8 +24,12 @@ except ImportError:
     REPORTLAB_AVAILABLE = False
     print("⚠️ ReportLab não disponível. Funcionalidade de PDF será limitada.")
 
-from .models import Employee, VacationRequest, Payslip
-from .serializers import EmployeeSerializer, VacationRequestSerializer, PayslipSerializer
+from .models import Employee, VacationRequest, Payslip, IncomeStatement, PayslipAnomaly
+from .serializers import (
+    EmployeeSerializer, VacationRequestSerializer, PayslipSerializer,
+    VacationBalanceSerializer, IncomeStatementSerializer, PayslipAnomalySerializer
+)
+from .services import get_or_create_balance, register_vacation_taken, headcount_series
 from users.permissions import IsMasterAdmin, IsSectorAdmin, IsSectorOperator, IsEmployeeSelf
 
 
@@ -66,6 +71,53 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 {'error': 'Perfil de funcionário não encontrado'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    @action(detail=False, methods=['get'])
+    def headcount(self, request):
+        """
+        Série mensal de efetivo por lotação/regime
+        
+        Parâmetros: start e end (YYYY-MM), status (padrão ATIVO), lotacao, regime
+        """
+        today = timezone.localdate()
+        try:
+            start = self._parse_month(request.query_params.get('start')) or today.replace(year=today.year - 1, day=1)
+            end = self._parse_month(request.query_params.get('end')) or today.replace(day=1)
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'Período inválido. Use o formato YYYY-MM.'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if start > end:
+            return Response(
+                {'error': 'O início deve ser anterior ao fim do período.'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        series = headcount_series(
+            start,
+            end,
+            status=request.query_params.get('status', Employee.StatusChoices.ATIVO),
+            lotacao=request.query_params.get('lotacao'),
+            regime=request.query_params.get('regime'),
+        )
+        return Response(series)
+    
+    @staticmethod
+    def _parse_month(value):
+        if not value:
+            return None
+        year, month = value.split('-')[:2]
+        return date(int(year), int(month), 1)
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsEmployeeSelf])
+    def vacation_balance(self, request, pk=None):
+        """Retorna o saldo de férias do funcionário"""
+        employee = self.get_object()
+        balance = get_or_create_balance(employee)
+        serializer = VacationBalanceSerializer(balance)
+        return Response(serializer.data)
 
 
 class VacationRequestViewSet(viewsets.ModelViewSet):
@@ -109,6 +161,24 @@ class VacationRequestViewSet(viewsets.ModelViewSet):
             # ADMIN pode criar para qualquer funcionário
             serializer.save()
     
+    def _lock_unapproved(self, instance, message):
+        """Bloqueia a solicitação e recusa alterações depois da aprovação (dias já debitados do saldo)"""
+        locked = VacationRequest.objects.select_for_update().get(pk=instance.pk)
+        if locked.status == VacationRequest.StatusChoices.APPROVED:
+            raise serializers.ValidationError({'error': message})
+    
+    def perform_update(self, serializer):
+        """Atualiza a solicitação, exceto se já aprovada"""
+        with transaction.atomic():
+            self._lock_unapproved(serializer.instance, 'Solicitação já aprovada não pode ser alterada')
+            serializer.save()
+    
+    def perform_destroy(self, instance):
+        """Exclui a solicitação, exceto se já aprovada"""
+        with transaction.atomic():
+            self._lock_unapproved(instance, 'Solicitação já aprovada não pode ser excluída')
+            instance.delete()
+    
     @action(detail=True, methods=['post'], permission_classes=[IsSectorAdmin])
     def approve(self, request, pk=None):
         """Aprova uma solicitação de férias"""
@@ -122,10 +192,22 @@ class VacationRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vacation_request.status = VacationRequest.StatusChoices.APPROVED
-        vacation_request.approver = user
-        vacation_request.approved_at = timezone.now()
-        vacation_request.save()
+        with transaction.atomic():
+            # Bloqueia a solicitação para que aprovações simultâneas não debitem o saldo duas vezes
+            vacation_request = VacationRequest.objects.select_for_update().get(pk=vacation_request.pk)
+            if vacation_request.status == VacationRequest.StatusChoices.APPROVED:
+                return Response(
+                    {'error': 'Solicitação já aprovada'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            vacation_request.status = VacationRequest.StatusChoices.APPROVED
+            vacation_request.approver = user
+            vacation_request.approved_at = timezone.now()
+            vacation_request.save()
+            
+            # Debitar os dias do saldo de férias
+            register_vacation_taken(vacation_request)
         
         serializer = self.get_serializer(vacation_request)
         return Response(serializer.data)
@@ -144,11 +226,21 @@ class VacationRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vacation_request.status = VacationRequest.StatusChoices.REJECTED
-        vacation_request.approver = user
-        vacation_request.approved_at = timezone.now()
-        vacation_request.rejection_reason = rejection_reason
-        vacation_request.save()
+        with transaction.atomic():
+            vacation_request = VacationRequest.objects.select_for_update().get(pk=vacation_request.pk)
+            
+            # Os dias de uma solicitação aprovada já foram debitados do saldo
+            if vacation_request.status == VacationRequest.StatusChoices.APPROVED:
+                return Response(
+                    {'error': 'Solicitação já aprovada não pode ser rejeitada'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            vacation_request.status = VacationRequest.StatusChoices.REJECTED
+            vacation_request.approver = user
+            vacation_request.approved_at = timezone.now()
+            vacation_request.rejection_reason = rejection_reason
+            vacation_request.save()
         
         serializer = self.get_serializer(vacation_request)
         return Response(serializer.data)
@@ -370,3 +462,124 @@ class PayslipViewSet(viewsets.ModelViewSet):
         buffer.seek(0)
         
         return buffer
+
+
+class IncomeStatementViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para informes de rendimentos (gerados pelo comando generate_income_statements)"""
+    queryset = IncomeStatement.objects.all()
+    serializer_class = IncomeStatementSerializer
+    permission_classes = [IsEmployeeSelf]
+    sector = 'RH'
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = IncomeStatement.objects.none()
+        
+        # MASTER_ADMIN vê todos os informes
+        if user.is_master_admin:
+            queryset = IncomeStatement.objects.all()
+        
+        # SECTOR_ADMIN e SECTOR_OPERATOR veem informes do RH
+        elif user.is_sector_admin or user.is_sector_operator:
+            if user.sector == 'RH':
+                queryset = IncomeStatement.objects.all()
+        
+        # EMPLOYEE vê apenas seus próprios informes
+        elif user.is_employee:
+            queryset = IncomeStatement.objects.filter(employee__user=user)
+        
+        queryset = queryset.select_related('employee__user')
+        
+        # Aplicar filtros de query string
+        ano = self.request.query_params.get('ano')
+        if ano:
+            try:
+                queryset = queryset.filter(ano=int(ano))
+            except (ValueError, TypeError):
+                pass
+        
+        employee_id = self.request.query_params.get('employee_id')
+        if employee_id:
+            try:
+                queryset = queryset.filter(employee_id=int(employee_id))
+            except (ValueError, TypeError):
+                pass
+        
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download do informe de rendimentos em PDF"""
+        statement = self.get_object()
+        
+        if not statement.pdf_file:
+            return Response(
+                {'error': 'Arquivo do informe ainda não foi gerado'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        filename = f"informe-rendimentos-{statement.ano}-{statement.employee.matricula}.pdf"
+        response = FileResponse(
+            statement.pdf_file.open('rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf'
+        )
+        response['Access-Control-Expose-Headers'] = 'Content-Disposition, Content-Length'
+        return response
+
+
+class PayslipAnomalyViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para revisão das anomalias de contracheque (geradas pelo comando detect_payslip_anomalies)"""
+    queryset = PayslipAnomaly.objects.all()
+    serializer_class = PayslipAnomalySerializer
+    permission_classes = [IsSectorAdmin]
+    sector = 'RH'
+    
+    def get_queryset(self):
+        queryset = PayslipAnomaly.objects.select_related('employee__user')
+        
+        # Aplicar filtros de query string
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        motivo = self.request.query_params.get('motivo')
+        if motivo:
+            queryset = queryset.filter(motivo=motivo)
+        
+        competencia = self.request.query_params.get('competencia')
+        if competencia:
+            # Espera formato YYYY-MM
+            try:
+                year, month = competencia.split('-')[:2]
+                queryset = queryset.filter(competencia__year=int(year), competencia__month=int(month))
+            except (ValueError, TypeError):
+                pass
+        
+        lotacao = self.request.query_params.get('lotacao')
+        if lotacao:
+            queryset = queryset.filter(employee__lotacao=lotacao)
+        
+        return queryset
+    
+    @action(detail=True, methods=['post'])
+    def review(self, request, pk=None):
+        """Registra a revisão de uma anomalia (CONFIRMADA ou DESCARTADA)"""
+        anomaly = self.get_object()
+        new_status = request.data.get('status')
+        
+        if new_status not in (PayslipAnomaly.StatusChoices.CONFIRMADA, PayslipAnomaly.StatusChoices.DESCARTADA):
+            return Response(
+                {'error': 'Status deve ser CONFIRMADA ou DESCARTADA'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        anomaly.status = new_status
+        anomaly.reviewer = request.user
+        anomaly.reviewed_at = timezone.now()
+        anomaly.review_notes = request.data.get('review_notes', '')
+        anomaly.save()
+        
+        serializer = self.get_serializer(anomaly)
+        return Response(serializer.data)